@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+"""Machine-wide admission control of the Checkstyle processes, shared by all the concurrent invocations."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import contextlib
+import os
+import time
+
+from checkstyleinterface.util import lockFile, unlockFile
+
+# Interval, in seconds, between two attempts to get an execution slot
+SLOT_POLL_INTERVAL = 0.2
+
+
+class ExecutionSlots:
+    """Semaphore limiting the number of Checkstyle processes running at once on the machine.
+
+    Each slot is a lock file in sFolder, locked by the process running Checkstyle in it. The locks are released by the
+    system when a process exits, even abruptly, so that a slot is never lost. The invocations configured with different
+    counts of slots share the first ones.
+    """
+
+    def __init__(self, sFolder, iSlots):
+        self.sFolder = sFolder
+        self.iSlots = iSlots
+
+    @contextlib.contextmanager
+    def acquire(self, xStopWaiting=None):
+        """Waits for a free slot, and yields True once it is acquired. While waiting, xStopWaiting is called regularly,
+        and once more when a slot is acquired after waiting: if it returns True, the slot is not used and False is
+        yielded."""
+        os.makedirs(self.sFolder, exist_ok=True)
+        bWaited = False
+        while True:
+            for iSlot in range(self.iSlots):
+                oFile = open(os.path.join(self.sFolder, "slot-%d.lock" % iSlot), "a+b")
+                if lockFile(oFile, bWait=False):
+                    break
+                oFile.close()
+            else:
+                if not bWaited:
+                    print("Waiting for one of the %d Checkstyle processes of the machine to terminate..."
+                          % self.iSlots)
+                    bWaited = True
+                if xStopWaiting is not None and xStopWaiting():
+                    yield False
+                    return
+                time.sleep(SLOT_POLL_INTERVAL)
+                continue
+
+            try:
+                if bWaited and xStopWaiting is not None and xStopWaiting():
+                    yield False
+                else:
+                    yield True
+            finally:
+                unlockFile(oFile)
+                oFile.close()
+            return
@@ -27,13 +27,27 @@ __author__ = "Quoc-Nam Dessoulles"
 __email__ = "cokie.forever@gmail.com"
 __license__ = "MIT"
 
+import functools
 import os
-import subprocess
+import re
 import tkinter as tk
 import tkinter.messagebox
 from tkinter import ttk
 
-from checkstyleinterface.util import button, MultiColumnListbox, checkButton, label, getIntellijLocation, startFile
+from checkstyleinterface.editor import EditorLauncher
+from checkstyleinterface.errorindex import ErrorIndex
+from checkstyleinterface.util import button, MultiColumnListbox, checkButton, label, entry, comboBox
+
+# Choice of the filter comboboxes matching all the values
+FILTER_ALL = "All"
+# Order of the severities when sorting, the most severe first
+SEVERITY_RANKS = {"error": 0, "warning": 1, "info": 2}
+# Choice of the grouping combobox displaying one row per error
+GROUP_BY_NONE = "None"
+# Number of errors above which they are grouped by message when the interface opens
+AUTO_ROLLUP_THRESHOLD = 5000
+# Values varying between the messages of a check: quoted texts and numbers
+MESSAGE_VALUE_REGEX = re.compile(r"'[^']*'|\"[^\"]*\"|\b\d+(?:\.\d+)?\b")
 
 
 class CheckstyleError:
@@ -63,19 +77,110 @@ def getItemValuesFromError(oError):
             "%s at %d:%d" % (oError.sFile, oError.iLine, oError.iCol), oError.sMessage)
 
 
+def getSortKeysFromError(oError):
+    return ((SEVERITY_RANKS.get(oError.sSeverity.lower(), len(SEVERITY_RANKS)), oError.bIgnored), oError.sCategory,
+            (os.path.normcase(oError.sFile), oError.iLine, oError.iCol), oError.sMessage)
+
+
+@functools.lru_cache(maxsize=65536)
+def getMessageTemplate(sMessage):
+    """Returns the message without its varying values, e.g. "'...' is a magic number." for all the magic numbers."""
+    return MESSAGE_VALUE_REGEX.sub(getValuePlaceholder, sMessage or "")
+
+
+def getValuePlaceholder(oMatch):
+    sValue = oMatch.group(0)
+    # The quotes are kept around the texts
+    return "N" if sValue[0].isdigit() else sValue[0] + "..." + sValue[0]
+
+
+# Group keys of the errors, as (category, file, message template), None standing for the values differing in a group
+GROUPINGS = {
+    GROUP_BY_NONE: None,
+    "File": lambda e: (None, e.sFile, None),
+    "File and category": lambda e: (e.sCategory, e.sFile, None),
+    "Message": lambda e: (e.sCategory, None, getMessageTemplate(e.sMessage))
+}
+
+
+def getSeverityCounts(lErrors):
+    # A single pass, as the groups can hold thousands of errors
+    dCounts = dict.fromkeys(SEVERITY_RANKS, 0)
+    iIgnoredCount = 0
+    for oError in lErrors:
+        if oError.bIgnored:
+            iIgnoredCount += 1
+        else:
+            sSeverity = oError.sSeverity.lower()
+            if sSeverity in dCounts:
+                dCounts[sSeverity] += 1
+    return dCounts, iIgnoredCount
+
+
+def getItemValuesFromGroup(tKey, lErrors):
+    sCategory, sFile, sMessage = tKey
+    dCounts, iIgnoredCount = getSeverityCounts(lErrors)
+    lCounts = ["%d %s%s" % (iCount, sSeverity, "s" if iCount > 1 else "") for sSeverity, iCount in dCounts.items()
+               if iCount]
+    if iIgnoredCount:
+        lCounts.append("%d ignored" % iIgnoredCount)
+    if sFile is None:
+        iFileCount = len(set(e.sFile for e in lErrors))
+        sFile = "%d file%s" % (iFileCount, "s" if iFileCount > 1 else "")
+    if sMessage is None:
+        sMessage = "%d violation%s" % (len(lErrors), "s" if len(lErrors) > 1 else "")
+    return ", ".join(lCounts), sCategory or "", sFile, sMessage
+
+
+def getSortKeysFromGroup(tKey, lErrors):
+    # Groups with the most severe errors first, then with the most of them
+    sCategory, sFile, sMessage = tKey
+    dCounts, _ = getSeverityCounts(lErrors)
+    return (tuple(-iCount for iCount in dCounts.values()), sCategory or "",
+            (os.path.normcase(sFile) if sFile is not None else "", 0, 0),
+            sMessage if sMessage is not None else len(lErrors))
+
+
+def getItemValuesFromFile(sFile, lErrors):
+    return getItemValuesFromGroup((None, sFile, None), lErrors)
+
+
+def getSortKeysFromFile(sFile, lErrors):
+    return getSortKeysFromGroup((None, sFile, None), lErrors)
+
+
+def getTagFromErrors(lErrors):
+    lActiveErrors = [e for e in lErrors if not e.bIgnored]
+    lSeverities = set(e.sSeverity.lower() for e in lActiveErrors or lErrors)
+    sTag = next((s for s in ["error", "warning", "info"] if s in lSeverities), "info")
+    return sTag if lActiveErrors else "%s.ignored" % sTag
+
+
 class Application(ttk.Frame):
-    def __init__(self, oMaster, lCheckstyleErrorsProvider):
+    def __init__(self, oMaster, lCheckstyleErrorsProvider, oEditorLauncher=None):
         super().__init__(oMaster)
         self.oMaster = oMaster
         self.lCheckstyleErrorsProvider = lCheckstyleErrorsProvider
+        self.oEditorLauncher = oEditorLauncher if oEditorLauncher is not None else EditorLauncher()
         self.oListView = None
+        self.lCheckstyleErrors = []
+        self.oErrorIndex = ErrorIndex([])
         self.dCheckstyleErrors = {}
+        # Group item => (group key, displayed errors of this group), when grouped, see GROUPINGS
+        self.dGroupItems = {}
+        self.oFilterTextEntry = None
+        self.oFilterSeverityBox = None
+        self.oFilterCategoryBox = None
+        self.oFilterPathEntry = None
         self.oIgnoreButton = None
         self.oIgnoreCategoryButton = None
         self.oIgnoreAllButton = None
         self.oUnignoreAllButton = None
         self.oShowIgnoredVar = None
+        self.oGroupByBox = None
         self.bUnignore = False
+        # Categories ignored as a whole, given to the provider on refresh
+        self.setIgnoredCategories = set()
         self.oErrorsLabel = None
         self.oWarningsLabel = None
 
@@ -92,17 +197,39 @@ class Application(ttk.Frame):
             self.oMaster.protocol("WM_DELETE_WINDOW", lambda *args: self.onClose())
             self.pack(fill=tk.BOTH, expand=True)
             self.createWidgets()
+            if len(lCheckstyleErrors) > AUTO_ROLLUP_THRESHOLD:
+                # Mostly repetitive violations, e.g. on legacy code, better reviewed by group
+                self.setGrouping("Message")
             self.populateView(lCheckstyleErrors)
 
     def mainloop(self, n=0):
-        if self.dCheckstyleErrors:
+        if self.lCheckstyleErrors:
             super().mainloop(n=n)
         return self.iRetVal
 
     def createWidgets(self):
+        oFilterArea = ttk.Frame(self)
+        oFilterArea.grid(row=0, column=0, columnspan=2, sticky=tk.E + tk.W, pady=5)
+
+        label(oFilterArea, "Search:").pack(side=tk.LEFT, padx=(5, 0))
+        self.oFilterTextEntry = entry(oFilterArea, xCallback=lambda _: self.repopulateView(), bOnlyOnEnterPress=False)
+        self.oFilterTextEntry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 10))
+        label(oFilterArea, "Severity:").pack(side=tk.LEFT)
+        self.oFilterSeverityBox = comboBox(oFilterArea, [FILTER_ALL, "Error", "Warning", "Info"],
+                                           xCallback=lambda _: self.repopulateView())
+        self.oFilterSeverityBox.config(state="readonly", width=10)
+        self.oFilterSeverityBox.pack(side=tk.LEFT, padx=(5, 10))
+        label(oFilterArea, "Category:").pack(side=tk.LEFT)
+        self.oFilterCategoryBox = comboBox(oFilterArea, [FILTER_ALL], xCallback=lambda _: self.repopulateView())
+        self.oFilterCategoryBox.config(state="readonly", width=25)
+        self.oFilterCategoryBox.pack(side=tk.LEFT, padx=(5, 10))
+        label(oFilterArea, "Path:").pack(side=tk.LEFT)
+        self.oFilterPathEntry = entry(oFilterArea, xCallback=lambda _: self.repopulateView(), bOnlyOnEnterPress=False)
+        self.oFilterPathEntry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
         self.oListView = MultiColumnListbox(self, ["Severity", "Category", "Source", "Message"],
                                             relief=tk.SUNKEN, borderwidth=1)
-        self.oListView.grid(row=0, column=0, sticky=tk.N + tk.E + tk.W + tk.S)
+        self.oListView.grid(row=1, column=0, sticky=tk.N + tk.E + tk.W + tk.S)
         self.oListView.oTreeView.tag_configure("error", background="#ff7777")
         self.oListView.oTreeView.tag_configure("warning", background="#ffff77")
         self.oListView.oTreeView.tag_configure("info", background="#7777ff")
@@ -111,9 +238,10 @@ class Application(ttk.Frame):
         self.oListView.oTreeView.tag_configure("info.ignored", background="#bbbbff", foreground="#777777")
         self.oListView.oTreeView.bind("<ButtonRelease-1>", lambda *args: self.onViewClicked())
         self.oListView.oTreeView.bind("<Double-1>", lambda *args: self.onViewDoubleClicked())
+        self.oListView.oTreeView.bind("<<TreeviewOpen>>", lambda *args: self.onViewItemOpened())
 
         oButtonsArea = ttk.Frame(self)
-        oButtonsArea.grid(row=0, column=1, sticky=tk.N + tk.S, ipadx=10)
+        oButtonsArea.grid(row=1, column=1, sticky=tk.N + tk.S, ipadx=10)
 
         self.oIgnoreButton = button(oButtonsArea, "Ignore", xCallback=lambda: self.onIgnoreButtonClicked())
         self.oIgnoreButton.pack(side=tk.TOP, pady=(5, 0))
@@ -130,15 +258,19 @@ class Application(ttk.Frame):
                                    xCallback=lambda _: self.repopulateView())
         oCheckButton.pack(side=tk.TOP, pady=(15, 0))
         self.oShowIgnoredVar = oCheckButton.oBoolVar
+        label(oButtonsArea, "Group by:").pack(side=tk.TOP, pady=(10, 0))
+        self.oGroupByBox = comboBox(oButtonsArea, list(GROUPINGS.keys()), xCallback=lambda _: self.onGroupByChanged())
+        self.oGroupByBox.config(state="readonly", width=16)
+        self.oGroupByBox.pack(side=tk.TOP)
 
         button(oButtonsArea, "Refresh", xCallback=lambda: self.onRefreshButtonClicked()) \
             .pack(side=tk.BOTTOM, pady=(0, 15))
 
         tk.Grid.columnconfigure(self, 0, weight=1)
-        tk.Grid.rowconfigure(self, 0, weight=1)
+        tk.Grid.rowconfigure(self, 1, weight=1)
 
         oValidationArea = ttk.Frame(self)
-        oValidationArea.grid(row=1, column=0, columnspan=2, sticky=tk.E + tk.W, ipady=5)
+        oValidationArea.grid(row=2, column=0, columnspan=2, sticky=tk.E + tk.W, ipady=5)
 
         self.oErrorsLabel = label(oValidationArea, "Errors: 0 (and 0 ignored)")
         self.oErrorsLabel.pack(side=tk.LEFT, padx=(5, 0))
@@ -152,17 +284,73 @@ class Application(ttk.Frame):
             .pack(side=tk.RIGHT, pady=(10, 0))
 
     def populateView(self, lCheckstyleErrors):
+        # The indexes are built once per result set, so that changing the filters does not scan all the errors
+        self.lCheckstyleErrors = list(lCheckstyleErrors)
+        self.oErrorIndex = ErrorIndex(self.lCheckstyleErrors)
+        self.oFilterCategoryBox.config(values=[FILTER_ALL] + self.oErrorIndex.getCategories())
+        self.repopulateView()
+
+    def repopulateView(self):
         bShowIgnored = self.oShowIgnoredVar.get()
-        lDisplayedErrors = [e for e in lCheckstyleErrors if bShowIgnored or not e.bIgnored]
-        lItemsIds = self.oListView.setData(map(getItemValuesFromError, lDisplayedErrors))
-        self.dCheckstyleErrors = {sItemId: lDisplayedErrors[iIdx] for iIdx, sItemId in enumerate(lItemsIds)}
-        lHiddenErrors = [e for e in lCheckstyleErrors if not bShowIgnored and e.bIgnored]
-        for iIdx, oError in enumerate(lHiddenErrors):
-            self.dCheckstyleErrors["__hidden_%d" % iIdx] = oError
+        lMatchingIdx = self.oErrorIndex.query(**self.getFilters())
+        lDisplayedErrors = [self.lCheckstyleErrors[i] for i in lMatchingIdx
+                            if bShowIgnored or not self.lCheckstyleErrors[i].bIgnored]
+        xGroupKey = GROUPINGS[self.oGroupByBox.oStringVar.get()]
+        if xGroupKey is not None:
+            self.populateGroupItems(lDisplayedErrors, xGroupKey)
+        else:
+            lItemsIds = self.oListView.setData(map(getItemValuesFromError, lDisplayedErrors),
+                                               map(getSortKeysFromError, lDisplayedErrors))
+            self.dCheckstyleErrors = {sItemId: lDisplayedErrors[iIdx] for iIdx, sItemId in enumerate(lItemsIds)}
+            self.dGroupItems = {}
         self.doUpdateView()
 
-    def repopulateView(self):
-        self.populateView(self.dCheckstyleErrors.values())
+    def populateGroupItems(self, lDisplayedErrors, xGroupKey):
+        # Only the groups are inserted, the errors of a group are inserted when it is expanded
+        setOpenGroups = set(tKey for sItemId, (tKey, _) in self.dGroupItems.items()
+                            if self.oListView.oTreeView.item(sItemId, "open"))
+        dErrorsByGroup = {}
+        for oError in lDisplayedErrors:
+            dErrorsByGroup.setdefault(xGroupKey(oError), []).append(oError)
+        lItemsIds = self.oListView.setGroups([getItemValuesFromGroup(t, l) for t, l in dErrorsByGroup.items()],
+                                             [getSortKeysFromGroup(t, l) for t, l in dErrorsByGroup.items()])
+        self.dGroupItems = dict(zip(lItemsIds, dErrorsByGroup.items()))
+        self.dCheckstyleErrors = {}
+        for sItemId, (tKey, _) in self.dGroupItems.items():
+            if tKey in setOpenGroups:
+                self.expandGroupItem(sItemId)
+                self.oListView.oTreeView.item(sItemId, open=True)
+
+    def expandGroupItem(self, sGroupItemId):
+        _, lErrors = self.dGroupItems[sGroupItemId]
+        if any(sItemId in self.dCheckstyleErrors for sItemId in self.oListView.oTreeView.get_children(sGroupItemId)):
+            return
+        lItemsIds = self.oListView.setChildren(sGroupItemId, map(getItemValuesFromError, lErrors),
+                                               map(getSortKeysFromError, lErrors))
+        for sItemId, oError in zip(lItemsIds, lErrors):
+            self.dCheckstyleErrors[sItemId] = oError
+            self.updateErrorItem(sItemId, oError)
+
+    def getSelectedErrors(self, lItemsIds=None):
+        if lItemsIds is None:
+            lItemsIds = self.oListView.oTreeView.selection()
+        lErrors = []
+        for sItemId in lItemsIds:
+            if sItemId in self.dGroupItems:
+                lErrors.extend(self.dGroupItems[sItemId][1])
+            elif sItemId in self.dCheckstyleErrors:
+                lErrors.append(self.dCheckstyleErrors[sItemId])
+        return lErrors
+
+    def getFilters(self):
+        sSeverity = self.oFilterSeverityBox.oStringVar.get()
+        sCategory = self.oFilterCategoryBox.oStringVar.get()
+        return {
+            "sText": self.oFilterTextEntry.oStringVar.get().strip(),
+            "sSeverity": sSeverity if sSeverity != FILTER_ALL else None,
+            "sCategory": sCategory if sCategory != FILTER_ALL else None,
+            "sPathPrefix": self.oFilterPathEntry.oStringVar.get().strip()
+        }
 
     def updateView(self):
         if not self.oShowIgnoredVar.get():
@@ -174,7 +362,7 @@ class Application(ttk.Frame):
         self.onOkButtonClicked()
 
     def onOkButtonClicked(self):
-        oIter = (e for e in self.dCheckstyleErrors.values() if not e.bIgnored and e.sSeverity.lower() == "error")
+        oIter = (e for e in self.lCheckstyleErrors if not e.bIgnored and e.sSeverity.lower() == "error")
         if next(oIter, None) is not None \
                 and tk.messagebox.askquestion("Confirmation",
                                               "There are still errors. Are you sure you want to proceed?",
@@ -190,41 +378,57 @@ class Application(ttk.Frame):
         self.configureIgnoreButtons()
 
     def onViewDoubleClicked(self):
-        oError = self.dCheckstyleErrors[self.oListView.oTreeView.focus()]
-        sIntellijExe = getIntellijLocation()
-        if sIntellijExe:
-            print("Opening file with IntelliJ")
-            lArgs = [sIntellijExe, "--line", str(oError.iLine), "--column", str(oError.iCol), oError.sFile]
-            subprocess.Popen(lArgs)
-        else:
-            print("Opening file with default editor")
-            startFile(oError.sFile)
+        oError = self.dCheckstyleErrors.get(self.oListView.oTreeView.focus())
+        if oError is None:
+            # Group item, expanded or collapsed by the double click
+            return
+        self.oEditorLauncher.open(oError.sFile, oError.iLine, oError.iCol)
+
+    def onViewItemOpened(self):
+        sItemId = self.oListView.oTreeView.focus()
+        if sItemId in self.dGroupItems:
+            self.expandGroupItem(sItemId)
+
+    def setGrouping(self, sGrouping):
+        self.oGroupByBox.oStringVar.set(sGrouping)
+
+    def onGroupByChanged(self):
+        self.oListView.showTree(GROUPINGS[self.oGroupByBox.oStringVar.get()] is not None)
+        self.repopulateView()
 
     def onIgnoreButtonClicked(self):
-        for sItemId in self.oListView.oTreeView.selection():
-            self.dCheckstyleErrors[sItemId].bIgnored = not self.bUnignore
+        for oError in self.getSelectedErrors():
+            oError.bIgnored = not self.bUnignore
+            if self.bUnignore:
+                self.setIgnoredCategories.discard(oError.sCategory)
         self.updateView()
 
     def onIgnoreCategoryButtonClicked(self):
-        lCategories = set(self.dCheckstyleErrors[sItemId].sCategory for sItemId in self.oListView.oTreeView.selection())
-        for oError in self.dCheckstyleErrors.values():
+        # A selected group stands for all its displayed errors
+        lCategories = set(e.sCategory for e in self.getSelectedErrors())
+        if self.bUnignore:
+            self.setIgnoredCategories -= lCategories
+        else:
+            self.setIgnoredCategories |= lCategories
+        for oError in self.lCheckstyleErrors:
             if oError.sCategory in lCategories:
                 oError.bIgnored = not self.bUnignore
         self.updateView()
 
     def onIgnoreAllButtonClicked(self):
-        for oError in self.dCheckstyleErrors.values():
+        for oError in self.lCheckstyleErrors:
             oError.bIgnored = True
         self.updateView()
 
     def onUnignoreAllButtonClicked(self):
-        for oError in self.dCheckstyleErrors.values():
+        self.setIgnoredCategories.clear()
+        for oError in self.lCheckstyleErrors:
             oError.bIgnored = False
         self.updateView()
 
     def onRefreshButtonClicked(self):
-        lOldCheckstyleErrors = list(self.dCheckstyleErrors.values())
-        lNewCheckstyleErrors = self.lCheckstyleErrorsProvider()
+        lOldCheckstyleErrors = self.lCheckstyleErrors
+        lNewCheckstyleErrors = self.lCheckstyleErrorsProvider(sorted(self.setIgnoredCategories))
         for oError in lNewCheckstyleErrors:
             try:
                 iIdx = lOldCheckstyleErrors.index(oError)
@@ -235,14 +439,19 @@ class Application(ttk.Frame):
 
     def doUpdateView(self):
         for sItemId, oError in self.dCheckstyleErrors.items():
-            if not sItemId.startswith("__hidden_"):
-                sTag = oError.sSeverity.lower()
-                if oError.bIgnored:
-                    sTag = "%s.ignored" % sTag
-                self.oListView.oTreeView.item(sItemId, values=getItemValuesFromError(oError), tags=(sTag,))
+            self.updateErrorItem(sItemId, oError)
+        for sItemId, (tKey, lErrors) in self.dGroupItems.items():
+            self.oListView.oTreeView.item(sItemId, values=getItemValuesFromGroup(tKey, lErrors),
+                                          tags=(getTagFromErrors(lErrors),))
+            self.oListView.setSortKeys(sItemId, getSortKeysFromGroup(tKey, lErrors))
         self.configureIgnoreButtons()
         self.updateLabels()
 
+    def updateErrorItem(self, sItemId, oError):
+        self.oListView.oTreeView.item(sItemId, values=getItemValuesFromError(oError),
+                                      tags=(getTagFromErrors([oError]),))
+        self.oListView.setSortKeys(sItemId, getSortKeysFromError(oError))
+
     def configureIgnoreButtons(self):
         lSelectedItems = self.oListView.oTreeView.selection()
         if not lSelectedItems:
@@ -252,8 +461,8 @@ class Application(ttk.Frame):
             self.oIgnoreButton.config(state=tk.NORMAL)
             self.oIgnoreCategoryButton.config(state=tk.NORMAL)
             if len(lSelectedItems) == 1:
-                oCheckstyleError = self.dCheckstyleErrors[lSelectedItems[0]]
-                self.bUnignore = oCheckstyleError.bIgnored
+                lErrors = self.getSelectedErrors(lSelectedItems)
+                self.bUnignore = bool(lErrors) and all(e.bIgnored for e in lErrors)
                 if self.bUnignore:
                     self.oIgnoreButton.config(text="Unignore")
                     self.oIgnoreCategoryButton.config(text="Unignore category")
@@ -261,16 +470,16 @@ class Application(ttk.Frame):
                     self.oIgnoreButton.config(text="Ignore")
                     self.oIgnoreCategoryButton.config(text="Ignore category")
 
-        dErrors = {e.bIgnored: e for e in self.dCheckstyleErrors.values()}
+        dErrors = {e.bIgnored: e for e in self.lCheckstyleErrors}
         self.oIgnoreAllButton.config(state=tk.NORMAL if dErrors.get(False) else tk.DISABLED)
         self.oUnignoreAllButton.config(state=tk.NORMAL if dErrors.get(True) else tk.DISABLED)
 
     def updateLabels(self):
-        lErrors = [e for e in self.dCheckstyleErrors.values() if e.sSeverity.lower() == "error"]
+        lErrors = [e for e in self.lCheckstyleErrors if e.sSeverity.lower() == "error"]
         iIgnoredErrors = len(list(filter(lambda e: e.bIgnored, lErrors)))
         self.oErrorsLabel.config(text="Errors: %d (and %d ignored)"
                                       % (len(lErrors) - iIgnoredErrors, iIgnoredErrors))
-        lWarnings = [e for e in self.dCheckstyleErrors.values() if e.sSeverity.lower() == "warning"]
+        lWarnings = [e for e in self.lCheckstyleErrors if e.sSeverity.lower() == "warning"]
         iIgnoredWarnings = len(list(filter(lambda e: e.bIgnored, lWarnings)))
         self.oWarningsLabel.config(text="Warnings: %d (and %d ignored)"
                                         % (len(lWarnings) - iIgnoredWarnings, iIgnoredWarnings))
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Benchmark of the processing stages on synthetic repositories.
+
+Run with: python -m checkstyleinterface.benchmark --files 100 1000 10000
+"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+from checkstyleinterface import main as checkinter, runner
+from checkstyleinterface.application import GROUP_BY_NONE, Application
+from checkstyleinterface.benchmark.synthetic import generateRepository, installStubJava
+from checkstyleinterface.errorindex import ErrorIndex
+
+
+class StageResult:
+    def __init__(self, sStage, iItems, fSeconds, iPeakBytes):
+        self.sStage = sStage
+        self.iItems = iItems
+        self.fSeconds = fSeconds
+        self.iPeakBytes = iPeakBytes
+
+    def getThroughput(self):
+        return self.iItems / self.fSeconds if self.fSeconds > 0 else float("inf")
+
+    def toDict(self):
+        return {"stage": self.sStage, "items": self.iItems, "seconds": round(self.fSeconds, 6),
+                "throughput": round(self.getThroughput(), 1), "peak_bytes": self.iPeakBytes}
+
+
+def measure(sStage, xCallable, xCountItems):
+    # Timed without tracing first, as tracemalloc slows down allocations a lot, then traced for the memory peak
+    with contextlib.redirect_stdout(io.StringIO()):
+        fStart = time.perf_counter()
+        oResult = xCallable()
+        fSeconds = time.perf_counter() - fStart
+        tracemalloc.start()
+        try:
+            xCallable()
+            _, iPeakBytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return oResult, StageResult(sStage, xCountItems(oResult), fSeconds, iPeakBytes)
+
+
+def runBenchmark(sRepoFolder, sJarFile, bWithUi):
+    sConfigFile = os.path.join(sRepoFolder, "checkstyle.xml")
+    sJavaFolder = os.path.join(sRepoFolder, "java")
+    lCommonArgs = ["-j", sJarFile, "-c", sConfigFile]
+    lResults = []
+
+    oArgs = checkinter.parseArgs(["-d", sJavaFolder, "-r"] + lCommonArgs)
+    dAllFiles, oResult = measure("getFilesList (-d -r)", lambda: checkinter.getFilesList(oArgs), len)
+    lResults.append(oResult)
+
+    oGitArgs = checkinter.parseArgs(["-g", sRepoFolder, "-l"] + lCommonArgs)
+    dChangedLines, oResult = measure("getChangedLines", lambda: checkinter.getChangedLines(oGitArgs), len)
+    lResults.append(oResult)
+    dGitFiles, oResult = measure("getFilesList (-g -l)", lambda: checkinter.getFilesList(oGitArgs), len)
+    lResults.append(oResult)
+
+    sXmlFile = os.path.join(sRepoFolder, "output.xml")
+    fStart = time.perf_counter()
+    subprocess.run(["java", "-jar", sJarFile, "-f", "xml", "-c", sConfigFile, "-o", sXmlFile, sJavaFolder],
+                   stdout=subprocess.DEVNULL)
+    lResults.append(StageResult("stub checkstyle (-d -r)", len(dAllFiles), time.perf_counter() - fStart, 0))
+
+    lErrors, oResult = measure("checkstyleErrorsFromXml",
+                               lambda: list(runner.checkstyleErrorsFromXml(ET.parse(sXmlFile).getroot())), len)
+    lResults.append(oResult)
+
+    # Errors of all files, filtered against the changed lines, as in the worst case of the -g -l mode
+    dFilterFiles = {oError.sFile: dGitFiles.get(oError.sFile, []) for oError in lErrors}
+    _, oResult = measure("line filter", lambda: list(runner.filterErrors(lErrors, dFilterFiles)),
+                         lambda _: len(lErrors))
+    lResults.append(oResult)
+
+    oErrorIndex, oResult = measure("ErrorIndex", lambda: ErrorIndex(lErrors), lambda _: len(lErrors))
+    lResults.append(oResult)
+    _, oResult = measure("ErrorIndex.query", lambda: oErrorIndex.query(sText="magic", sSeverity="error",
+                                                                       sPathPrefix="com/bench"),
+                         lambda _: len(lErrors))
+    lResults.append(oResult)
+
+    _, oResult = measure("runCheckstyle (-g -l)", lambda: checkinter.runCheckstyle(oGitArgs), lambda _: len(dGitFiles))
+    lResults.append(oResult)
+
+    if bWithUi:
+        lResults += measurePopulateView(lErrors)
+
+    return lResults
+
+
+def measurePopulateView(lErrors):
+    try:
+        oTkRoot = tk.Tk()
+    except tk.TclError:
+        print("No display available, Application.populateView is not measured")
+        return []
+    try:
+        oTkRoot.withdraw()
+        oApp = Application(oTkRoot, lambda: lErrors)
+        if not oApp.lCheckstyleErrors:
+            return []
+        lResults = []
+        # One row per error, then one row per message template
+        for sStage, sGrouping in [("Application.populateView", GROUP_BY_NONE), ("populateView (rollup)", "Message")]:
+            oApp.setGrouping(sGrouping)
+            _, oResult = measure(sStage, lambda: oApp.populateView(lErrors), lambda _: len(lErrors))
+            lResults.append(oResult)
+        return lResults
+    finally:
+        oTkRoot.destroy()
+
+
+def printResults(iFilesCount, lResults):
+    print("\n%d files" % iFilesCount)
+    print("%-28s %10s %10s %14s %10s" % ("Stage", "Items", "Seconds", "Items/s", "Peak MB"))
+    for oResult in lResults:
+        print("%-28s %10d %10.4f %14.1f %10.2f" % (oResult.sStage, oResult.iItems, oResult.fSeconds,
+                                                   oResult.getThroughput(), oResult.iPeakBytes / 1024 / 1024))
+
+
+def parseArgs(lArgv):
+    oParser = argparse.ArgumentParser(prog="python -m checkstyleinterface.benchmark",
+                                      description="Benchmark of checkinter on synthetic Java repositories, "
+                                                  "using a stub Checkstyle")
+    oParser.add_argument("--files", type=int, nargs="+", default=[100, 1000, 10000],
+                         help="Sizes of the generated repositories, in files (default: 100 1000 10000)")
+    oParser.add_argument("--lines", type=int, default=60, help="Lines per generated file (default: 60)")
+    oParser.add_argument("--density", type=float, default=0.02,
+                         help="Probability for a line to have a violation (default: 0.02)")
+    oParser.add_argument("--changed-ratio", type=float, default=0.1,
+                         help="Ratio of files modified in the working tree (default: 0.1)")
+    oParser.add_argument("--changed-lines", type=int, default=5,
+                         help="Lines modified in each modified file (default: 5)")
+    oParser.add_argument("--seed", type=int, default=0, help="Seed of the generation (default: 0)")
+    oParser.add_argument("--stub-startup", type=float, default=0,
+                         help="Emulated startup time of the stub Checkstyle, in seconds (default: 0)")
+    oParser.add_argument("--stub-rate", type=float, default=0,
+                         help="Emulated analysis rate of the stub Checkstyle, in files per second "
+                              "(default: 0, no delay)")
+    oParser.add_argument("--no-ui", help="Do not measure the user interface", action="store_true")
+    oParser.add_argument("--work-dir", help="Folder in which the repositories are generated (default: temporary)")
+    oParser.add_argument("--json", help="Also write the results to this JSON file")
+    return oParser.parse_args(lArgv)
+
+
+def main(lArgv=None):
+    oArgs = parseArgs(lArgv)
+    sWorkDir = oArgs.work_dir or tempfile.mkdtemp(prefix="checkinter-bench-")
+    os.makedirs(sWorkDir, exist_ok=True)
+    sBinFolder = installStubJava(os.path.join(sWorkDir, "bin"), os.path.join(sWorkDir, "bin", "checkstyle.jar"))
+    os.environ["PATH"] = sBinFolder + os.pathsep + os.environ["PATH"]
+    os.environ["CHECKSTYLE_STUB_STARTUP"] = str(oArgs.stub_startup)
+    os.environ["CHECKSTYLE_STUB_RATE"] = str(oArgs.stub_rate)
+
+    dAllResults = {}
+    try:
+        for iFilesCount in oArgs.files:
+            sRepoFolder = os.path.join(sWorkDir, "repo-%d" % iFilesCount)
+            shutil.rmtree(sRepoFolder, ignore_errors=True)
+            print("Generating %d files in %s..." % (iFilesCount, sRepoFolder))
+            generateRepository(sRepoFolder, iFilesCount, iLinesPerFile=oArgs.lines, fViolationDensity=oArgs.density,
+                               fChangedFilesRatio=oArgs.changed_ratio, iChangedLinesPerFile=oArgs.changed_lines,
+                               iSeed=oArgs.seed)
+            lResults = runBenchmark(sRepoFolder, os.path.join(sBinFolder, "checkstyle.jar"), not oArgs.no_ui)
+            printResults(iFilesCount, lResults)
+            dAllResults[str(iFilesCount)] = [o.toDict() for o in lResults]
+    finally:
+        if not oArgs.work_dir:
+            shutil.rmtree(sWorkDir, ignore_errors=True)
+
+    if oArgs.json:
+        with open(oArgs.json, "w") as oFile:
+            json.dump(dAllResults, oFile, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Stub Checkstyle, emulating the command line interface and the XML output of the real one.
+
+The violations are not computed but read from marker comments in the analyzed files, for example:
+    int i = 42; // violation(error, MagicNumber) '42' is a magic number.
+
+This file is executed as a standalone script, so it must not import anything from the package.
+"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
+
+MARKER_REGEX = re.compile(r"//\s*violation\((error|warning|info),\s*(\w+)\)\s*(.*)$")
+OPTIONS_WITH_VALUE = ["-c", "-o", "-f", "-p", "-e", "-x", "-b"]
+# Stub checks are reported as if they were in this package
+CHECKS_PACKAGE = "com.puppycrawl.tools.checkstyle.checks.stub"
+
+
+def main(lArgv):
+    # Emulation of the java launcher itself
+    if lArgv[:1] == ["-version"]:
+        sys.stderr.write('openjdk version "11.0.0-stub"\n')
+        return 0
+    lArgv = expandArgFiles(lArgv)
+    while lArgv[:1] and lArgv[0].startswith(("-X", "-D")):
+        lArgv = lArgv[1:]
+    if lArgv[:1] == ["-jar"]:
+        lArgv = lArgv[2:]
+
+    dOptions = {}
+    lPaths = []
+    iIdx = 0
+    while iIdx < len(lArgv):
+        if lArgv[iIdx] in OPTIONS_WITH_VALUE:
+            dOptions[lArgv[iIdx]] = lArgv[iIdx + 1]
+            iIdx += 2
+        else:
+            lPaths.append(lArgv[iIdx])
+            iIdx += 1
+
+    dModules = None
+    if "-c" in dOptions:
+        try:
+            dModules = readModules(dOptions["-c"])
+        except (OSError, ET.ParseError) as oExc:
+            sys.stderr.write("com.puppycrawl.tools.checkstyle.api.CheckstyleException: "
+                             "unable to parse configuration stream - %s\n" % oExc)
+            return -2
+
+    time.sleep(float(os.getenv("CHECKSTYLE_STUB_STARTUP", "0")))
+    fRate = float(os.getenv("CHECKSTYLE_STUB_RATE", "0"))
+    fFileCost = getFileCost(dModules)
+
+    oOutput = open(dOptions["-o"], "w", encoding="utf-8") if "-o" in dOptions else sys.stdout
+    iErrors = 0
+    try:
+        oOutput.write('<?xml version="1.0" encoding="UTF-8"?>\n<checkstyle version="8.32-stub">\n')
+        for sFile in iterFiles(lPaths):
+            if fRate > 0:
+                time.sleep(1 / fRate)
+            if fFileCost > 0:
+                time.sleep(fFileCost)
+            oOutput.write("<file name=%s>\n" % quoteattr(sFile))
+            for iLine, iCol, sSeverity, sSource, sMessage in iterViolations(sFile, dModules):
+                oOutput.write('<error line="%d" column="%d" severity="%s" message=%s source=%s/>\n'
+                              % (iLine, iCol, sSeverity, quoteattr(sMessage), quoteattr(sSource)))
+                if sSeverity == "error":
+                    iErrors += 1
+            oOutput.write("</file>\n")
+            oOutput.flush()
+        oOutput.write("</checkstyle>\n")
+    finally:
+        if oOutput is not sys.stdout:
+            oOutput.close()
+
+    if iErrors:
+        sys.stdout.write("Checkstyle ends with %d errors.\n" % iErrors)
+    return iErrors
+
+
+def expandArgFiles(lArgv):
+    lExpandedArgv = []
+    for sArg in lArgv:
+        if not sArg.startswith("@"):
+            lExpandedArgv.append(sArg)
+            continue
+        with open(sArg[1:], "r", encoding="utf-8") as oFile:
+            for oMatch in re.finditer(r'"((?:[^"\\]|\\.)*)"|(\S+)', oFile.read()):
+                if oMatch.group(1) is not None:
+                    lExpandedArgv.append(re.sub(r"\\(.)", r"\1", oMatch.group(1)))
+                else:
+                    lExpandedArgv.append(oMatch.group(2))
+    return lExpandedArgv
+
+
+def readModules(sConfigFile):
+    dModules = {}
+    for oNode in ET.parse(sConfigFile).getroot().iter("module"):
+        sName = oNode.get("name", "").split(".")[-1]
+        if sName.endswith("Check"):
+            sName = sName[:-len("Check")]
+        dProperties = {o.get("name"): o.get("value") for o in oNode.findall("property")}
+        dModules[sName] = dProperties.get("id")
+    return dModules
+
+
+def getFileCost(dModules):
+    """Analysis time of a file, in seconds, with the configured modules: the sum of their costs given in the
+    CHECKSTYLE_STUB_MODULE_COSTS environment variable, e.g. "MagicNumber=0.01,JavadocMethod=0.05"."""
+    sCosts = os.getenv("CHECKSTYLE_STUB_MODULE_COSTS", "")
+    dCosts = {}
+    for sCost in filter(None, sCosts.split(",")):
+        sName, sSeconds = sCost.split("=")
+        dCosts[sName.strip()] = float(sSeconds)
+    return sum(dCosts.get(sName, 0.0) for sName in (dModules if dModules is not None else dCosts))
+
+
+def iterFiles(lPaths):
+    for sPath in lPaths:
+        sPath = os.path.abspath(sPath)
+        if os.path.isdir(sPath):
+            for sDirPath, lDirNames, lFileNames in os.walk(sPath):
+                lDirNames.sort()
+                for sFileName in sorted(lFileNames):
+                    if sFileName.endswith(".java"):
+                        yield os.path.join(sDirPath, sFileName)
+        else:
+            yield sPath
+
+
+def iterViolations(sFile, dModules):
+    with open(sFile, "r", encoding="utf-8", errors="replace") as oFile:
+        for iLine, sLine in enumerate(oFile, start=1):
+            oMatch = MARKER_REGEX.search(sLine)
+            if oMatch is None:
+                continue
+            sSeverity, sCategory, sMessage = oMatch.groups()
+            if dModules is not None and sCategory not in dModules:
+                continue
+            sModuleId = dModules.get(sCategory) if dModules is not None else None
+            sSource = sModuleId or "%s.%sCheck" % (CHECKS_PACKAGE, sCategory)
+            yield iLine, len(sLine) - len(sLine.lstrip()) + 1, sSeverity, sSource, sMessage.strip()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Generation of synthetic Java repositories."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+import random
+import subprocess
+import sys
+
+from checkstyleinterface.benchmark import stubcheckstyle
+from checkstyleinterface.util import makeExecutable
+
+# (severity, category, message) of the planted violations
+VIOLATIONS = [
+    ("error", "MagicNumber", "'%d' is a magic number."),
+    ("error", "RedundantImport", "Redundant import from the same package - com.bench.Util%d."),
+    ("warning", "LineLength", "Line is longer than 120 characters (found %d)."),
+    ("warning", "ConstantName", "Name 'c%d' must match pattern '^[A-Z][A-Z0-9]*(_[A-Z0-9]+)*$'."),
+    ("info", "JavadocMethod", "Missing a Javadoc comment for method m%d.")
+]
+FILES_PER_PACKAGE = 50
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Benchmark", "GIT_AUTHOR_EMAIL": "benchmark@example.com",
+    "GIT_COMMITTER_NAME": "Benchmark", "GIT_COMMITTER_EMAIL": "benchmark@example.com",
+    "GIT_AUTHOR_DATE": "2020-01-01T00:00:00+0000", "GIT_COMMITTER_DATE": "2020-01-01T00:00:00+0000"
+}
+
+
+def generateRepository(sFolder, iFilesCount, iLinesPerFile=60, fViolationDensity=0.02, fChangedFilesRatio=0.1,
+                       iChangedLinesPerFile=5, iSeed=0, bGit=True):
+    """Generates a Java tree in sFolder/java, with a Checkstyle configuration in sFolder/checkstyle.xml.
+
+    A fraction of the body lines carry a violation marker understood by the stub Checkstyle. If bGit is set, the tree
+    is committed in a git repository, then iChangedLinesPerFile lines of a fraction of the files are modified in the
+    working tree. Returns the list of generated files.
+    """
+    oRandom = random.Random(iSeed)
+    sJavaFolder = os.path.join(sFolder, "java")
+    lFiles = []
+    for iFileIdx in range(iFilesCount):
+        sPackage = "p%04d" % (iFileIdx // FILES_PER_PACKAGE)
+        sClass = "Class%06d" % iFileIdx
+        sFile = os.path.join(sJavaFolder, "com", "bench", sPackage, sClass + ".java")
+        os.makedirs(os.path.dirname(sFile), exist_ok=True)
+        with open(sFile, "w", encoding="utf-8", newline="\n") as oFile:
+            oFile.write("package com.bench.%s;\n\npublic class %s {\n" % (sPackage, sClass))
+            for iLine in range(iLinesPerFile):
+                oFile.write(generateLine(oRandom, iLine, fViolationDensity))
+            oFile.write("}\n")
+        lFiles.append(sFile)
+    writeConfig(os.path.join(sFolder, "checkstyle.xml"))
+
+    if bGit:
+        runGit(sFolder, ["init", "-q"])
+        runGit(sFolder, ["add", "-A"])
+        runGit(sFolder, ["commit", "-q", "-m", "Synthetic tree"])
+        for sFile in oRandom.sample(lFiles, int(round(iFilesCount * fChangedFilesRatio))):
+            modifyFile(oRandom, sFile, iChangedLinesPerFile, fViolationDensity)
+
+    return lFiles
+
+
+def generateLine(oRandom, iLine, fViolationDensity):
+    sLine = "    private int m%d() { return %d; }" % (iLine, iLine)
+    if oRandom.random() < fViolationDensity:
+        sSeverity, sCategory, sMessage = oRandom.choice(VIOLATIONS)
+        sLine += " // violation(%s, %s) %s" % (sSeverity, sCategory, sMessage % iLine)
+    return sLine + "\n"
+
+
+def modifyFile(oRandom, sFile, iChangedLines, fViolationDensity):
+    with open(sFile, "r", encoding="utf-8") as oFile:
+        lLines = oFile.readlines()
+    # Body lines only, the package and class declarations are left untouched
+    lCandidates = list(range(3, len(lLines) - 1))
+    for iIdx in oRandom.sample(lCandidates, min(iChangedLines, len(lCandidates))):
+        lLines[iIdx] = generateLine(oRandom, 10000 + iIdx, fViolationDensity)
+    with open(sFile, "w", encoding="utf-8", newline="\n") as oFile:
+        oFile.writelines(lLines)
+
+
+def writeConfig(sConfigFile):
+    dModules = {}
+    for sSeverity, sCategory, _ in VIOLATIONS:
+        dModules.setdefault(sCategory, sSeverity)
+    with open(sConfigFile, "w", encoding="utf-8") as oFile:
+        oFile.write('<?xml version="1.0" encoding="UTF-8"?>\n<module name="Checker">\n    <module name="TreeWalker">\n')
+        for sCategory, sSeverity in dModules.items():
+            oFile.write('        <module name="%s">\n            <property name="severity" value="%s"/>\n'
+                        '        </module>\n' % (sCategory, sSeverity))
+        oFile.write("    </module>\n</module>\n")
+
+
+def runGit(sFolder, lArgs):
+    dEnv = os.environ.copy()
+    dEnv.update(GIT_ENV)
+    subprocess.run(["git"] + lArgs, check=True, cwd=sFolder, env=dEnv)
+
+
+def installStubJava(sBinFolder, sJarFile=None):
+    """Creates a 'java' executable in sBinFolder, which runs the stub Checkstyle whatever the JAR.
+
+    Prepend sBinFolder to the PATH environment variable to make checkinter use the stub. If sJarFile is provided, an
+    empty file is created there, to be passed with -j.
+    """
+    os.makedirs(sBinFolder, exist_ok=True)
+    sScript = os.path.abspath(stubcheckstyle.__file__)
+    if os.name == "nt":
+        with open(os.path.join(sBinFolder, "java.bat"), "w") as oFile:
+            oFile.write('@"%s" "%s" %%*\n' % (sys.executable, sScript))
+    else:
+        sJavaFile = os.path.join(sBinFolder, "java")
+        with open(sJavaFile, "w") as oFile:
+            oFile.write('#!/bin/sh\nexec "%s" "%s" "$@"\n' % (sys.executable, sScript))
+        makeExecutable(sJavaFile)
+    if sJarFile:
+        open(sJarFile, "a").close()
+    return sBinFolder
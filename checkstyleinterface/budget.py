@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+"""Time-budgeted checks: the files are checked by priority until the budget is spent, and the files left are checked
+by a background run, whose results are shown by the next runs."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+from checkstyleinterface.cache import errorFromEntry, errorToEntry, getFileDigest
+from checkstyleinterface.packstore import writeFile
+from checkstyleinterface.pipeline import CheckPipeline
+from checkstyleinterface.stats import RunStats
+from checkstyleinterface.util import getCacheDir, startDetached
+
+# Share of the remaining budget given to each batch, so that a batch longer than estimated leaves time for the others
+BATCH_BUDGET_SHARE = 0.5
+# Age after which the files deferred to a background run which never completed are dropped
+DEFERRED_JOB_EXPIRY = 24 * 3600
+
+
+class BudgetedCheck:
+    """Check of files within a time budget, in seconds, iterating over the errors as soon as they are reported.
+
+    The files are checked by batches in the order of prioritizeFiles, each batch being sized on the estimated analysis
+    times of its files to fit in a share of the remaining budget. The batch still running when the budget is spent is
+    stopped: its files and the files left are then in dDeferredFiles, the others in dCheckedFiles.
+    """
+
+    def __init__(self, oSession, dFiles, fBudget, oRunStats=None):
+        self.oSession = oSession
+        self.dFiles = dFiles
+        self.fBudget = fBudget
+        self.oRunStats = oRunStats if oRunStats is not None else RunStats(None)
+        self.dCheckedFiles = {}
+        self.dDeferredFiles = {}
+        self.oLock = threading.Lock()
+        self.oPipeline = None
+        self.bExpired = False
+
+    def __iter__(self):
+        fDeadline = time.perf_counter() + self.fBudget
+        lFiles = prioritizeFiles(self.dFiles)
+        oCostModel = self.oSession.getCostModel()
+        try:
+            while lFiles:
+                fRemaining = fDeadline - time.perf_counter()
+                if fRemaining <= 0:
+                    break
+                # The files of a batch are shared between the jobs
+                lBatch = planBatch(lFiles, fRemaining * BATCH_BUDGET_SHARE * max(1, self.oSession.iJobs), oCostModel)
+                dBatch = {sFile: self.dFiles[sFile] for sFile in lBatch}
+                oPipeline = CheckPipeline(self.oSession, [lambda: dBatch], None, self.oRunStats)
+                with self.oLock:
+                    self.oPipeline = oPipeline
+                oTimer = threading.Timer(fRemaining, self.expire, [oPipeline])
+                oTimer.daemon = True
+                oTimer.start()
+                try:
+                    yield from oPipeline
+                finally:
+                    oTimer.cancel()
+                    with self.oLock:
+                        self.oPipeline = None
+                if self.bExpired:
+                    break
+                self.dCheckedFiles.update(dBatch)
+                lFiles = lFiles[len(lBatch):]
+        finally:
+            self.dDeferredFiles = {sFile: self.dFiles[sFile] for sFile in lFiles}
+            # The batches overwrite the counts of files of the statistics
+            self.oRunStats.setFiles(self.dFiles)
+            self.oRunStats.iDeferredFileCount = len(self.dDeferredFiles)
+
+    def expire(self, oPipeline):
+        with self.oLock:
+            if self.oPipeline is not oPipeline:
+                return
+            self.bExpired = True
+        oPipeline.stop()
+
+
+def prioritizeFiles(dFiles):
+    """Sorts the files to check: the files with changed lines first, then the most recently modified ones."""
+    return sorted(dFiles, key=lambda sFile: (dFiles[sFile] is None, -getModificationTime(sFile)))
+
+
+def getModificationTime(sFile):
+    try:
+        return os.path.getmtime(sFile)
+    except OSError:
+        return 0.0
+
+
+def planBatch(lFiles, fBudget, oCostModel):
+    """Returns the first files of lFiles whose estimated analysis time fits in fBudget, at least one."""
+    fCost = 0.0
+    for iIndex, sFile in enumerate(lFiles):
+        fCost += oCostModel.getCost(sFile)
+        if fCost > fBudget:
+            return lFiles[:max(1, iIndex)]
+    return list(lFiles)
+
+
+def getDeferredFolder():
+    return os.path.join(getCacheDir(), "deferred")
+
+
+def deferFiles(dFiles, lArgv):
+    """Checks files in a detached background run of the command line lArgv (see main.runDeferred), and returns the
+    file in which their results are written."""
+    os.makedirs(getDeferredFolder(), exist_ok=True)
+    sJobFile = os.path.join(getDeferredFolder(), "%s.json" % uuid.uuid4().hex)
+    writeDeferredJob(sJobFile, {"created": time.time(), "files": dFiles})
+    startDetached([sys.executable, "-m", "checkstyleinterface.main"] + lArgv + ["--run-deferred", sJobFile],
+                  os.path.join(getCacheDir(), "deferred.log"))
+    return sJobFile
+
+
+def readDeferredJob(sJobFile):
+    with open(sJobFile, "r", encoding="utf-8") as oFile:
+        return json.load(oFile)
+
+
+def writeDeferredJob(sJobFile, dJob):
+    writeFile(sJobFile, json.dumps(dJob, separators=(",", ":")).encode("utf-8"))
+
+
+def writeDeferredResults(sJobFile, dDigests, lErrors):
+    """Completes a deferred job with the errors of its files, and the digests of the files they were found in."""
+    dJob = readDeferredJob(sJobFile)
+    dJob["completed"] = time.time()
+    dJob["digests"] = dDigests
+    dJob["errors"] = [[oError.sFile] + list(errorToEntry(oError)) for oError in lErrors]
+    writeDeferredJob(sJobFile, dJob)
+
+
+class DeferredResults:
+    """Results of the background runs of the files deferred by the previous checks, limited to the files under the
+    given paths (files or folders).
+
+    The results of a file modified since its background run are outdated, and left out.
+    """
+
+    def __init__(self, lPaths):
+        lRoots = [os.path.normcase(os.path.abspath(s)) for s in lPaths]
+        self.lJobFiles = []
+        self.lErrors = []
+        self.iPendingFiles = 0
+        dDigests = {}
+        for sJobFile, dJob in iterDeferredJobs():
+            if not all(isUnder(sFile, lRoots) for sFile in dJob.get("files", {})):
+                continue
+            if "completed" not in dJob:
+                self.iPendingFiles += len(dJob.get("files", {}))
+                continue
+            self.lJobFiles.append(sJobFile)
+            dDigests.update(dJob.get("digests", {}))
+            self.lErrors += [errorFromEntry(lEntry[0], tuple(lEntry[1:])) for lEntry in dJob.get("errors", [])]
+        self.dDigests = dDigests
+
+    def getErrors(self, lCurrentErrors=()):
+        """Returns the errors of the files unchanged since their background run, except those in lCurrentErrors."""
+        setCurrentErrors = {getErrorKey(oError) for oError in lCurrentErrors}
+        dUnchanged = {}
+        lErrors = []
+        for oError in self.lErrors:
+            if oError.sFile not in dUnchanged:
+                dUnchanged[oError.sFile] = isUnchanged(oError.sFile, self.dDigests.get(oError.sFile))
+            if dUnchanged[oError.sFile] and getErrorKey(oError) not in setCurrentErrors:
+                lErrors.append(oError)
+        return lErrors
+
+    def consume(self):
+        """Removes the results, so that they are only shown once."""
+        for sJobFile in self.lJobFiles:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(sJobFile)
+        self.lJobFiles = []
+
+
+def iterDeferredJobs():
+    sFolder = getDeferredFolder()
+    if not os.path.isdir(sFolder):
+        return
+    for sFileName in sorted(os.listdir(sFolder)):
+        if not sFileName.endswith(".json"):
+            continue
+        sJobFile = os.path.join(sFolder, sFileName)
+        try:
+            dJob = readDeferredJob(sJobFile)
+        except (OSError, ValueError):
+            # Removed by another run, or being written
+            continue
+        if "completed" not in dJob and time.time() - dJob.get("created", 0) > DEFERRED_JOB_EXPIRY:
+            # The background run did not complete, e.g. the machine was shut down
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(sJobFile)
+            continue
+        yield sJobFile, dJob
+
+
+def isUnder(sFile, lRoots):
+    sFile = os.path.normcase(os.path.abspath(sFile))
+    return any(sFile == sRoot or sFile.startswith(sRoot.rstrip(os.sep) + os.sep) for sRoot in lRoots)
+
+
+def isUnchanged(sFile, sDigest):
+    try:
+        return sDigest is not None and getFileDigest(sFile) == sDigest
+    except OSError:
+        return False
+
+
+def getErrorKey(oError):
+    return (os.path.normcase(os.path.abspath(oError.sFile)),) + tuple(errorToEntry(oError))
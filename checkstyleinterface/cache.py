@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Cache of the Checkstyle results, per file content and configuration."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import concurrent.futures
+import functools
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import urllib.error
+import urllib.request
+
+from checkstyleinterface.application import CheckstyleError
+from checkstyleinterface.packstore import DEFAULT_MAX_PACK_SIZE, PackStore
+
+# Maximum time, in seconds, spent on the shared cache by a lookup, and when leaving to write the pending entries
+DEFAULT_SHARED_TIMEOUT = 1.0
+# Number of concurrent requests to the shared cache
+SHARED_CONNECTIONS = 8
+# Maximum number of keys looked up by a single request to an HTTP shared cache
+MAX_LOOKUP_KEYS = 1000
+# Secret shared by the clients writing in an HTTP shared cache and its server
+CACHE_TOKEN_VARIABLE = "CHECKINTER_CACHE_TOKEN"
+
+
+class ResultCache:
+    """Errors of the analyzed files, in memory and optionally in a folder to be shared between the runs (see
+    PackStore), and in a shared cache to be shared between the machines.
+
+    The entries are keyed by the content of the file, its path in its repository and the configuration, see
+    getResultKey. Files referenced by the configuration itself, like suppressions or headers, are not part of the key.
+    The entries found in the shared cache are copied in the folder.
+    """
+
+    def __init__(self, sFolder=None, oSharedCache=None, iMaxSize=DEFAULT_MAX_PACK_SIZE):
+        self.sFolder = sFolder
+        self.oPackStore = PackStore(sFolder, iMaxSize) if sFolder else None
+        self.oSharedCache = oSharedCache
+        # Key => [(line, column, severity, category, message)]
+        self.dEntries = {}
+
+    def get(self, sKey):
+        return self.getMany([sKey]).get(sKey)
+
+    def getMany(self, lKeys):
+        """Returns the entries found for the given keys, as a dict key => entries, looking the shared cache up once
+        for all the keys missing locally."""
+        dFound = {sKey: self.dEntries[sKey] for sKey in lKeys if sKey in self.dEntries}
+        lMissingKeys = [sKey for sKey in lKeys if sKey not in dFound]
+        if lMissingKeys and self.oPackStore is not None:
+            dStored = self.oPackStore.getMany(lMissingKeys)
+            self.dEntries.update(dStored)
+            dFound.update(dStored)
+            lMissingKeys = [sKey for sKey in lMissingKeys if sKey not in dStored]
+        if lMissingKeys and self.oSharedCache is not None:
+            for sKey, lEntries in self.oSharedCache.getMany(lMissingKeys).items():
+                dFound[sKey] = self.dEntries[sKey] = lEntries
+                if self.oPackStore is not None:
+                    self.oPackStore.put(sKey, lEntries)
+        return dFound
+
+    def put(self, sKey, lEntries):
+        self.dEntries[sKey] = lEntries
+        if self.oPackStore is not None:
+            self.oPackStore.put(sKey, lEntries)
+        if self.oSharedCache is not None:
+            self.oSharedCache.put(sKey, lEntries)
+
+    def refresh(self):
+        """Makes the entries stored in the folder by the other processes since the first lookup visible."""
+        if self.oPackStore is not None:
+            self.oPackStore.refresh()
+
+    def clear(self):
+        self.dEntries.clear()
+
+    def close(self):
+        if self.oPackStore is not None:
+            self.oPackStore.close()
+        if self.oSharedCache is not None:
+            self.oSharedCache.flush()
+
+
+class FolderStore:
+    """Store of cache entries as JSON files in a folder, which can be mounted from a shared location."""
+    # Each entry is a file, read concurrently with the others
+    iBatchSize = 1
+
+    def __init__(self, sFolder):
+        self.sFolder = sFolder
+
+    def getMany(self, lKeys):
+        dFound = {}
+        for sKey in lKeys:
+            lEntries = self.get(sKey)
+            if lEntries is not None:
+                dFound[sKey] = lEntries
+        return dFound
+
+    def get(self, sKey):
+        try:
+            with open(self.getEntryFile(sKey), "r", encoding="utf-8") as oFile:
+                return [tuple(lEntry) for lEntry in json.load(oFile)]
+        except (OSError, ValueError):
+            return None
+
+    def put(self, sKey, lEntries):
+        sEntryFile = self.getEntryFile(sKey)
+        os.makedirs(os.path.dirname(sEntryFile), exist_ok=True)
+        # Written aside then moved, so that concurrent runs never read a partial entry
+        sTempFile = "%s.%d.%d.tmp" % (sEntryFile, os.getpid(), threading.get_ident())
+        with open(sTempFile, "w", encoding="utf-8") as oFile:
+            json.dump(lEntries, oFile, separators=(",", ":"))
+        os.replace(sTempFile, sEntryFile)
+
+    def getEntryFile(self, sKey):
+        return os.path.join(self.sFolder, sKey[:2], sKey + ".json")
+
+
+class HttpStore:
+    """Store of cache entries on an HTTP server, with a GET and a PUT of JSON per entry at <URL>/<key>, and a POST of
+    the keys to <URL>/lookup returning the entries found as a JSON object key => entries. The writes are authenticated
+    by sToken, if any, as a bearer token."""
+    iBatchSize = MAX_LOOKUP_KEYS
+
+    def __init__(self, sUrl, fTimeout=DEFAULT_SHARED_TIMEOUT, sToken=None):
+        self.sUrl = sUrl.rstrip("/")
+        self.fTimeout = fTimeout
+        self.sToken = sToken
+
+    def getMany(self, lKeys):
+        oRequest = urllib.request.Request(self.sUrl + "/lookup", method="POST",
+                                          data=json.dumps({"keys": lKeys}).encode("utf-8"),
+                                          headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(oRequest, timeout=self.fTimeout) as oResponse:
+            dFound = json.loads(oResponse.read().decode("utf-8"))
+        return {sKey: [tuple(lEntry) for lEntry in dFound[sKey]] for sKey in lKeys if sKey in dFound}
+
+    def get(self, sKey):
+        try:
+            with urllib.request.urlopen(self.getEntryUrl(sKey), timeout=self.fTimeout) as oResponse:
+                return [tuple(lEntry) for lEntry in json.loads(oResponse.read().decode("utf-8"))]
+        except urllib.error.HTTPError as oError:
+            if oError.code == 404:
+                return None
+            raise
+
+    def put(self, sKey, lEntries):
+        dHeaders = {"Content-Type": "application/json"}
+        if self.sToken:
+            dHeaders["Authorization"] = "Bearer " + self.sToken
+        oRequest = urllib.request.Request(self.getEntryUrl(sKey), method="PUT",
+                                          data=json.dumps(lEntries, separators=(",", ":")).encode("utf-8"),
+                                          headers=dHeaders)
+        with urllib.request.urlopen(oRequest, timeout=self.fTimeout):
+            pass
+
+    def getEntryUrl(self, sKey):
+        return "%s/%s" % (self.sUrl, sKey)
+
+
+class SharedCache:
+    """Shared tier of the result cache, which never delays a check by more than its timeout.
+
+    The lookups of a check are made concurrently, by batches of keys when the store supports it, and the entries not
+    received within the timeout are missed. The entries are written in the background. After an error, for example
+    when the store is not reachable, the store is not used anymore by this process, except after a refused write,
+    which only stops the writes.
+    """
+
+    def __init__(self, oStore, fTimeout=DEFAULT_SHARED_TIMEOUT):
+        self.oStore = oStore
+        self.fTimeout = fTimeout
+        self.bAvailable = True
+        self.bWritable = True
+        self.oExecutor = None
+        self.oWriteQueue = queue.Queue()
+        self.oWriteThread = None
+        self.oLock = threading.Lock()
+
+    def getMany(self, lKeys):
+        if not self.bAvailable:
+            return {}
+        with self.oLock:
+            if self.oExecutor is None:
+                self.oExecutor = concurrent.futures.ThreadPoolExecutor(SHARED_CONNECTIONS)
+        iBatchSize = self.oStore.iBatchSize
+        lFutures = [self.oExecutor.submit(self.oStore.getMany, lKeys[i:i + iBatchSize])
+                    for i in range(0, len(lKeys), iBatchSize)]
+        setDone, setNotDone = concurrent.futures.wait(lFutures, timeout=self.fTimeout)
+        for oFuture in setNotDone:
+            oFuture.cancel()
+        if setNotDone:
+            self.setUnavailable("%d lookups out of %d timed out" % (len(setNotDone), len(lFutures)))
+        dFound = {}
+        for oFuture in setDone:
+            try:
+                dFound.update(oFuture.result())
+            except Exception as oExc:
+                self.setUnavailable(oExc)
+        return dFound
+
+    def put(self, sKey, lEntries):
+        if not self.bAvailable or not self.bWritable:
+            return
+        with self.oLock:
+            if self.oWriteThread is None:
+                self.oWriteThread = threading.Thread(target=self.writeEntries, daemon=True)
+                self.oWriteThread.start()
+        self.oWriteQueue.put((sKey, lEntries))
+
+    def writeEntries(self):
+        while True:
+            sKey, lEntries = self.oWriteQueue.get()
+            try:
+                if self.bAvailable and self.bWritable:
+                    self.oStore.put(sKey, lEntries)
+            except urllib.error.HTTPError as oExc:
+                if oExc.code in (401, 403):
+                    self.setReadOnly(oExc)
+                else:
+                    self.setUnavailable(oExc)
+            except Exception as oExc:
+                self.setUnavailable(oExc)
+            finally:
+                self.oWriteQueue.task_done()
+
+    def flush(self):
+        """Waits for the pending writes, at most for the timeout: the remaining ones are abandoned when leaving."""
+        oDone = threading.Event()
+        threading.Thread(target=lambda: self.oWriteQueue.join() or oDone.set(), daemon=True).start()
+        return oDone.wait(self.fTimeout)
+
+    def setReadOnly(self, xReason):
+        if self.bWritable:
+            self.bWritable = False
+            print("WARN: The writes in the shared cache are refused, see %s: %s" % (CACHE_TOKEN_VARIABLE, xReason))
+
+    def setUnavailable(self, xReason):
+        if self.bAvailable:
+            self.bAvailable = False
+            print("WARN: The shared cache is not available, it will not be used anymore: %s" % xReason)
+
+
+def getSharedCache(sLocation, fTimeout=DEFAULT_SHARED_TIMEOUT):
+    """Returns the shared cache at an HTTP(S) URL, or in a folder."""
+    if re.match(r"https?://", sLocation, re.IGNORECASE):
+        return SharedCache(HttpStore(sLocation, fTimeout, os.getenv(CACHE_TOKEN_VARIABLE)), fTimeout)
+    return SharedCache(FolderStore(sLocation), fTimeout)
+
+
+def getFileDigest(sFile):
+    oHash = hashlib.sha256()
+    with open(sFile, "rb") as oFile:
+        for bChunk in iter(lambda: oFile.read(1 << 20), b""):
+            oHash.update(bChunk)
+    return oHash.hexdigest()
+
+
+def getConfigDigest(lBaseArgs):
+    """Digest of a Checkstyle invocation without its paths: arguments, JAR and configuration files.
+
+    The files are identified by their contents only, so that the digest is the same in any checkout, on any machine.
+    """
+    oHash = hashlib.sha256()
+    for sArg in lBaseArgs:
+        if os.path.isfile(sArg):
+            oStat = os.stat(sArg)
+            oHash.update(b"file:" + getStableFileDigest(os.path.abspath(sArg), oStat.st_size, oStat.st_mtime_ns)
+                         .encode("ascii") + b"\0")
+        else:
+            oHash.update(sArg.encode("utf-8") + b"\0")
+    return oHash.hexdigest()
+
+
+@functools.lru_cache(maxsize=64)
+def getStableFileDigest(sFile, iSize, iModificationTime):
+    # A long-running session only reads the JAR again when its size or date changes, instead of at each check
+    return getFileDigest(sFile)
+
+
+def getResultKey(sConfigDigest, sFile, sFileDigest):
+    # The path is part of the key, as some checks and suppressions depend on it, but relative to the repository so that
+    # the key is the same in another checkout
+    return hashlib.sha256(("%s\0%s\0%s" % (sConfigDigest, getKeyPath(sFile), sFileDigest))
+                          .encode("utf-8")).hexdigest()
+
+
+def getKeyPath(sFile):
+    """Path of a file relative to the root of its repository, or its absolute path outside of a repository."""
+    sFile = os.path.abspath(sFile)
+    sRootFolder = getRootFolder(os.path.dirname(sFile))
+    if sRootFolder is not None:
+        sFile = os.path.relpath(sFile, sRootFolder)
+    return os.path.normcase(sFile).replace(os.sep, "/")
+
+
+@functools.lru_cache(maxsize=4096)
+def getRootFolder(sFolder):
+    """Closest folder with a .git entry, a folder or a file for the worktrees and the submodules."""
+    if os.path.exists(os.path.join(sFolder, ".git")):
+        return sFolder
+    sParentFolder = os.path.dirname(sFolder)
+    return getRootFolder(sParentFolder) if sParentFolder != sFolder else None
+
+
+def errorToEntry(oError):
+    return oError.iLine, oError.iCol, oError.sSeverity, oError.sCategory, oError.sMessage
+
+
+def errorFromEntry(sFile, tEntry):
+    oError = CheckstyleError()
+    oError.sFile = sFile
+    oError.iLine, oError.iCol, oError.sSeverity, oError.sCategory, oError.sMessage = tEntry
+    return oError
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+"""Minimal HTTP server of a shared result cache, storing the entries in a folder."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import argparse
+import hmac
+import http.server
+import json
+import os
+import re
+
+from checkstyleinterface.cache import CACHE_TOKEN_VARIABLE, MAX_LOOKUP_KEYS, FolderStore
+from checkstyleinterface.util import isLoopbackHost
+
+DEFAULT_CACHE_HOST = "127.0.0.1"
+KEY_REGEX = re.compile(r"/([0-9a-f]{64})")
+LOOKUP_KEY_REGEX = re.compile(r"[0-9a-f]{64}")
+# Larger entries are refused, the entries being a few errors of a single file
+MAX_ENTRY_SIZE = 16 * 1024 * 1024
+MAX_LOOKUP_SIZE = MAX_LOOKUP_KEYS * 80
+
+
+class CacheRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the entries of oStore: anyone who can reach the server can read them, while the writes require sToken,
+    if any."""
+    oStore = None
+    sToken = None
+
+    def do_GET(self):
+        sKey = self.getKey()
+        if sKey is None:
+            return
+        lEntries = self.oStore.get(sKey)
+        if lEntries is None:
+            self.send_error(404)
+            return
+        self.sendJson(lEntries)
+
+    def do_POST(self):
+        # Lookup of several keys at once, answered with the entries found
+        if self.path != "/lookup":
+            self.send_error(404)
+            return
+        iLength = int(self.headers.get("Content-Length") or 0)
+        if iLength > MAX_LOOKUP_SIZE:
+            self.send_error(413)
+            return
+        try:
+            lKeys = json.loads(self.rfile.read(iLength).decode("utf-8"))["keys"]
+        except (ValueError, KeyError, TypeError):
+            self.send_error(400)
+            return
+        if not isinstance(lKeys, list) or not all(isinstance(s, str) and LOOKUP_KEY_REGEX.fullmatch(s) for s in lKeys):
+            self.send_error(400)
+            return
+        self.sendJson(self.oStore.getMany(lKeys))
+
+    def do_PUT(self):
+        sKey = self.getKey()
+        if sKey is None:
+            return
+        if not self.isAuthorized():
+            self.send_error(403)
+            return
+        iLength = int(self.headers.get("Content-Length") or 0)
+        if iLength > MAX_ENTRY_SIZE:
+            self.send_error(413)
+            return
+        try:
+            lEntries = json.loads(self.rfile.read(iLength).decode("utf-8"))
+        except ValueError:
+            self.send_error(400)
+            return
+        if not isinstance(lEntries, list):
+            self.send_error(400)
+            return
+        self.oStore.put(sKey, lEntries)
+        self.send_response(204)
+        self.end_headers()
+
+    def sendJson(self, xValue):
+        bBody = json.dumps(xValue, separators=(",", ":")).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(bBody)))
+        self.end_headers()
+        self.wfile.write(bBody)
+
+    def isAuthorized(self):
+        if self.sToken is None:
+            return True
+        return hmac.compare_digest(self.headers.get("Authorization", "").encode("utf-8"),
+                                   ("Bearer " + self.sToken).encode("utf-8"))
+
+    def getKey(self):
+        # The keys are checked, as they are used as file names
+        oMatch = KEY_REGEX.fullmatch(self.path)
+        if oMatch is None:
+            self.send_error(404)
+            return None
+        return oMatch.group(1)
+
+    def log_message(self, *args):
+        pass
+
+
+def createServer(sFolder, sHost=DEFAULT_CACHE_HOST, iPort=0, sToken=None):
+    oHandlerClass = type("FolderCacheRequestHandler", (CacheRequestHandler,),
+                         {"oStore": FolderStore(sFolder), "sToken": sToken})
+    return http.server.ThreadingHTTPServer((sHost, iPort), oHandlerClass)
+
+
+def runCacheServerCommand(lArgv):
+    oParser = argparse.ArgumentParser(prog="checkinter cache-server",
+                                      description="Serve a shared result cache over HTTP, see --shared-cache")
+    oParser.add_argument("folder", help="Folder in which the results are stored")
+    oParser.add_argument("--host", default=DEFAULT_CACHE_HOST,
+                         help="Address to listen on (default: %(default)s). Any other than a loopback one requires a "
+                              "token.")
+    oParser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    oParser.add_argument("--token", default=os.getenv(CACHE_TOKEN_VARIABLE),
+                         help="Secret that the clients must give to write results, with the environment variable %s. "
+                              "Alternatively, you can define this environment variable." % CACHE_TOKEN_VARIABLE)
+    oArgs = oParser.parse_args(lArgv)
+    if not oArgs.token and not isLoopbackHost(oArgs.host):
+        oParser.error("Listening on %s requires a token, given with --token or the environment variable %s."
+                      % (oArgs.host or "all the addresses", CACHE_TOKEN_VARIABLE))
+
+    with createServer(oArgs.folder, oArgs.host, oArgs.port, oArgs.token or None) as oServer:
+        print("Serving the result cache of %s on port %d" % (oArgs.folder, oServer.server_address[1]))
+        try:
+            oServer.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Checkstyle configurations: discovery of the configuration of each file, for projects with several configurations,
+and configurations derived without some checks."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import hashlib
+import os
+import re
+import xml.etree.ElementTree as ET
+
+from checkstyleinterface.cache import getFileDigest
+
+# (configuration file, its digest, skipped categories) => derived configuration file
+DERIVED_CONFIGS = {}
+
+
+class ConfigFinder:
+    def __init__(self, sConfigName):
+        self.sConfigName = sConfigName
+        # Folder => nearest configuration file in this folder or its parents, or None
+        self.dNearestConfigs = {}
+
+    def findNearestConfig(self, sFolder):
+        lVisitedFolders = []
+        sConfigFile = None
+        while True:
+            if sFolder in self.dNearestConfigs:
+                sConfigFile = self.dNearestConfigs[sFolder]
+                break
+            lVisitedFolders.append(sFolder)
+            sCandidate = os.path.join(sFolder, self.sConfigName)
+            if os.path.isfile(sCandidate):
+                sConfigFile = sCandidate
+                break
+            sParentFolder = os.path.dirname(sFolder)
+            if sParentFolder == sFolder:
+                break
+            sFolder = sParentFolder
+        for sVisitedFolder in lVisitedFolders:
+            self.dNearestConfigs[sVisitedFolder] = sConfigFile
+        return sConfigFile
+
+
+def getPropertiesFile(sConfigFile):
+    # The properties of a discovered configuration are in a file of the same name next to it, if any
+    sPropFile = os.path.splitext(sConfigFile)[0] + ".properties"
+    return sPropFile if os.path.isfile(sPropFile) else None
+
+
+def groupFilesByConfig(dFiles, sConfigName, sDefaultConfigFile=None, sDefaultPropFile=None):
+    """Returns the files grouped by their (configuration file, properties file), in the order of their first file.
+
+    Without a configuration name to look for, all the files use the default configuration.
+    """
+    if not sConfigName:
+        return [((sDefaultConfigFile, sDefaultPropFile), dFiles)] if dFiles else []
+
+    oFinder = ConfigFinder(sConfigName)
+    dGroups = {}
+    for sFile, lLines in dFiles.items():
+        sConfigFile = oFinder.findNearestConfig(os.path.dirname(os.path.abspath(sFile)))
+        if sConfigFile is None:
+            tConfig = (sDefaultConfigFile, sDefaultPropFile)
+        else:
+            tConfig = (sConfigFile, getPropertiesFile(sConfigFile) or sDefaultPropFile)
+        dGroups.setdefault(tConfig, {})[sFile] = lLines
+    return list(dGroups.items())
+
+
+def getDerivedConfig(sConfigFile, lCategories, sFolder, bKeepOnly=False):
+    """Returns a configuration without the checks reporting the given categories, so that Checkstyle does not run them.
+    With bKeepOnly, the configuration keeps instead only these checks, and the filters.
+
+    The derived configurations are written in sFolder, named after the digest of the configuration and the categories,
+    so that each one is only derived once. Returns sConfigFile itself if no check is removed, or if it cannot be read.
+    """
+    try:
+        sConfigDigest = getFileDigest(sConfigFile)
+    except OSError:
+        return sConfigFile
+    tKey = (os.path.abspath(sConfigFile), sConfigDigest, tuple(sorted(set(lCategories))), bKeepOnly)
+    if tKey not in DERIVED_CONFIGS:
+        sName = "\0".join((sConfigDigest,) + tKey[2]) + ("\0keep-only" if bKeepOnly else "")
+        DERIVED_CONFIGS[tKey] = deriveConfig(sConfigFile, tKey[2], os.path.join(sFolder, "%s.xml" % hashlib.sha256(
+            sName.encode("utf-8")).hexdigest()), bKeepOnly)
+    return DERIVED_CONFIGS[tKey]
+
+
+def deriveConfig(sConfigFile, lCategories, sDerivedConfigFile, bKeepOnly=False):
+    if os.path.isfile(sDerivedConfigFile):
+        return sDerivedConfigFile
+    try:
+        oRoot, oDocType = readConfig(sConfigFile)
+    except (OSError, ValueError, ET.ParseError):
+        print("WARN: Unable to read the config file %s, it is used with all its checks" % sConfigFile)
+        return sConfigFile
+
+    setNames = set(getCheckName(s) for s in lCategories)
+    bRemoved = False
+    for oParent in list(oRoot.iter("module")):
+        for oModule in oParent.findall("module"):
+            # Only the checks themselves are removed, not the modules containing other ones like TreeWalker
+            if oModule.find("module") is not None:
+                continue
+            # A module with an id reports its errors under its id only, whatever its class
+            sModuleId = getModuleId(oModule)
+            bMatching = sModuleId in lCategories if sModuleId else getCheckName(oModule.get("name", "")) in setNames
+            if (not bKeepOnly and bMatching) or (bKeepOnly and not bMatching and not isFilterModule(oModule)):
+                oParent.remove(oModule)
+                bRemoved = True
+    if not bRemoved:
+        return sConfigFile
+
+    os.makedirs(os.path.dirname(sDerivedConfigFile), exist_ok=True)
+    sTempFile = "%s.%d.tmp" % (sDerivedConfigFile, os.getpid())
+    with open(sTempFile, "w", encoding="utf-8") as oFile:
+        oFile.write(getConfigContent(oRoot, oDocType))
+    os.replace(sTempFile, sDerivedConfigFile)
+    return sDerivedConfigFile
+
+
+def getConfigContent(oRoot, oDocType):
+    sContent = '<?xml version="1.0" encoding="UTF-8"?>\n'
+    if oDocType is not None:
+        sContent += oDocType.group(0) + "\n"
+    return sContent + ET.tostring(oRoot, encoding="unicode")
+
+
+def readConfig(sConfigFile):
+    """Returns the root module of a configuration, and the match of its document type, if any."""
+    with open(sConfigFile, "r", encoding="utf-8") as oFile:
+        sContent = oFile.read()
+    # The document type is kept in the derived configurations, as Checkstyle uses it to validate them
+    return ET.fromstring(sContent), re.search(r"<!DOCTYPE[^\[>]*(?:\[.*?\])?\s*>", sContent, re.DOTALL)
+
+
+def readProperties(sPropFile):
+    """Returns the properties of a Java properties file, without its escapes and line continuations."""
+    dProperties = {}
+    with open(sPropFile, "r", encoding="latin-1") as oFile:
+        for sLine in oFile:
+            sLine = sLine.strip()
+            if not sLine or sLine.startswith(("#", "!")):
+                continue
+            oMatch = re.match(r"([^=:\s]+)\s*[=:\s]\s*(.*)", sLine)
+            if oMatch is not None:
+                dProperties[oMatch.group(1)] = oMatch.group(2)
+    return dProperties
+
+
+def expandProperties(sValue, dProperties):
+    # As Checkstyle does, with the unknown properties left as they are
+    return re.sub(r"\$\{([^}]*)\}", lambda o: dProperties.get(o.group(1), o.group(0)), sValue)
+
+
+def getCheckModules(sConfigFile):
+    """Returns the categories of the checks of a configuration, in their order: their ids if any, otherwise the names
+    of their classes. The filters are not included."""
+    oRoot, _ = readConfig(sConfigFile)
+    lCategories = []
+    for oModule in oRoot.iter("module"):
+        if oModule.find("module") is None and oModule is not oRoot and not isFilterModule(oModule):
+            sCategory = getModuleId(oModule) or getCheckName(oModule.get("name", ""))
+            if sCategory not in lCategories:
+                lCategories.append(sCategory)
+    return lCategories
+
+
+def isFilterModule(oModule):
+    # The filters, and the holders they rely on, do not report errors by themselves
+    return getCheckName(oModule.get("name", "")).endswith(("Filter", "Holder"))
+
+
+def getCheckName(sName):
+    # The categories are the names of the check classes, the configurations may give them qualified or without suffix
+    sName = sName.split(".")[-1]
+    return sName[:-len("Check")] if sName.endswith("Check") else sName
+
+
+def getModuleId(oModule):
+    # With an id, Checkstyle reports the id as the source of the errors
+    for oProperty in oModule.findall("property"):
+        if oProperty.get("name") == "id":
+            return oProperty.get("value")
+    return oModule.get("id")
@@ -0,0 +1,529 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+"""Distributed checks: the files are sent by shards, with their contents, to worker hosts which check them."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import argparse
+import base64
+import collections
+import contextlib
+import hmac
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+from checkstyleinterface.cache import errorFromEntry, errorToEntry, getRootFolder
+from checkstyleinterface.configs import expandProperties, getConfigContent, groupFilesByConfig, readConfig, \
+    readProperties
+from checkstyleinterface.handoff import TemporaryFolder
+from checkstyleinterface.pipeline import warmUpFile
+from checkstyleinterface.runner import filterErrors
+from checkstyleinterface.scheduler import scheduleShards
+from checkstyleinterface.session import CheckstyleSession
+from checkstyleinterface.stats import RunStats
+from checkstyleinterface.util import isLoopbackHost
+
+PROTOCOL_VERSION = 3
+DEFAULT_WORKER_HOST = "127.0.0.1"
+DEFAULT_WORKER_PORT = 8765
+# Secret shared by the coordinators and the workers listening on the network
+WORKER_TOKEN_VARIABLE = "CHECKINTER_WORKER_TOKEN"
+# Messages: size (unsigned 32 bits, big endian), then a JSON object
+MESSAGE_HEADER = struct.Struct("!I")
+MAX_MESSAGE_SIZE = 1024 * 1024 * 1024
+# The first message, read before the coordinator is authenticated
+MAX_HELLO_SIZE = 64 * 1024
+# More shards than workers, so that the fastest workers take more of them, and that a failed shard is cheap to retry
+SHARDS_PER_WORKER = 4
+MAX_SHARD_ATTEMPTS = 3
+CONNECT_TIMEOUT = 5.0
+# Property giving to the configuration on a worker the folder of the files it refers to
+RESOURCES_PROPERTY = "checkinter.resources"
+# Maximum time without any message from a worker checking a shard
+DEFAULT_WORKER_TIMEOUT = 3600.0
+
+
+def writeMessage(oFile, dMessage):
+    bData = json.dumps(dMessage, separators=(",", ":")).encode("utf-8")
+    oFile.write(MESSAGE_HEADER.pack(len(bData)) + bData)
+    oFile.flush()
+
+
+def readMessage(oFile, iMaxSize=MAX_MESSAGE_SIZE):
+    """Returns the next message of the stream, or None at its end."""
+    bHeader = oFile.read(MESSAGE_HEADER.size)
+    if not bHeader:
+        return None
+    if len(bHeader) < MESSAGE_HEADER.size:
+        raise ConnectionError("Connection closed in the middle of a message")
+    iSize, = MESSAGE_HEADER.unpack(bHeader)
+    if iSize > iMaxSize:
+        raise ValueError("Message too large: %d bytes" % iSize)
+    bData = oFile.read(iSize)
+    if len(bData) < iSize:
+        raise ConnectionError("Connection closed in the middle of a message")
+    return json.loads(bData.decode("utf-8"))
+
+
+def encodeFile(sFile):
+    with open(sFile, "rb") as oFile:
+        return base64.b64encode(oFile.read()).decode("ascii")
+
+
+def parseWorkerAddress(sWorker):
+    sHost, sSeparator, sPort = sWorker.rpartition(":")
+    if not sSeparator or not sPort.isdigit() or sHost.endswith(":"):
+        # No port, or an IPv6 address without brackets
+        return sWorker.strip("[]"), DEFAULT_WORKER_PORT
+    return sHost.strip("[]"), int(sPort)
+
+
+class Shard:
+    def __init__(self, dConfigRequest, lFiles, sDefaultRootFolder):
+        self.dConfigRequest = dConfigRequest
+        self.lFiles = lFiles
+        self.sDefaultRootFolder = sDefaultRootFolder
+        self.setTriedWorkers = set()
+        self.lFailures = []
+        self.iAttempts = 0
+
+    def getRequest(self):
+        """Returns the request checking the shard, and the files of the shard by their paths in the request."""
+        # The files are sent with their paths relative to their repository, or to the common folder of all the files
+        # of the check, so that the checks depending on the paths report the same errors as locally
+        lFiles = []
+        dPaths = {}
+        for sFile in self.lFiles:
+            try:
+                sContent = encodeFile(sFile)
+            except OSError:
+                print("WARN: The file %s is not readable, ignored" % sFile)
+                continue
+            sAbsFile = os.path.abspath(sFile)
+            sRootFolder = getRootFolder(os.path.dirname(sAbsFile)) or self.sDefaultRootFolder
+            sPath = os.path.relpath(sAbsFile, sRootFolder).replace(os.sep, "/")
+            lFiles.append([sPath, sContent])
+            dPaths[sPath] = sFile
+        return dict(self.dConfigRequest, files=lFiles), dPaths
+
+
+def getConfigRequest(sConfigFile, sPropFile):
+    """Returns the configuration part of the shard requests: the configuration, its properties, and the files its
+    modules refer to, like suppressions or headers. These files are referred to by the configuration sent through the
+    RESOURCES_PROPERTY property, set by the worker to the folder in which it writes them."""
+    dRequest = {"config": None, "properties": None, "resources": []}
+    if sPropFile and os.path.isfile(sPropFile):
+        dRequest["properties"] = encodeFile(sPropFile)
+    if not sConfigFile or not os.path.isfile(sConfigFile):
+        # Ignored, as by a local check
+        return dRequest
+    try:
+        oRoot, oDocType = readConfig(sConfigFile)
+    except (ValueError, ET.ParseError):
+        # Sent as is, for the worker to report the error
+        dRequest["config"] = encodeFile(sConfigFile)
+        return dRequest
+
+    dProperties = readProperties(sPropFile) if dRequest["properties"] else {}
+    # File => its path in the resources
+    dResources = {}
+    for oProperty in oRoot.iter("property"):
+        sFile = expandProperties(oProperty.get("value", ""), dProperties)
+        if not sFile or not os.path.isfile(sFile):
+            continue
+        sFile = os.path.abspath(sFile)
+        if sFile not in dResources:
+            dResources[sFile] = "%d/%s" % (len(dResources), os.path.basename(sFile))
+            dRequest["resources"].append([dResources[sFile], encodeFile(sFile)])
+        oProperty.set("value", "${%s}/%s" % (RESOURCES_PROPERTY, dResources[sFile]))
+    if dResources:
+        dRequest["config"] = base64.b64encode(getConfigContent(oRoot, oDocType).encode("utf-8")).decode("ascii")
+    else:
+        dRequest["config"] = encodeFile(sConfigFile)
+    return dRequest
+
+
+class DistributedCheck:
+    """Check of files on worker hosts (see runWorkerCommand), given as "host:port", iterating over the errors as soon
+    as they are received.
+
+    The files are given as a dict file => lines to report, or None for all the lines. They are split in shards of
+    balanced estimated costs, several per worker, each one being sent with the contents of its files, of its
+    configuration and of the files it refers to, to the next available worker. A shard failed by a worker is sent again
+    to another one, and a worker which cannot be reached is not used anymore. The errors of a shard already reported by
+    a failed attempt are not reported again by the next ones, unless these report them more times. The workers listening
+    on the network require sToken, shared with them.
+    """
+
+    def __init__(self, lWorkers, dFiles, sConfigName=None, sConfigFile=None, sPropFile=None, oRunStats=None,
+                 oCostModel=None, fTimeout=DEFAULT_WORKER_TIMEOUT, sToken=None):
+        self.lWorkers = list(dict.fromkeys(lWorkers))
+        self.dFiles = dFiles
+        self.sToken = sToken
+        self.oRunStats = oRunStats if oRunStats is not None else RunStats(None)
+        self.oCostModel = oCostModel
+        self.fTimeout = fTimeout
+        self.lShards = []
+        sDefaultRootFolder = os.path.commonpath([os.path.dirname(os.path.abspath(s)) for s in dFiles]) \
+            if dFiles else None
+        for (sGroupConfigFile, sGroupPropFile), dGroupFiles in groupFilesByConfig(dFiles, sConfigName, sConfigFile,
+                                                                                  sPropFile):
+            dConfigRequest = getConfigRequest(sGroupConfigFile, sGroupPropFile)
+            for lShardFiles in scheduleShards(list(dGroupFiles), len(self.lWorkers) * SHARDS_PER_WORKER, oCostModel):
+                self.lShards.append(Shard(dConfigRequest, lShardFiles, sDefaultRootFolder))
+        self.oQueue = queue.Queue()
+        self.oCondition = threading.Condition()
+        self.lPendingShards = list(self.lShards)
+        self.iRunningShards = 0
+        self.iCompletedShards = 0
+        self.iActiveWorkers = 0
+        self.setAliveWorkers = set(self.lWorkers)
+        self.setSockets = set()
+        self.bFinished = False
+        self.lDurations = []
+
+    def __iter__(self):
+        self.oRunStats.setFiles(self.dFiles)
+        fStart = time.perf_counter()
+        lThreads = [threading.Thread(target=self.runWorker, args=(s,), daemon=True) for s in self.lWorkers]
+        with self.oCondition:
+            self.iActiveWorkers = len(lThreads)
+            self.checkProgress()
+        for oThread in lThreads:
+            oThread.start()
+        try:
+            # Shard => the number of times each error was reported, and was received from each attempt: an error
+            # is only reported again by a retried attempt when it receives it more times than the previous ones
+            dErrorCounts = {}
+            while True:
+                sKind, oShard, xItem = self.oQueue.get()
+                if sKind == "error":
+                    iAttempt, oError = xItem
+                    oReportedCounts, dAttemptCounts = dErrorCounts.setdefault(id(oShard), (collections.Counter(), {}))
+                    oAttemptCounts = dAttemptCounts.setdefault(iAttempt, collections.Counter())
+                    tKey = (oError.sFile,) + tuple(errorToEntry(oError))
+                    oAttemptCounts[tKey] += 1
+                    if oAttemptCounts[tKey] > oReportedCounts[tKey]:
+                        oReportedCounts[tKey] += 1
+                        yield from filterErrors([oError], self.dFiles)
+                elif sKind == "completed":
+                    dErrorCounts.pop(id(oShard), None)
+                elif sKind == "exception":
+                    raise xItem
+                else:
+                    break
+        finally:
+            self.stop()
+            for oThread in lThreads:
+                oThread.join()
+            self.oRunStats.addPhase("checkstyle", time.perf_counter() - fStart)
+            self.recordCosts()
+            self.oRunStats.setDone()
+
+    def stop(self):
+        with self.oCondition:
+            self.bFinished = True
+            self.oCondition.notify_all()
+            # Interrupts the shards being checked
+            for oSocket in self.setSockets:
+                with contextlib.suppress(OSError):
+                    oSocket.shutdown(socket.SHUT_RDWR)
+
+    def runWorker(self, sWorker):
+        try:
+            while True:
+                oShard = self.takeShard(sWorker)
+                if oShard is None:
+                    return
+                try:
+                    fDuration = self.checkShard(sWorker, oShard)
+                except OSError as oExc:
+                    # Unreachable, disconnected or timed out: the worker is not used anymore
+                    self.failShard(sWorker, oShard, oExc, True)
+                    return
+                except (ValueError, RuntimeError) as oExc:
+                    self.failShard(sWorker, oShard, oExc, False)
+                else:
+                    self.completeShard(oShard, fDuration)
+        finally:
+            with self.oCondition:
+                self.iActiveWorkers -= 1
+                self.checkProgress()
+
+    def takeShard(self, sWorker):
+        with self.oCondition:
+            while not self.bFinished:
+                oShard = next((o for o in self.lPendingShards if sWorker not in o.setTriedWorkers), None)
+                if oShard is not None:
+                    self.lPendingShards.remove(oShard)
+                    oShard.setTriedWorkers.add(sWorker)
+                    oShard.iAttempts += 1
+                    self.iRunningShards += 1
+                    return oShard
+                if not self.iRunningShards:
+                    # The shards left were all tried by this worker, and no other shard can fail anymore
+                    return None
+                self.oCondition.wait()
+            return None
+
+    def checkShard(self, sWorker, oShard):
+        dRequest, dPaths = oShard.getRequest()
+        iAttempt = oShard.iAttempts
+        fStart = time.perf_counter()
+        with socket.create_connection(parseWorkerAddress(sWorker), timeout=CONNECT_TIMEOUT) as oSocket:
+            with self.oCondition:
+                if self.bFinished:
+                    raise ConnectionAbortedError("Check stopped")
+                self.setSockets.add(oSocket)
+            try:
+                oSocket.settimeout(self.fTimeout)
+                with oSocket.makefile("rwb") as oFile:
+                    # The shard is only sent once the worker accepted the coordinator
+                    writeMessage(oFile, {"version": PROTOCOL_VERSION, "token": self.sToken})
+                    dMessage = readMessage(oFile)
+                    if dMessage is None:
+                        raise ConnectionError("Connection closed by the worker")
+                    if dMessage.get("type") == "failed":
+                        raise RuntimeError(dMessage.get("reason") or "Unknown failure")
+                    if dMessage.get("type") != "ready":
+                        raise ValueError("Unexpected message from the worker: %s" % dMessage.get("type"))
+                    writeMessage(oFile, dRequest)
+                    while True:
+                        dMessage = readMessage(oFile)
+                        if dMessage is None:
+                            raise ConnectionError("Connection closed by the worker")
+                        sType = dMessage.get("type")
+                        if sType == "error":
+                            sFile = dPaths.get(dMessage.get("file"))
+                            if sFile is not None:
+                                oError = errorFromEntry(sFile, tuple(dMessage["entry"]))
+                                self.oQueue.put(("error", oShard, (iAttempt, oError)))
+                        elif sType == "done":
+                            return time.perf_counter() - fStart
+                        elif sType == "failed":
+                            raise RuntimeError(dMessage.get("reason") or "Unknown failure")
+                        else:
+                            raise ValueError("Unexpected message from the worker: %s" % sType)
+            finally:
+                with self.oCondition:
+                    self.setSockets.discard(oSocket)
+
+    def completeShard(self, oShard, fDuration):
+        with self.oCondition:
+            self.iRunningShards -= 1
+            self.iCompletedShards += 1
+            self.lDurations.append((oShard.lFiles, fDuration))
+            self.oQueue.put(("completed", oShard, None))
+            self.checkProgress()
+            self.oCondition.notify_all()
+
+    def failShard(self, sWorker, oShard, oExc, bWorkerDown):
+        with self.oCondition:
+            self.iRunningShards -= 1
+            if self.bFinished:
+                return
+            print("WARN: The worker %s failed to check %d files%s: %s"
+                  % (sWorker, len(oShard.lFiles), ", and is not used anymore" if bWorkerDown else "", oExc))
+            oShard.lFailures.append("%s: %s" % (sWorker, oExc))
+            if bWorkerDown:
+                self.setAliveWorkers.discard(sWorker)
+            self.lPendingShards.append(oShard)
+            self.checkProgress()
+            self.oCondition.notify_all()
+
+    def checkProgress(self):
+        # Called with the condition held, after each change of the state of the shards or of the workers
+        if self.bFinished:
+            return
+        if self.iCompletedShards == len(self.lShards):
+            self.bFinished = True
+            self.oQueue.put(("done", None, None))
+            return
+        for oShard in self.lPendingShards:
+            if len(oShard.lFailures) >= MAX_SHARD_ATTEMPTS or not self.setAliveWorkers - oShard.setTriedWorkers \
+                    or not self.iActiveWorkers:
+                self.bFinished = True
+                self.oQueue.put(("exception", None, RuntimeError(
+                    "%d files could not be checked by the workers%s" % (len(oShard.lFiles), "".join(
+                        "\n  %s" % s for s in oShard.lFailures) or ": no worker available"))))
+                return
+
+    def recordCosts(self):
+        for lFiles, fDuration in self.lDurations:
+            self.oRunStats.addFileCosts(lFiles, fDuration)
+            if self.oCostModel is not None:
+                self.oCostModel.recordShard(lFiles, fDuration)
+        if self.oCostModel is not None and self.lDurations:
+            self.oCostModel.save()
+
+
+class WorkerRequestHandler(socketserver.StreamRequestHandler):
+    """Checks a shard sent by a DistributedCheck, and sends back its errors as soon as they are reported."""
+    sCheckstyleJar = None
+    iJobs = 1
+    sToken = None
+
+    def handle(self):
+        try:
+            dHello = readMessage(self.rfile, MAX_HELLO_SIZE)
+            if dHello is None:
+                return
+            sReason = self.checkHello(dHello)
+            if sReason is not None:
+                print("WARN: Rejected a coordinator from %s: %s" % (self.client_address[0], sReason))
+                writeMessage(self.wfile, {"type": "failed", "reason": sReason})
+                return
+            writeMessage(self.wfile, {"type": "ready"})
+            dRequest = readMessage(self.rfile)
+        except (OSError, ValueError):
+            return
+        if dRequest is None:
+            return
+        try:
+            with TemporaryFolder() as oTempFolder:
+                for sPath, oError in iterShardErrors(self.sCheckstyleJar, dRequest, oTempFolder.getPath(), self.iJobs):
+                    writeMessage(self.wfile, {"type": "error", "file": sPath, "entry": list(errorToEntry(oError))})
+            writeMessage(self.wfile, {"type": "done"})
+        except ConnectionError:
+            # The coordinator stopped the check
+            pass
+        except Exception as oExc:
+            print("WARN: Failed to check a shard of %d files: %s" % (len(dRequest.get("files") or []), oExc))
+            with contextlib.suppress(OSError):
+                writeMessage(self.wfile, {"type": "failed", "reason": "%s: %s" % (type(oExc).__name__, oExc)})
+
+    def checkHello(self, dHello):
+        """Returns why the coordinator is rejected, or None."""
+        if dHello.get("version") != PROTOCOL_VERSION:
+            return "Unsupported protocol version: %s" % dHello.get("version")
+        if self.sToken is not None and not hmac.compare_digest(str(dHello.get("token")).encode("utf-8"),
+                                                               self.sToken.encode("utf-8")):
+            return "Invalid token, see %s" % WORKER_TOKEN_VARIABLE
+        return None
+
+
+def iterShardErrors(sCheckstyleJar, dRequest, sFolder, iJobs=1):
+    """Writes the files of a shard request in sFolder and checks them, yielding their errors with their paths in the
+    request."""
+    sConfigFile, sPropFile = writeShardConfig(sFolder, dRequest)
+    sSourceFolder = os.path.join(sFolder, "src")
+    dPaths = {}
+    for sPath, sContent in dRequest.get("files") or []:
+        dPaths[writeShardFile(sSourceFolder, sPath, sContent)] = sPath
+
+    oSession = CheckstyleSession(sCheckstyleJar, sConfigFile, sPropFile, iJobs=iJobs)
+    oErrors = oSession.iterCheckFiles(dict.fromkeys(dPaths))
+    try:
+        for oError in oErrors:
+            yield dPaths[oError.sFile], oError
+    finally:
+        oErrors.close()
+        oSession.close()
+
+
+def writeShardConfig(sFolder, dRequest):
+    """Writes the configuration of a shard request in sFolder, with the files it refers to, and returns the
+    configuration and properties files."""
+    sConfigFile = writeShardFile(sFolder, "config.xml", dRequest.get("config"))
+    sPropFile = writeShardFile(sFolder, "config.properties", dRequest.get("properties"))
+    lResources = dRequest.get("resources") or []
+    if lResources:
+        sResourceFolder = os.path.join(sFolder, "resources")
+        for sPath, sContent in lResources:
+            writeShardFile(sResourceFolder, sPath, sContent)
+        # The backslashes are escapes in the properties files, and Java accepts the slashes on Windows as well
+        sPropFile = os.path.join(sFolder, "config.properties")
+        with open(sPropFile, "ab") as oFile:
+            oFile.write(("\n%s=%s\n" % (RESOURCES_PROPERTY, sResourceFolder.replace(os.sep, "/"))).encode("utf-8"))
+    return sConfigFile, sPropFile
+
+
+def writeShardFile(sFolder, sPath, sContent):
+    if sContent is None:
+        return None
+    # The paths come from the network, they must stay in the folder
+    sFile = os.path.normpath(os.path.join(sFolder, *sPath.split("/")))
+    if os.path.isabs(sPath) or not sFile.startswith(os.path.join(os.path.normpath(sFolder), "")):
+        raise ValueError("Invalid path in the shard: %s" % sPath)
+    os.makedirs(os.path.dirname(sFile), exist_ok=True)
+    with open(sFile, "wb") as oFile:
+        oFile.write(base64.b64decode(sContent))
+    return sFile
+
+
+def createWorkerServer(sCheckstyleJar, sHost=DEFAULT_WORKER_HOST, iPort=DEFAULT_WORKER_PORT, iJobs=1, sToken=None):
+    oHandlerClass = type("CheckstyleWorkerRequestHandler", (WorkerRequestHandler,),
+                         {"sCheckstyleJar": os.path.abspath(sCheckstyleJar), "iJobs": iJobs, "sToken": sToken})
+    oServer = socketserver.ThreadingTCPServer((sHost, iPort), oHandlerClass, bind_and_activate=False)
+    oServer.daemon_threads = True
+    oServer.allow_reuse_address = True
+    oServer.server_bind()
+    oServer.server_activate()
+    return oServer
+
+
+def runWorkerCommand(lArgv):
+    oParser = argparse.ArgumentParser(prog="checkinter worker",
+                                      description="Check the shards of files sent by the coordinators of distributed "
+                                                  "checks, see --workers")
+    oParser.add_argument("-j", "--checkstyle-jar", default=os.getenv("CHECKSTYLE_JAR_LOC"),
+                         help="Location of the checkstyle JAR. Alternatively, you can define the environment variable "
+                              "CHECKSTYLE_JAR_LOC.")
+    oParser.add_argument("--host", default=DEFAULT_WORKER_HOST,
+                         help="Address to listen on (default: %(default)s). Any other than a loopback one requires a "
+                              "token.")
+    oParser.add_argument("--token", default=os.getenv(WORKER_TOKEN_VARIABLE),
+                         help="Secret that the coordinators must give, with the environment variable %s. "
+                              "Alternatively, you can define this environment variable." % WORKER_TOKEN_VARIABLE)
+    oParser.add_argument("--port", type=int, default=DEFAULT_WORKER_PORT,
+                         help="Port to listen on (default: %(default)s)")
+    oParser.add_argument("--jobs", type=int, default=1,
+                         help="Number of Checkstyle processes checking each shard in parallel (default: 1)")
+    oArgs = oParser.parse_args(lArgv)
+    if not oArgs.checkstyle_jar or not os.path.isfile(oArgs.checkstyle_jar):
+        oParser.error("Please provide a readable checkstyle JAR with -j, or define the environment variable "
+                      "CHECKSTYLE_JAR_LOC.")
+    if not oArgs.token and not isLoopbackHost(oArgs.host):
+        oParser.error("Listening on %s requires a token, given with --token or the environment variable %s."
+                      % (oArgs.host or "all the addresses", WORKER_TOKEN_VARIABLE))
+
+    # The JAR is in the system cache for the first shard
+    warmUpFile(oArgs.checkstyle_jar)
+    with createWorkerServer(oArgs.checkstyle_jar, oArgs.host, oArgs.port, oArgs.jobs, oArgs.token or None) as oServer:
+        print("Checkstyle worker listening on port %d" % oServer.server_address[1], flush=True)
+        try:
+            oServer.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Opening of the files in an editor, at the location of an error."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+import shlex
+import subprocess
+import threading
+import time
+
+import psutil
+
+from checkstyleinterface.util import getIntellijProcess, startFile
+
+# Time during which IntelliJ is assumed not running after a search did not find it, in seconds
+IDE_SEARCH_INTERVAL = 30
+# Time after which an editor command still running (e.g. a new editor window) no longer delays the next ones
+LAUNCH_TIMEOUT = 5
+
+
+class EditorLauncher:
+    """Opens the files with a command template, or in IntelliJ if running, or with the default editor.
+
+    The template is a command line in which {file}, {line} and {column} are replaced, for example
+    "code --goto {file}:{line}:{column}". Only one editor command is run at a time: the locations requested while it
+    runs are coalesced into the last one.
+    """
+
+    def __init__(self, sCommandTemplate=None):
+        self.sCommandTemplate = sCommandTemplate
+        # (pid, executable) of the IntelliJ process found, revalidated at each use
+        self.tIntellijProcess = None
+        self.fLastSearchTime = None
+        self.tPendingLocation = None
+        self.oLock = threading.Lock()
+        self.oThread = None
+
+    def open(self, sFile, iLine, iCol):
+        with self.oLock:
+            self.tPendingLocation = (sFile, iLine, iCol)
+            if self.oThread is None:
+                self.oThread = threading.Thread(target=self.runPendingCommands, daemon=True)
+                self.oThread.start()
+
+    def runPendingCommands(self):
+        try:
+            while True:
+                with self.oLock:
+                    if self.tPendingLocation is None:
+                        self.oThread = None
+                        return
+                    tLocation, self.tPendingLocation = self.tPendingLocation, None
+                try:
+                    self.runCommand(*tLocation)
+                except Exception as oExc:
+                    print("WARN: Unable to open %s: %s" % (tLocation[0], oExc))
+        finally:
+            # Whatever happens, the next locations start a new thread, unless one was already started
+            with self.oLock:
+                if self.oThread is threading.current_thread():
+                    self.oThread = None
+
+    def runCommand(self, sFile, iLine, iCol):
+        lArgs = self.getCommand(sFile, iLine, iCol)
+        if lArgs is None:
+            print("Opening file with default editor")
+            startFile(sFile)
+        else:
+            print("Opening file with %s" % os.path.basename(lArgs[0]))
+            try:
+                subprocess.Popen(lArgs).wait(LAUNCH_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                pass
+
+    def getCommand(self, sFile, iLine, iCol):
+        if self.sCommandTemplate:
+            return getCommandFromTemplate(self.sCommandTemplate, sFile, iLine, iCol)
+        sIntellijExe = self.getIntellijLocation()
+        if sIntellijExe:
+            return [sIntellijExe, "--line", str(iLine), "--column", str(iCol), sFile]
+        return None
+
+    def getIntellijLocation(self):
+        if self.tIntellijProcess is not None:
+            iPid, sExe = self.tIntellijProcess
+            if isProcessRunning(iPid, sExe):
+                return sExe
+            self.tIntellijProcess = None
+        elif self.fLastSearchTime is not None and time.monotonic() - self.fLastSearchTime < IDE_SEARCH_INTERVAL:
+            return None
+
+        # Scanning all the processes is slow, so it is only done when IntelliJ is not known to be running
+        self.fLastSearchTime = time.monotonic()
+        oProcess = getIntellijProcess()
+        if oProcess is None:
+            return None
+        self.tIntellijProcess = oProcess
+        return oProcess[1]
+
+
+def isProcessRunning(iPid, sExe):
+    try:
+        return psutil.Process(iPid).exe() == sExe
+    except (psutil.Error, ValueError):
+        return False
+
+
+def getCommandFromTemplate(sCommandTemplate, sFile, iLine, iCol):
+    dValues = {"file": sFile, "line": iLine, "column": iCol}
+    return [sArg.format(**dValues) for sArg in shlex.split(sCommandTemplate, posix=os.name != "nt")]
+
+
+def checkCommandTemplate(sCommandTemplate):
+    """Raises a ValueError if the template cannot give a command, e.g. with an unbalanced quote or an unknown
+    field."""
+    try:
+        lArgs = getCommandFromTemplate(sCommandTemplate, "File.java", 1, 1)
+    except (ValueError, IndexError, KeyError) as oExc:
+        raise ValueError("%s: %s" % (type(oExc).__name__, oExc)) from oExc
+    if not lArgs:
+        raise ValueError("Empty command")
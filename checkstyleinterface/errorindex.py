@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Indexes over the Checkstyle errors, to filter them without scanning them all."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+
+# Length of the substrings indexed for the text queries
+NGRAM_LENGTH = 3
+
+
+class PathTrie:
+    def __init__(self):
+        self.dChildren = {}
+        # Indexes of the errors located in this folder or file, or below it
+        self.lErrors = []
+
+    def add(self, lParts, iError):
+        oNode = self
+        oNode.lErrors.append(iError)
+        for sPart in lParts:
+            oNode = oNode.dChildren.setdefault(sPart, PathTrie())
+            oNode.lErrors.append(iError)
+
+    def find(self, lParts):
+        # All the parts must match exactly, except the last one which can be the beginning of a name
+        lNodes = [self]
+        for iIdx, sPart in enumerate(lParts):
+            if iIdx < len(lParts) - 1:
+                lNodes = [o.dChildren[sPart] for o in lNodes if sPart in o.dChildren]
+            else:
+                lNodes = [oChild for o in lNodes for sName, oChild in o.dChildren.items() if sName.startswith(sPart)]
+        return [iError for oNode in lNodes for iError in oNode.lErrors]
+
+
+class ErrorIndex:
+    def __init__(self, lCheckstyleErrors):
+        self.lCheckstyleErrors = list(lCheckstyleErrors)
+        self.dBySeverity = {}
+        self.dByCategory = {}
+        self.oPathTrie = PathTrie()
+        # The texts are highly redundant (same messages and files for many errors): only their distinct values are
+        # indexed by n-grams, each of them pointing to the errors which contain it
+        self.dByText = {}
+        self.dNgrams = {}
+
+        lFiles = [os.path.normcase(os.path.abspath(e.sFile)) for e in self.lCheckstyleErrors if e.sFile]
+        try:
+            self.sRootFolder = os.path.commonpath([os.path.dirname(s) for s in lFiles]) if lFiles else ""
+        except ValueError:
+            self.sRootFolder = ""
+
+        for iIdx, oError in enumerate(self.lCheckstyleErrors):
+            self.dBySeverity.setdefault((oError.sSeverity or "").lower(), []).append(iIdx)
+            self.dByCategory.setdefault(oError.sCategory, []).append(iIdx)
+            lParts = self.getPathParts(oError.sFile) if oError.sFile else None
+            if lParts is not None:
+                self.oPathTrie.add(lParts, iIdx)
+            for sText in {oError.sCategory, oError.sFile, oError.sMessage}:
+                if sText:
+                    self.dByText.setdefault(sText.lower(), []).append(iIdx)
+
+        for sText in self.dByText.keys():
+            for sNgram in getNgrams(sText):
+                self.dNgrams.setdefault(sNgram, []).append(sText)
+
+    def getPathParts(self, sPath):
+        # The paths are indexed relatively to the common folder of all the files, so that the prefixes can be given
+        # either as absolute paths or e.g. as package folders
+        sPath = os.path.normcase(sPath)
+        if os.path.isabs(sPath) and self.sRootFolder:
+            try:
+                sPath = os.path.relpath(sPath, self.sRootFolder)
+            except ValueError:
+                return None
+            if sPath == os.pardir or sPath.startswith(os.pardir + os.sep):
+                return None
+        return [s for s in sPath.replace("\\", "/").split("/") if s and s != os.curdir]
+
+    def getCategories(self):
+        return sorted(s for s in self.dByCategory.keys() if s)
+
+    def query(self, sText=None, sSeverity=None, sCategory=None, sPathPrefix=None):
+        """Returns the indexes of the errors matching all the given criteria, in their original order."""
+        lCandidates = []
+        if sSeverity:
+            lCandidates.append(self.dBySeverity.get(sSeverity.lower(), []))
+        if sCategory:
+            lCandidates.append(self.dByCategory.get(sCategory, []))
+        if sPathPrefix:
+            lParts = self.getPathParts(sPathPrefix)
+            if lParts is not None and sPathPrefix.endswith(("/", "\\")):
+                # A trailing separator means that the last name is complete
+                lParts.append("")
+            lCandidates.append(self.oPathTrie.find(lParts) if lParts is not None else [])
+        if sText:
+            lCandidates.append(self.findText(sText.lower()))
+
+        if not lCandidates:
+            return list(range(len(self.lCheckstyleErrors)))
+        lCandidates.sort(key=len)
+        setResult = set(lCandidates[0])
+        for lOther in lCandidates[1:]:
+            if not setResult:
+                break
+            setResult.intersection_update(lOther)
+        return sorted(setResult)
+
+    def findText(self, sText):
+        lNgrams = getNgrams(sText)
+        if lNgrams:
+            lPostings = sorted((self.dNgrams.get(s, []) for s in lNgrams), key=len)
+            setTexts = set(lPostings[0])
+            for lOther in lPostings[1:]:
+                setTexts.intersection_update(lOther)
+            lTexts = [s for s in setTexts if sText in s]
+        else:
+            lTexts = [s for s in self.dByText.keys() if sText in s]
+        return {iIdx for s in lTexts for iIdx in self.dByText[s]}
+
+
+def getNgrams(sText):
+    return list({sText[i:i + NGRAM_LENGTH] for i in range(len(sText) - NGRAM_LENGTH + 1)})
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Hand-off of the paths to analyze to the Checkstyle processes."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+HANDOFF_MODES = ["auto", "argv", "argfile", "chunks"]
+# Room left for the environment growing and for the arguments added later, like the output file
+ARGV_MARGIN = 8192
+# Java executable => whether it supports the @argfiles, i.e. Java 9 or later
+ARG_FILES_SUPPORT = {}
+
+
+class CheckstyleCommand:
+    def __init__(self, lBaseArgs, lPaths, sArgFile=None, sOutputFile=None):
+        self.lBaseArgs = lBaseArgs
+        self.lPaths = lPaths
+        self.sArgFile = sArgFile
+        self.sOutputFile = sOutputFile
+
+    def getArgs(self):
+        lArgs = self.lBaseArgs + (["-o", self.sOutputFile] if self.sOutputFile else [])
+        if self.sArgFile:
+            writeArgFile(self.sArgFile, lArgs[1:] + self.lPaths)
+            return [lArgs[0], "@" + self.sArgFile]
+        return lArgs + self.lPaths
+
+    def getPrintableArgs(self):
+        lArgs = self.lBaseArgs + (["-o", self.sOutputFile] if self.sOutputFile else [])
+        return lArgs + ["@" + self.sArgFile if self.sArgFile else "<%d paths>" % len(self.lPaths)]
+
+
+class TemporaryFolder:
+    """Temporary folder, only created when its path is requested, and removed when leaving the context."""
+
+    def __init__(self):
+        self.sPath = None
+        self.iFilesCount = 0
+
+    def getPath(self):
+        if self.sPath is None:
+            self.sPath = tempfile.mkdtemp(prefix="checkinter-")
+        return self.sPath
+
+    def getNewFile(self, sPrefix, sExtension):
+        self.iFilesCount += 1
+        return os.path.join(self.getPath(), "%s%d%s" % (sPrefix, self.iFilesCount, sExtension))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self.sPath is not None:
+            shutil.rmtree(self.sPath, ignore_errors=True)
+            self.sPath = None
+
+
+def getCommands(lBaseArgs, lShards, oTempFolder, sMode="auto", bOutputFiles=False):
+    """Returns the commands to run Checkstyle on each shard of paths, split in several commands if needed."""
+    lChunks = []
+    for lPaths in lShards:
+        if sMode == "argv" or (sMode == "auto" and getArgvSize(lBaseArgs + lPaths) <= getArgvLimit()):
+            lChunks.append((lPaths, False))
+        elif sMode in ["auto", "argfile"] and supportsArgFiles(lBaseArgs[0]):
+            lChunks.append((lPaths, True))
+        else:
+            lChunks += [(lChunk, False) for lChunk in splitChunks(lPaths, getArgvLimit() - getArgvSize(lBaseArgs))]
+
+    lCommands = []
+    for lChunk, bArgFile in lChunks:
+        lCommands.append(CheckstyleCommand(
+            lBaseArgs, lChunk,
+            sArgFile=oTempFolder.getNewFile("args", ".txt") if bArgFile else None,
+            sOutputFile=oTempFolder.getNewFile("output", ".xml") if bOutputFiles else None))
+    return lCommands
+
+
+def getPassThroughPaths(lFolders, dFiles):
+    """Replaces the files of the given folders by the folders themselves, when all their files are fully analyzed.
+
+    Checkstyle always walks the folders recursively, so they must come from a recursive listing.
+    """
+    lPassedFolders = []
+    for sFolder in sorted(set(os.path.abspath(s) for s in lFolders)):
+        if not os.path.isdir(sFolder) or any(isInFolder(sFolder, s) for s in lPassedFolders):
+            continue
+        if all(lLines is None for sFile, lLines in dFiles.items() if isInFolder(sFile, sFolder)):
+            lPassedFolders.append(sFolder)
+    return lPassedFolders + [sFile for sFile in dFiles if not any(isInFolder(sFile, s) for s in lPassedFolders)]
+
+
+def isInFolder(sPath, sFolder):
+    return os.path.normcase(sPath).startswith(os.path.join(os.path.normcase(sFolder), ""))
+
+
+def getArgvSize(lArgs):
+    if sys.platform == "win32":
+        # The arguments are joined in a single command line, quoted and separated by spaces
+        return sum(len(s) + 3 for s in lArgs)
+    # Each argument is copied with its terminating null character, and referenced by a pointer
+    return sum(len(os.fsencode(s)) + 1 + 8 for s in lArgs)
+
+
+def getArgvLimit():
+    if sys.platform == "win32":
+        return 32767 - ARGV_MARGIN
+    try:
+        iArgMax = os.sysconf("SC_ARG_MAX")
+    except (AttributeError, ValueError, OSError):
+        iArgMax = 128 * 1024
+    if iArgMax <= 0:
+        iArgMax = 128 * 1024
+    iEnvSize = sum(len(os.fsencode(k)) + len(os.fsencode(v)) + 2 + 8 for k, v in os.environ.items())
+    return max(iArgMax - iEnvSize - ARGV_MARGIN, 4096)
+
+
+def splitChunks(lPaths, iMaxSize):
+    lChunks = []
+    lChunk = []
+    iChunkSize = 0
+    for sPath in lPaths:
+        iSize = getArgvSize([sPath])
+        if lChunk and iChunkSize + iSize > iMaxSize:
+            lChunks.append(lChunk)
+            lChunk = []
+            iChunkSize = 0
+        lChunk.append(sPath)
+        iChunkSize += iSize
+    if lChunk:
+        lChunks.append(lChunk)
+    return lChunks
+
+
+def supportsArgFiles(sJava):
+    if sJava not in ARG_FILES_SUPPORT:
+        try:
+            sOutput = subprocess.run([sJava, "-version"], capture_output=True, encoding="utf-8",
+                                     errors="replace").stderr
+        except OSError:
+            sOutput = ""
+        oMatch = re.search(r'version "(\d+)(?:\.(\d+))?', sOutput)
+        if oMatch is None:
+            ARG_FILES_SUPPORT[sJava] = False
+        else:
+            # Up to Java 8, the versions are numbered 1.x
+            iMajor = int(oMatch.group(2) or 0) if oMatch.group(1) == "1" else int(oMatch.group(1))
+            ARG_FILES_SUPPORT[sJava] = iMajor >= 9
+    return ARG_FILES_SUPPORT[sJava]
+
+
+def writeArgFile(sArgFile, lArgs):
+    with open(sArgFile, "w", encoding="utf-8") as oFile:
+        for sArg in lArgs:
+            # In the Java argument files, the backslash is an escape character within quotes
+            oFile.write('"%s"\n' % sArg.replace("\\", "\\\\").replace('"', '\\"'))
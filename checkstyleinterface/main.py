@@ -28,34 +28,191 @@ __email__ = "cokie.forever@gmail.com"
 __license__ = "MIT"
 
 import argparse
+import contextlib
 import os
-import re
+import shlex
 import subprocess
 import sys
-import tempfile
 import tkinter as tk
-import xml.etree.ElementTree as ET
-from html import unescape
 
-from checkstyleinterface.application import Application, CheckstyleError
-from checkstyleinterface.util import makeExecutable
+from checkstyleinterface.application import Application
+from checkstyleinterface.budget import BudgetedCheck, DeferredResults, deferFiles, readDeferredJob, \
+    writeDeferredResults
+from checkstyleinterface.cache import DEFAULT_SHARED_TIMEOUT, getFileDigest
+from checkstyleinterface.cacheserver import runCacheServerCommand
+from checkstyleinterface.distributed import WORKER_TOKEN_VARIABLE, DistributedCheck, runWorkerCommand
+from checkstyleinterface.editor import EditorLauncher, checkCommandTemplate
+from checkstyleinterface.handoff import HANDOFF_MODES
+from checkstyleinterface.packstore import DEFAULT_MAX_PACK_SIZE
+from checkstyleinterface.profiles import PROFILES, getDefaultProfile
+from checkstyleinterface.report import REPORT_FORMATS, openReport
+from checkstyleinterface.ruleprofiler import runProfileRulesCommand
+from checkstyleinterface.runner import TRANSPORTS
+from checkstyleinterface.session import CheckstyleSession, getGitChangedFiles, getGitChangedFilesBetween, \
+    getGitChangedLines, getGitFiles, isJavaFile, listFiles
+from checkstyleinterface.stats import RunStats, appendRecord, runStatsCommand
+from checkstyleinterface.util import makeExecutable, getCacheDir, lowerPriority, startDetached
+
+MEGABYTE = 1024 * 1024
+
+SUB_COMMANDS = {
+    "stats": runStatsCommand,
+    "cache-server": runCacheServerCommand,
+    "profile-rules": runProfileRulesCommand,
+    "worker": runWorkerCommand
+}
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in SUB_COMMANDS:
+        sys.exit(SUB_COMMANDS[sys.argv[1]](sys.argv[2:]))
+
     oArgs = parseArgs()
     if oArgs.add_hook:
         sys.exit(addGitHook(oArgs))
-    elif oArgs.batch_mode:
-        lErrors = list(filter(lambda e: e.sSeverity.lower() == "error", runCheckstyle(oArgs)))
-        sys.exit(1 if lErrors else 0)
+    if oArgs.prewarm:
+        sys.exit(runPrewarm(oArgs))
+    if oArgs.run_deferred:
+        sys.exit(runDeferred(oArgs))
+
+    oRunStats = RunStats(getRunMode(oArgs))
+    oSession = createSession(oArgs)
+    oDeferredResults = DeferredResults(oArgs.git_project + oArgs.directory + oArgs.file)
+    if oArgs.batch_mode:
+        iRetVal = runBatchMode(oArgs, oRunStats, oSession)
+        bReportOnStdout = oArgs.report_format and (not oArgs.report_file or oArgs.report_file == "-")
+        printDeferredErrors(oDeferredResults, sys.stderr if bReportOnStdout else sys.stdout)
     else:
         oTkRoot = tk.Tk()
         oTkRoot.minsize(850, 480)
-        oApp = Application(oTkRoot, lambda: runCheckstyle(oArgs))
-        sys.exit(oApp.mainloop())
+        oApp = Application(oTkRoot, getErrorsProvider(oArgs, oRunStats, oSession, oDeferredResults),
+                           EditorLauncher(oArgs.editor))
+        iRetVal = oApp.mainloop()
+    oDeferredResults.consume()
+    oSession.close()
+
+    if oArgs.stats_file:
+        oRunStats.iExitCode = iRetVal
+        appendRecord(oArgs.stats_file, oRunStats)
+    sys.exit(iRetVal)
+
+
+def runBatchMode(oArgs, oRunStats, oSession=None):
+    if not oArgs.report_format and not oArgs.fail_fast:
+        lErrors = list(filter(lambda e: e.sSeverity.lower() == "error", runCheckstyle(oArgs, oRunStats, oSession)))
+        return 1 if lErrors else 0
+    if not oArgs.report_format:
+        return 1 if findFirstCheckstyleError(oArgs, oRunStats, oSession) is not None else 0
+
+    bReportOnStdout = not oArgs.report_file or oArgs.report_file == "-"
+    iRetVal = 0
+    with openReport(oArgs.report_format, oArgs.report_file) as oReport:
+        # Keeps the standard output clean for the report
+        with contextlib.redirect_stdout(sys.stderr) if bReportOnStdout else contextlib.nullcontext():
+            oErrors = iterCheckstyle(oArgs, oRunStats, oSession)
+            try:
+                for oError in oErrors:
+                    oReport.write(oError)
+                    if oError.sSeverity.lower() == "error":
+                        iRetVal = 1
+                        if oArgs.fail_fast:
+                            break
+            finally:
+                oErrors.close()
+    return iRetVal
+
+
+def getErrorsProvider(oArgs, oRunStats, oSession, oDeferredResults=None):
+    # Only the first run is recorded, refreshing from the interface is not a hook latency
+    oRunStatsIter = iter([oRunStats])
+
+    def provideErrors(lIgnoredCategories=()):
+        if oArgs.refresh_without_ignored:
+            oSession.skipCategories(lIgnoredCategories)
+        lErrors = runCheckstyle(oArgs, next(oRunStatsIter, None), oSession)
+        if oDeferredResults is not None:
+            lErrors += oDeferredResults.getErrors(lErrors)
+        return lErrors
+    return provideErrors
+
+
+def printDeferredErrors(oDeferredResults, oFile=sys.stdout):
+    # The errors of the deferred files are reported, but the check they were deferred from is already over
+    lErrors = oDeferredResults.getErrors()
+    if oDeferredResults.lJobFiles:
+        print("%d issues found by the background check of the files deferred by the previous runs:" % len(lErrors),
+              file=oFile)
+        for oError in lErrors:
+            print("  [%s] %s:%d:%d: %s" % (oError.sSeverity.upper(), oError.sFile, oError.iLine, oError.iCol or 0,
+                                           oError.sMessage), file=oFile)
+    if oDeferredResults.iPendingFiles:
+        print("%d files deferred by the previous runs are still being checked in the background."
+              % oDeferredResults.iPendingFiles, file=oFile)
+
+
+def runPrewarm(oArgs):
+    if oArgs.detach:
+        # The hook returns immediately, the run goes on in a low priority process
+        lArgv = [s for s in sys.argv[1:] if s != "--detach"]
+        sLogFile = os.path.join(getCacheDir(), "prewarm.log")
+        startDetached([sys.executable, "-m", "checkstyleinterface.main"] + lArgv, sLogFile)
+        return 0
+
+    lowerPriority()
+    dFiles = {}
+    for sGitFolder in oArgs.git_project:
+        for sFile in getGitChangedFilesBetween(sGitFolder, oArgs.prewarm):
+            if os.path.isfile(sFile) and isJavaFile(sFile):
+                dFiles[sFile] = None
+    print("Pre-warming the result cache with %d files changed since %s" % (len(dFiles), oArgs.prewarm))
+    oArgs.cache = True
+    oArgs.profile = "background"
+    oSession = createSession(oArgs)
+    for _ in oSession.iterCheckFiles(dFiles):
+        pass
+    oSession.close()
+    return 0
+
+
+def runDeferred(oArgs):
+    # Started detached by a check over its time budget, see iterBudgetedCheck
+    lowerPriority()
+    dFiles = readDeferredJob(oArgs.run_deferred)["files"]
+    print("Checking %d files deferred by a check over its time budget" % len(dFiles))
+    oArgs.cache = True
+    oArgs.profile = "background"
+    oRunStats = RunStats("deferred")
+    oSession = createSession(oArgs)
+    # The digests are taken before the check, so that the files modified meanwhile are seen as outdated
+    dDigests = {}
+    for sFile in dFiles:
+        with contextlib.suppress(OSError):
+            dDigests[sFile] = getFileDigest(sFile)
+    oErrors = oSession.iterCheckFiles(dFiles, oRunStats=oRunStats)
+    if oArgs.new_only is not None and oArgs.git_project:
+        oErrors = oSession.iterNewErrors(oErrors, oArgs.git_project, oArgs.git_mode, oArgs.new_only)
+    lErrors = list(oErrors)
+    oSession.close()
+    writeDeferredResults(oArgs.run_deferred, dDigests, lErrors)
+
+    if oArgs.stats_file:
+        oRunStats.iExitCode = 1 if any(e.sSeverity.lower() == "error" for e in lErrors) else 0
+        appendRecord(oArgs.stats_file, oRunStats)
+    return 0
+
+
+def getRunMode(oArgs):
+    if oArgs.from_hook:
+        return "hook"
+    return "batch" if oArgs.batch_mode else "ui"
 
 
 def addGitHook(oArgs):
+    if oArgs.prewarm_hooks and not oArgs.cache:
+        print("The result cache is enabled with --cache, for the checks to use the results prepared by the pre-warming "
+              "hooks.")
+        oArgs.cache = True
+
     iRetVal = 0
     for sGitFolder in oArgs.git_project:
         sGitFolder = os.path.abspath(sGitFolder)
@@ -64,47 +221,102 @@ def addGitHook(oArgs):
             iRetVal = 1
             continue
 
-        sHookFile = os.path.join(getHookDir(sGitFolder), "pre-push" if oArgs.git_mode == "push" else "pre-commit")
-        if os.path.isfile(sHookFile):
-            print("There is already a git hook active in %s, so I will just append mine to the existing file."
-                  % sGitFolder)
-            sAnswer = input("Is it ok for you? (y/n): ")
-            if sAnswer != "y":
-                print("Operation cancelled for %s" % sGitFolder)
+        lOptions = getHookOptions(oArgs, sGitFolder)
+        lHooks = [("pre-push" if oArgs.git_mode == "push" else "pre-commit", "Checkstyle verification",
+                   ["checkinter", "--from-hook"] + lOptions)]
+        if oArgs.prewarm_hooks:
+            # The files changed by a checkout or a merge are checked in the background, to fill the result cache
+            lHooks.append(("post-checkout", "Checkstyle cache pre-warming",
+                           ["checkinter", "--prewarm", '"$1"', "--detach"] + lOptions))
+            lHooks.append(("post-merge", "Checkstyle cache pre-warming",
+                           ["checkinter", "--prewarm", "ORIG_HEAD", "--detach"] + lOptions))
+
+        for sHookName, sComment, lArgs in lHooks:
+            if not installHook(sGitFolder, sHookName, sComment, " ".join(lArgs)):
                 iRetVal = 1
-                continue
-        else:
-            os.makedirs(os.path.dirname(sHookFile), exist_ok=True)
-            with open(sHookFile, "w") as oFile:
-                oFile.write("#!/bin/sh\n")
-
-        makeExecutable(sHookFile)
-
-        lArgs = ["checkinter"]
-        lArgs += ["-g", '"%s"' % sGitFolder]
-        lArgs += ["-m", oArgs.git_mode]
-        if oArgs.batch_mode:
-            lArgs += ["-b"]
-        if oArgs.directory:
-            lArgs += ["-d"] + ['"%s"' % os.path.abspath(s) for s in oArgs.directory]
-        if oArgs.file:
-            lArgs += ["-f"] + ['"%s"' % os.path.abspath(s) for s in oArgs.file]
-        if oArgs.recursive:
-            lArgs += ["-r"]
-        lArgs += ["-j", '"%s"' % os.path.abspath(oArgs.checkstyle_jar)]
-        if oArgs.config_file:
-            lArgs += ["-c", '"%s"' % os.path.abspath(oArgs.config_file)]
-        if oArgs.prop_file:
-            lArgs += ["-p", '"%s"' % os.path.abspath(oArgs.prop_file)]
-
-        with open(sHookFile, "a") as oFile:
-            oFile.write("\n# Checkstyle verification\n%s" % " ".join(lArgs))
-
-        print("Added hook in %s" % sGitFolder)
 
     return iRetVal
 
 
+def installHook(sGitFolder, sHookName, sComment, sCommandLine):
+    sHookFile = os.path.join(getHookDir(sGitFolder), sHookName)
+    if os.path.isfile(sHookFile):
+        print("There is already a %s git hook active in %s, so I will just append mine to the existing file."
+              % (sHookName, sGitFolder))
+        sAnswer = input("Is it ok for you? (y/n): ")
+        if sAnswer != "y":
+            print("Operation cancelled for %s" % sGitFolder)
+            return False
+    else:
+        os.makedirs(os.path.dirname(sHookFile), exist_ok=True)
+        with open(sHookFile, "w") as oFile:
+            oFile.write("#!/bin/sh\n")
+
+    makeExecutable(sHookFile)
+    with open(sHookFile, "a") as oFile:
+        oFile.write("\n# %s\n%s" % (sComment, sCommandLine))
+
+    print("Added %s hook in %s" % (sHookName, sGitFolder))
+    return True
+
+
+def getHookOptions(oArgs, sGitFolder):
+    lArgs = ["-g", '"%s"' % sGitFolder]
+    lArgs += ["-m", oArgs.git_mode]
+    if oArgs.batch_mode:
+        lArgs += ["-b"]
+    if oArgs.directory:
+        lArgs += ["-d"] + ['"%s"' % os.path.abspath(s) for s in oArgs.directory]
+    if oArgs.file:
+        lArgs += ["-f"] + ['"%s"' % os.path.abspath(s) for s in oArgs.file]
+    if oArgs.recursive:
+        lArgs += ["-r"]
+    lArgs += ["-j", '"%s"' % os.path.abspath(oArgs.checkstyle_jar)]
+    if oArgs.config_file:
+        lArgs += ["-c", '"%s"' % os.path.abspath(oArgs.config_file)]
+    if oArgs.prop_file:
+        lArgs += ["-p", '"%s"' % os.path.abspath(oArgs.prop_file)]
+    if oArgs.config_name:
+        lArgs += ["--config-name", '"%s"' % oArgs.config_name]
+    if oArgs.stats_file:
+        lArgs += ["-s", '"%s"' % os.path.abspath(oArgs.stats_file)]
+    if oArgs.jobs != 1:
+        lArgs += ["--jobs", str(oArgs.jobs)]
+    if oArgs.profile and oArgs.profile != getDefaultProfile():
+        lArgs += ["--profile", oArgs.profile]
+    if oArgs.max_processes != getDefaultMaxProcesses():
+        lArgs += ["--max-processes", str(oArgs.max_processes)]
+    if oArgs.fail_fast:
+        lArgs += ["--fail-fast"]
+    if oArgs.time_budget is not None:
+        lArgs += ["--time-budget", "%g" % oArgs.time_budget]
+    if oArgs.workers != getDefaultWorkers():
+        lArgs += ["--workers"] + oArgs.workers
+    if oArgs.handoff != "auto":
+        lArgs += ["--handoff", oArgs.handoff]
+    if oArgs.transport != "pipe":
+        lArgs += ["--transport", oArgs.transport]
+    if oArgs.cache:
+        lArgs += ["--cache"]
+    if oArgs.cache_max_size != DEFAULT_MAX_PACK_SIZE // MEGABYTE:
+        lArgs += ["--cache-max-size", str(oArgs.cache_max_size)]
+    if oArgs.refresh_without_ignored:
+        lArgs += ["--refresh-without-ignored"]
+    if oArgs.shared_cache:
+        lArgs += ["--shared-cache", '"%s"' % oArgs.shared_cache]
+    if oArgs.shared_cache_timeout != DEFAULT_SHARED_TIMEOUT:
+        lArgs += ["--shared-cache-timeout", str(oArgs.shared_cache_timeout)]
+    if oArgs.new_only is not None:
+        lArgs += ["--new-only"] + ([shlex.quote(oArgs.new_only)] if oArgs.new_only else [])
+    if oArgs.editor:
+        lArgs += ["--editor", shlex.quote(oArgs.editor)]
+    if oArgs.report_format:
+        lArgs += ["--report-format", oArgs.report_format]
+        if oArgs.report_file and oArgs.report_file != "-":
+            lArgs += ["--report-file", '"%s"' % os.path.abspath(oArgs.report_file)]
+    return lArgs
+
+
 def getHookDir(sGitFolder):
     oProcess = subprocess.run(["git", "config", "core.hookspath"], capture_output=True,
                               encoding="utf-8", cwd=sGitFolder)
@@ -122,161 +334,103 @@ def getHookDir(sGitFolder):
     return sHookDir
 
 
-def runCheckstyle(oArgs):
-    dFiles = getFilesList(oArgs)
-    if not dFiles:
-        return []
+def getDefaultMaxProcesses():
+    sMaxProcesses = os.getenv("CHECKINTER_MAX_PROCESSES")
+    return int(sMaxProcesses) if sMaxProcesses and sMaxProcesses.isdigit() else os.cpu_count() or 1
 
-    lArgs = ["java", "-jar", oArgs.checkstyle_jar, "-f", "xml"]
-    if oArgs.config_file:
-        sConfigFile = os.path.abspath(oArgs.config_file)
-        if not os.path.isfile(sConfigFile):
-            print("WARN: The config file %s is not readable, ignored." % sConfigFile)
-        else:
-            lArgs += ["-c", sConfigFile]
-    if oArgs.prop_file:
-        sPropFile = os.path.abspath(oArgs.prop_file)
-        if not os.path.isfile(sPropFile):
-            print("WARN: The properties file %s is not readable, ignored." % sPropFile)
-        else:
-            lArgs += ["-p", sPropFile]
-
-    with tempfile.TemporaryDirectory() as sTempDir:
-        sOutputFile = os.path.join(sTempDir, "output.xml")
-        lArgs += ["-o", sOutputFile]
-        print("Running checkstyle: %s" % lArgs)
-        try:
-            subprocess.run(lArgs + list(dFiles.keys()), check=True)
-            return []
-        except subprocess.CalledProcessError:
-            if not os.path.isfile(sOutputFile):
-                raise
-        oRoot = ET.parse(sOutputFile).getroot()
-
-    lErrors = []
-    for oError in checkstyleErrorsFromXml(oRoot):
-        lLines = dFiles[oError.sFile]
-        if lLines is None or oError.iLine in lLines:
-            lErrors.append(oError)
-
-    return lErrors
-
-
-def checkstyleErrorsFromXml(oRoot):
-    for oFileNode in oRoot.findall("file"):
-        sFilePath = oFileNode.get("name")
-        for oErrorNode in oFileNode.findall("error"):
-            oError = CheckstyleError()
-            oError.sFile = os.path.abspath(sFilePath)
-            oError.iLine = int(oErrorNode.get("line"))
-            oError.iCol = int(oErrorNode.get("column")) if "column" in oErrorNode.attrib else 0
-            oError.sSeverity = oErrorNode.get("severity")
-            oError.sCategory = oErrorNode.get("source").split(".")[-1]
-            oError.sMessage = unescape(oErrorNode.get("message"))
-            yield oError
-
-
-def isJavaFile(sFilePath):
-    if os.path.splitext(sFilePath)[1].lower() == ".java":
-        if os.path.isfile(sFilePath):
-            return True
-        print("WARN: The file %s is not readable, ignored" % sFilePath)
-        return False
 
+def getDefaultWorkers():
+    return [s.strip() for s in os.getenv("CHECKINTER_WORKERS", "").split(",") if s.strip()]
 
-def getFilesList(oArgs):
+
+def createSession(oArgs):
+    # The shared cache is read through the local one
+    bCache = oArgs.cache or bool(oArgs.shared_cache)
+    return CheckstyleSession(oArgs.checkstyle_jar, oArgs.config_file, oArgs.prop_file, sConfigName=oArgs.config_name,
+                             iJobs=oArgs.jobs, sHandoff=oArgs.handoff, sTransport=oArgs.transport,
+                             bCache=bCache, sCacheFolder=os.path.join(getCacheDir(), "results") if bCache else None,
+                             sSharedCache=oArgs.shared_cache, fSharedCacheTimeout=oArgs.shared_cache_timeout,
+                             iCacheMaxSize=oArgs.cache_max_size * MEGABYTE, iMaxProcesses=oArgs.max_processes,
+                             sProfile=oArgs.profile)
+
+
+def runCheckstyle(oArgs, oRunStats=None, oSession=None):
+    return list(iterCheckstyle(oArgs, oRunStats, oSession))
+
+
+def findFirstCheckstyleError(oArgs, oRunStats=None, oSession=None):
+    oErrors = iterCheckstyle(oArgs, oRunStats, oSession)
+    try:
+        oFirstError = next((e for e in oErrors if e.sSeverity.lower() == "error"), None)
+    finally:
+        oErrors.close()
+    if oFirstError is not None:
+        print("Checkstyle error found, analysis stopped: %s at %d:%d: %s"
+              % (oFirstError.sFile, oFirstError.iLine, oFirstError.iCol, oFirstError.sMessage))
+    return oFirstError
+
+
+def iterCheckstyle(oArgs, oRunStats=None, oSession=None):
+    if oSession is None:
+        oSession = createSession(oArgs)
+    if oRunStats is None:
+        oRunStats = RunStats(None)
+    if oArgs.workers:
+        yield from iterDistributedCheck(oArgs, oRunStats, oSession)
+        return
+    if oArgs.time_budget is not None:
+        yield from iterBudgetedCheck(oArgs, oRunStats, oSession)
+        return
+    # The files are checked as they are listed, see CheckPipeline
     print("Getting files list...")
-    dFiles = {}
+    yield from oSession.iterCheckPaths(oArgs.file, oArgs.directory, oArgs.recursive, oArgs.git_project,
+                                       oArgs.git_mode, oArgs.lines_only, oRunStats, oArgs.new_only)
 
-    for sFilePath in oArgs.file:
-        sFilePath = os.path.abspath(sFilePath)
-        if not os.path.isfile(sFilePath):
-            print("WARN: The file %s is not readable, ignored" % sFilePath)
-            continue
-        dFiles[sFilePath] = None
 
-    for sFolder in oArgs.directory:
-        sFolder = os.path.abspath(sFolder)
-        if not os.path.isdir(sFolder):
-            print("WARN: The folder %s is not readable, ignored" % sFolder)
-            continue
-        for sDirPath, lDirNames, lFileNames in os.walk(sFolder):
-            for sFileName in lFileNames:
-                sFilePath = os.path.join(sDirPath, sFileName)
-                if isJavaFile(sFilePath):
-                    dFiles[sFilePath] = None
-            if not oArgs.recursive:
-                lDirNames.clear()
-
-    if oArgs.lines_only:
-        for sFilePath, lLines in getChangedLines(oArgs).items():
-            if isJavaFile(sFilePath):
-                dFiles[sFilePath] = lLines
-    else:
-        for sFilePath in getChangedFiles(oArgs):
-            if isJavaFile(sFilePath):
-                dFiles[sFilePath] = None
+def iterDistributedCheck(oArgs, oRunStats, oSession):
+    with oRunStats.phase("files"):
+        dFiles = getFilesList(oArgs)
+    oErrors = iter(DistributedCheck(oArgs.workers, dFiles, oArgs.config_name, oArgs.config_file, oArgs.prop_file,
+                                    oRunStats, oSession.getCostModel(), sToken=os.getenv(WORKER_TOKEN_VARIABLE)))
+    if oArgs.new_only is not None and oArgs.git_project:
+        oErrors = oSession.iterNewErrors(oErrors, oArgs.git_project, oArgs.git_mode, oArgs.new_only)
+    yield from oErrors
+
+
+def iterBudgetedCheck(oArgs, oRunStats, oSession):
+    # The files are prioritized, so they are all listed before being checked
+    with oRunStats.phase("files"):
+        dFiles = getFilesList(oArgs)
+    oCheck = BudgetedCheck(oSession, dFiles, oArgs.time_budget, oRunStats)
+    oErrors = iter(oCheck)
+    if oArgs.new_only is not None and oArgs.git_project:
+        oErrors = oSession.iterNewErrors(oErrors, oArgs.git_project, oArgs.git_mode, oArgs.new_only)
+    yield from oErrors
+
+    if oCheck.dDeferredFiles:
+        deferFiles(oCheck.dDeferredFiles, sys.argv[1:])
+        print("Time budget of %gs spent: %d of %d files checked, the %d others are checked in the background and their "
+              "results will be shown by the next run." % (oArgs.time_budget, len(oCheck.dCheckedFiles), len(dFiles),
+                                                          len(oCheck.dDeferredFiles)))
 
+
+def getFilesList(oArgs):
+    print("Getting files list...")
+    dFiles = listFiles(oArgs.file, oArgs.directory, oArgs.recursive)
+    dFiles.update(getGitFiles(oArgs.git_project, oArgs.git_mode, oArgs.lines_only))
     print("%d files to be analyzed." % len(dFiles))
     return dFiles
 
 
 def getChangedFiles(oArgs):
-    lFiles = []
-    for sFolder in oArgs.git_project:
-        sFolder = os.path.abspath(sFolder)
-        try:
-            if oArgs.git_mode == "push":
-                sOutput = subprocess.run(["git", "--no-pager", "show", "HEAD", "--pretty=", "--name-only"], check=True,
-                                         capture_output=True, encoding="utf-8", cwd=sFolder).stdout
-            else:
-                sOutput = subprocess.run(["git", "--no-pager", "diff", "HEAD", "--name-only"], check=True,
-                                         capture_output=True, encoding="utf-8", cwd=sFolder).stdout
-        except subprocess.CalledProcessError:
-            print("WARN: Unable to run git in the folder %s, ignored" % sFolder)
-            continue
-        for sRelativeFilePath in sOutput.splitlines():
-            sFilePath = os.path.abspath(os.path.join(sFolder, sRelativeFilePath))
-            lFiles.append(sFilePath)
-    return lFiles
+    return getGitChangedFiles(oArgs.git_project, oArgs.git_mode)
 
 
 def getChangedLines(oArgs):
-    oFileRegex = re.compile(r"\+{3} b/(.*)")
-    oDevNullRegex = re.compile(r"\+{3} /dev/null")
-    oLinesRegex = re.compile(r"@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
-    dChangedLines = {}
-
-    for sFolder in oArgs.git_project:
-        sFolder = os.path.abspath(sFolder)
-        lArgs = ["git", "--no-pager", "show", "HEAD", "--pretty=", "--unified=0"] if oArgs.git_mode == "push" \
-            else ["git", "--no-pager", "diff", "HEAD", "--unified=0"]
-        try:
-            sOutput = subprocess.run(lArgs, check=True, capture_output=True, encoding="utf-8", cwd=sFolder).stdout
-        except subprocess.CalledProcessError:
-            print("WARN: Unable to run git in the folder %s, ignored" % sFolder)
-            continue
+    return getGitChangedLines(oArgs.git_project, oArgs.git_mode)
+
 
-        sCurrentFile = None
-        for sLine in sOutput.splitlines():
-            oMatch = oFileRegex.match(sLine)
-            if oMatch is not None:
-                sCurrentFile = os.path.abspath(os.path.join(sFolder, oMatch.group(1).strip()))
-            elif oDevNullRegex.match(sLine) is not None:
-                sCurrentFile = None
-            elif sCurrentFile is not None:
-                oMatch = oLinesRegex.match(sLine)
-                if oMatch is not None:
-                    iStartLine = int(oMatch.group(1))
-                    iLinesCount = int(oMatch.group(2)) if oMatch.group(2) else 1
-                    if iLinesCount > 0:
-                        dChangedLines.setdefault(sCurrentFile, []).extend(
-                            list(range(iStartLine, iStartLine + iLinesCount)))
-
-    return dChangedLines
-
-
-def parseArgs():
+def parseArgs(lArgv=None):
     oParser = argparse.ArgumentParser(description="Checkstyle check with user interface")
 
     oParser.add_argument("-g", "--git-project", help="Git project containing files to check", nargs="*", default=[])
@@ -286,6 +440,11 @@ def parseArgs():
                               "modified in the last commit.")
     oParser.add_argument("-l", "--lines-only", help="For files in git projects, check changed lines only instead of "
                                                     "entire files", action="store_true")
+    oParser.add_argument("--new-only", nargs="?", const="", metavar="REVISION",
+                         help="For files in git projects, report only the errors which are not in the base version "
+                              "of the files, i.e. the merge-base of HEAD and REVISION if provided, otherwise HEAD in "
+                              "commit mode and its parent in push mode. The errors are matched by category, message "
+                              "and line content. The errors of the base versions are cached in the cache folder.")
     oParser.add_argument("-b", "--batch-mode", help="Batch mode: no interface is opened, "
                                                     "returns 1 if there are Checkstyle failures", action="store_true")
     oParser.add_argument("-d", "--directory", help="Directory containing files to check", nargs="*", default=[])
@@ -297,10 +456,100 @@ def parseArgs():
                               "CHECKSTYLE_JAR_LOC.")
     oParser.add_argument("-c", "--config-file", help="Location of the checkstyle configuration file")
     oParser.add_argument("-p", "--prop-file", help="Location of the checkstyle properties file")
+    oParser.add_argument("--config-name",
+                         help="Name of the checkstyle configuration files to look for, e.g. checkstyle.xml: each file "
+                              "is checked with the nearest one in its folder or its parent folders, with the "
+                              "properties file of the same name next to it if any (e.g. checkstyle.properties). The "
+                              "files without such configuration are checked with -c and -p. Checkstyle is run once "
+                              "per configuration.")
     oParser.add_argument("-k", "--add-hook", help="Do not run Checkstyle, but instead add a git hook "
                                                   "in the provided git projects", action="store_true")
-
-    oArgs = oParser.parse_args()
+    oParser.add_argument("-s", "--stats-file", default=os.getenv("CHECKINTER_STATS_FILE"),
+                         help="Append a record about this run (duration, files count...) to this file, to be "
+                              "reported with 'checkinter stats'. Alternatively, you can define the environment "
+                              "variable CHECKINTER_STATS_FILE.")
+    oParser.add_argument("--jobs", type=int, default=1,
+                         help="Number of Checkstyle processes to run in parallel, 0 for one per CPU core or according "
+                              "to --profile (default: 1). Files are balanced between them according to their previous "
+                              "analysis times, or their sizes when unknown.")
+    oParser.add_argument("--profile", choices=sorted(PROFILES.keys()), type=str.lower, default=getDefaultProfile(),
+                         help="Execution profile of the Checkstyle processes: interactive (a share of the CPU cores "
+                              "and of the memory, leaving room for the IDE), background (low CPU and I/O priorities, "
+                              "few resources, as used by the pre-warming) or ci (all the resources of the machine). "
+                              "The heap of the processes is sized from their files and the available memory, and "
+                              "with --jobs 0 their number from the CPU cores and the memory. By default, ci if the "
+                              "CI environment variable is defined, otherwise the priority and the heap are left to "
+                              "the system and to Java. Alternatively, you can define the environment variable "
+                              "CHECKINTER_PROFILE.")
+    oParser.add_argument("--max-processes", type=int, default=getDefaultMaxProcesses(), metavar="COUNT",
+                         help="Maximum number of Checkstyle processes running at once on the machine, shared by all "
+                              "the concurrent runs of the tool, e.g. the hooks of several commits, 0 for no limit "
+                              "(default: one per CPU core). A run can always use --jobs processes. A run waiting for "
+                              "another one to terminate reuses its results if it checked the same files. "
+                              "Alternatively, you can define the environment variable CHECKINTER_MAX_PROCESSES.")
+    oParser.add_argument("--time-budget", type=float, metavar="SECONDS",
+                         help="Check the files with changed lines first, then the most recently modified ones, until "
+                              "this time is spent. The files left are then checked in a background process, and "
+                              "their issues are shown by the next run. The errors found within the budget are "
+                              "reported as usual.")
+    oParser.add_argument("--workers", nargs="+", default=getDefaultWorkers(), metavar="HOST:PORT",
+                         help="Check the files on these worker hosts, running 'checkinter worker', instead of "
+                              "locally: the files are sent by shards with their contents and their configuration, and "
+                              "the shards failed by a worker are sent to another one. Alternatively, you can define "
+                              "the environment variable CHECKINTER_WORKERS, separated by commas. The workers listening "
+                              "on the network require the token given by the environment variable %s."
+                              % WORKER_TOKEN_VARIABLE)
+    oParser.add_argument("--fail-fast", help="In batch mode, stop Checkstyle and return 1 as soon as an error is "
+                                             "found", action="store_true")
+    oParser.add_argument("--report-format", choices=sorted(REPORT_FORMATS.keys()), type=str.lower,
+                         help="In batch mode, write the found errors in this format, as soon as they are reported, "
+                              "followed by the counts of errors, warnings and infos")
+    oParser.add_argument("--report-file", default="-",
+                         help="File to write the report to, see --report-format (default: standard output)")
+    oParser.add_argument("--handoff", choices=HANDOFF_MODES, type=str.lower, default="auto",
+                         help="How the files are passed to Checkstyle: as arguments (argv), with a Java 9+ arguments "
+                              "file (argfile), or as arguments split between several Checkstyle runs if they are too "
+                              "long (chunks). By default (auto), the arguments are used when short enough, otherwise "
+                              "an arguments file if supported, otherwise chunks. In auto mode, the folders provided "
+                              "with -d -r are also passed as such when all their files are checked.")
+    oParser.add_argument("--transport", choices=TRANSPORTS, type=str.lower, default="pipe",
+                         help="How the Checkstyle reports are read: from the output of the processes as they are "
+                              "written (pipe, default), or from temporary files once the processes are done (file)")
+    oParser.add_argument("--cache", action="store_true",
+                         help="Reuse the results of the files unchanged since a previous run with the same "
+                              "configuration, stored in the cache folder. The files referenced by the configuration, "
+                              "like suppressions, are not taken into account.")
+    oParser.add_argument("--cache-max-size", type=int, default=DEFAULT_MAX_PACK_SIZE // MEGABYTE, metavar="MB",
+                         help="Maximum size of the results stored in the cache folder, above which the least recently "
+                              "used ones are evicted (default: %(default)s MB)")
+    oParser.add_argument("--shared-cache", default=os.getenv("CHECKINTER_SHARED_CACHE"), metavar="URL_OR_FOLDER",
+                         help="Cache of results shared with other machines, read through the local one (implies "
+                              "--cache): an HTTP URL, on which the results are read and written with GET and PUT "
+                              "requests (see the cache-server subcommand), or a folder, e.g. a mounted network share. "
+                              "Alternatively, you can define the environment variable CHECKINTER_SHARED_CACHE.")
+    oParser.add_argument("--shared-cache-timeout", type=float, default=DEFAULT_SHARED_TIMEOUT, metavar="SECONDS",
+                         help="Maximum time spent on the shared cache when looking the results up, and when writing "
+                              "them at the end (default: %(default)s). The shared cache is not used anymore by a run "
+                              "after a timeout or an error.")
+    oParser.add_argument("--refresh-without-ignored", action="store_true",
+                         help="When refreshing from the interface, remove the checks of the ignored categories from "
+                              "the configuration, so that Checkstyle does not run them. Their errors are then no "
+                              "longer displayed, even as ignored.")
+    oParser.add_argument("--editor", default=os.getenv("CHECKINTER_EDITOR"),
+                         help="Command opening a file in the interface, in which {file}, {line} and {column} are "
+                              "replaced, e.g. \"code --goto {file}:{line}:{column}\". By default, the files are opened "
+                              "in IntelliJ if running, or with the default editor. Alternatively, you can define the "
+                              "environment variable CHECKINTER_EDITOR.")
+    oParser.add_argument("--prewarm-hooks", action="store_true",
+                         help="With -k, also add post-checkout and post-merge hooks which check the files changed by "
+                              "the checkout or the merge in a background process, to fill the result cache used by "
+                              "the next checks (implies --cache)")
+    oParser.add_argument("--prewarm", metavar="REVISION", help=argparse.SUPPRESS)
+    oParser.add_argument("--detach", action="store_true", help=argparse.SUPPRESS)
+    oParser.add_argument("--run-deferred", metavar="JOB_FILE", help=argparse.SUPPRESS)
+    oParser.add_argument("--from-hook", help=argparse.SUPPRESS, action="store_true")
+
+    oArgs = oParser.parse_args(lArgv)
     if not oArgs.git_project and not oArgs.directory and not oArgs.file:
         oParser.error("Please provide files to check with -g, -d or -f.")
     if not oArgs.checkstyle_jar:
@@ -310,10 +559,35 @@ def parseArgs():
         oParser.error("The checkstyle JAR file %s is not readable." % oArgs.checkstyle_jar)
     if oArgs.add_hook and not oArgs.git_project:
         oParser.error("When using -k, please provide at least one git project with -g.")
+    if oArgs.prewarm_hooks and not oArgs.add_hook:
+        print("WARN: The --prewarm-hooks option will have no effect, as no hook is added with -k.")
+    if oArgs.new_only is not None and not oArgs.git_project:
+        print("WARN: The --new-only option will have no effect, as no git project was provided with -g.")
     if oArgs.lines_only and not oArgs.git_project:
         print("WARN: The -l option will have no effect, as no git project was provided with -g.")
     if oArgs.recursive and not oArgs.directory:
         print("WARN: The -r option will have no effect, as no directory was provided with -d.")
+    if oArgs.fail_fast and not oArgs.batch_mode:
+        print("WARN: The --fail-fast option will have no effect, as the batch mode is not enabled with -b.")
+    if oArgs.report_format and not oArgs.batch_mode:
+        print("WARN: The --report-format option will have no effect, as the batch mode is not enabled with -b.")
+    if oArgs.jobs < 0:
+        oParser.error("The number of jobs cannot be negative.")
+    if oArgs.profile is not None and oArgs.profile not in PROFILES:
+        oParser.error("Unknown execution profile: %s" % oArgs.profile)
+    if oArgs.max_processes < 0:
+        oParser.error("The maximum number of processes cannot be negative.")
+    if oArgs.time_budget is not None and oArgs.time_budget <= 0:
+        oParser.error("The time budget must be positive.")
+    if oArgs.workers and oArgs.time_budget is not None:
+        oParser.error("The --time-budget option cannot be used with --workers.")
+    if oArgs.workers and (oArgs.cache or oArgs.shared_cache):
+        print("WARN: The result cache is not used with --workers.")
+    if oArgs.editor:
+        try:
+            checkCommandTemplate(oArgs.editor)
+        except ValueError as oExc:
+            oParser.error("Invalid editor command %s: %s" % (oArgs.editor, oExc))
 
     return oArgs
 
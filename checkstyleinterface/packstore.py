@@ -0,0 +1,433 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+"""Packed store of the cached results: an append-only pack of records with interned strings, and a sorted index
+memory-mapped for the lookups.
+
+The store is made of three files in its folder, each starting with a magic string and a generation number:
+- strings: the interned strings (severities, categories and messages), as [length: u32][UTF-8 bytes], identified by
+  their rank from 1 (0 is None)
+- pack: the records, as [key: 32 bytes][entries count: u32] then [line, column, severity, category, message: u32] per
+  entry
+- index: [indexed pack size: u64][count: u32], a fan-out table giving for each value of the first two bytes of the
+  keys the rank of the first key starting with it or above (65537 u32, the last one being the count), then the records
+  of the pack up to the indexed size, sorted by key, as [key: 32 bytes][record offset: u64][last access: u32]
+
+The records appended after the index was built are found by reading the end of the pack when opening the store. When
+closing, the index is rebuilt if too many records were appended, and the pack is compacted if it holds too many
+replaced records, or if it exceeds its maximum size, in which case the least recently used records are evicted. The
+files are only written under a lock, and the rebuilt ones get a new generation, so that the other processes reload
+them. A generation mismatch between the files, e.g. after a crash, empties the store.
+"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import contextlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+from checkstyleinterface.util import lockFile, unlockFile
+
+# Maximum size of the pack, in bytes, above which the least recently used records are evicted
+DEFAULT_MAX_PACK_SIZE = 256 * 1024 * 1024
+# Share of the maximum size kept by an eviction, so that the next runs do not evict again right away
+EVICTION_RATIO = 0.75
+# Number of records appended after the index from which the index is rebuilt
+REINDEX_THRESHOLD = 1024
+# Size of the pack, in bytes, from which it is compacted when more than half of it is made of replaced records
+COMPACTION_MIN_SIZE = 1024 * 1024
+
+FILE_HEADER = struct.Struct("<8sI")
+PACK_MAGIC = b"CIPACK01"
+STRINGS_MAGIC = b"CISTRS01"
+INDEX_MAGIC = b"CIINDX01"
+INDEX_HEADER = struct.Struct("<8sIQI")
+INDEX_FANOUT = struct.Struct("<65537I")
+INDEX_BUCKET = struct.Struct("<II")
+INDEX_ENTRY = struct.Struct("<32sQI")
+# Offset of the first index entry
+INDEX_ENTRIES = INDEX_HEADER.size + INDEX_FANOUT.size
+RECORD_HEADER = struct.Struct("<32sI")
+RECORD_ENTRY = struct.Struct("<IIIII")
+STRING_HEADER = struct.Struct("<I")
+GENERATION = struct.Struct("<I")
+
+
+class PackStore:
+    """Store of cache entries in a pack file of a local folder, safe for concurrent processes and threads."""
+
+    def __init__(self, sFolder, iMaxSize=DEFAULT_MAX_PACK_SIZE):
+        self.sFolder = sFolder
+        self.iMaxSize = iMaxSize
+        self.oLock = threading.RLock()
+        self.bLoaded = False
+        self.iGeneration = None
+        self.oPackFile = None
+        self.oPackMap = None
+        self.oIndexMap = None
+        self.iIndexedSize = 0
+        self.iIndexCount = 0
+        # Key => offset of the records appended after the index
+        self.dTail = {}
+        # Position in the index => last access time, written in the index when closing
+        self.dIndexAccesses = {}
+        # String id => string, and string => id
+        self.lStrings = [None]
+        self.dStringIds = {None: 0}
+        self.iStringsSize = 0
+
+    def get(self, sKey):
+        return self.getMany([sKey]).get(sKey)
+
+    def getMany(self, lKeys):
+        dFound = {}
+        with self.oLock:
+            if not self.bLoaded:
+                with self.locked():
+                    self.load()
+            iNow = int(time.time())
+            for sKey in lKeys:
+                bKey = bytes.fromhex(sKey)
+                iOffset = self.dTail.get(bKey)
+                if iOffset is None:
+                    iPosition = self.findInIndex(bKey)
+                    if iPosition is None:
+                        continue
+                    iOffset = INDEX_ENTRY.unpack_from(self.oIndexMap, iPosition)[1]
+                    self.dIndexAccesses[iPosition] = iNow
+                dFound[sKey] = self.readRecord(iOffset)
+        return dFound
+
+    def put(self, sKey, lEntries):
+        with self.oLock, self.locked():
+            if not self.bLoaded or self.isStale():
+                self.load()
+            else:
+                # Other processes may have interned new strings since
+                self.readStrings()
+            lNewStrings = []
+            bRecord = RECORD_HEADER.pack(bytes.fromhex(sKey), len(lEntries)) + b"".join(
+                RECORD_ENTRY.pack(iLine, iCol, self.intern(sSeverity, lNewStrings),
+                                  self.intern(sCategory, lNewStrings), self.intern(sMessage, lNewStrings))
+                for iLine, iCol, sSeverity, sCategory, sMessage in lEntries)
+            if lNewStrings:
+                # The strings are written before the record, so that a record never references a missing string
+                bStrings = b"".join(STRING_HEADER.pack(len(bString)) + bString for bString in lNewStrings)
+                with open(self.getPath("strings"), "ab") as oFile:
+                    oFile.write(bStrings)
+                self.iStringsSize += len(bStrings)
+            self.oPackFile.seek(0, os.SEEK_END)
+            iOffset = self.oPackFile.tell()
+            self.oPackFile.write(bRecord)
+            self.oPackFile.flush()
+            self.dTail[bytes.fromhex(sKey)] = iOffset
+
+    def refresh(self):
+        """Reads the records appended by the other processes since the store was loaded."""
+        with self.oLock, self.locked():
+            if not self.bLoaded or self.isStale():
+                self.load()
+            else:
+                self.readStrings()
+                self.readTail()
+
+    def close(self):
+        """Writes the access times in the index, and rebuilds the index or compacts the pack if needed."""
+        with self.oLock:
+            if not self.bLoaded:
+                return
+            try:
+                with self.locked():
+                    if self.isStale():
+                        return
+                    iPackSize = self.readTail()
+                    if len(self.dTail) >= REINDEX_THRESHOLD or iPackSize > self.iMaxSize:
+                        self.rebuild(iPackSize)
+                    else:
+                        self.writeAccessTimes()
+            except OSError as oExc:
+                print("WARN: Could not update the result cache index: %s" % oExc)
+            finally:
+                self.unload()
+
+    def load(self):
+        """Opens the files of the store, the lock being held."""
+        self.unload()
+        os.makedirs(self.sFolder, exist_ok=True)
+        self.iGeneration = readGeneration(self.getPath("pack"), PACK_MAGIC)
+        if self.iGeneration is None or readGeneration(self.getPath("strings"), STRINGS_MAGIC) != self.iGeneration:
+            self.iGeneration = GENERATION.unpack(os.urandom(GENERATION.size))[0]
+            writeFile(self.getPath("strings"), FILE_HEADER.pack(STRINGS_MAGIC, self.iGeneration))
+            writeFile(self.getPath("pack"), FILE_HEADER.pack(PACK_MAGIC, self.iGeneration))
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.getPath("index"))
+
+        self.oPackFile = open(self.getPath("pack"), "r+b")
+        iPackSize = os.fstat(self.oPackFile.fileno()).st_size
+        self.iIndexedSize = FILE_HEADER.size
+        self.iIndexCount = 0
+        try:
+            with open(self.getPath("index"), "rb") as oFile:
+                sMagic, iGeneration, iIndexedSize, iCount = INDEX_HEADER.unpack(oFile.read(INDEX_HEADER.size))
+                if sMagic == INDEX_MAGIC and iGeneration == self.iGeneration and iIndexedSize <= iPackSize \
+                        and os.fstat(oFile.fileno()).st_size == INDEX_ENTRIES + iCount * INDEX_ENTRY.size:
+                    self.iIndexedSize, self.iIndexCount = iIndexedSize, iCount
+                    if iCount:
+                        self.oIndexMap = mmap.mmap(oFile.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, struct.error):
+            pass
+
+        self.lStrings = [None]
+        self.dStringIds = {None: 0}
+        self.iStringsSize = FILE_HEADER.size
+        self.readStrings()
+        iEnd = self.readTail()
+        if iEnd < iPackSize:
+            # Partial record left by an interrupted process
+            self.oPackFile.truncate(iEnd)
+        self.oPackMap = mmap.mmap(self.oPackFile.fileno(), 0, access=mmap.ACCESS_READ)
+        self.bLoaded = True
+
+    def unload(self):
+        for oResource in (self.oPackMap, self.oIndexMap, self.oPackFile):
+            if oResource is not None:
+                oResource.close()
+        self.oPackMap = self.oIndexMap = self.oPackFile = None
+        self.dTail = {}
+        self.dIndexAccesses = {}
+        self.bLoaded = False
+
+    def isStale(self):
+        """Whether the files were rebuilt by another process since they were loaded."""
+        return readGeneration(self.getPath("pack"), PACK_MAGIC) != self.iGeneration
+
+    def readStrings(self):
+        with open(self.getPath("strings"), "r+b") as oFile:
+            oFile.seek(self.iStringsSize)
+            bData = oFile.read()
+            iPosition = 0
+            while iPosition + STRING_HEADER.size <= len(bData):
+                iEnd = iPosition + STRING_HEADER.size + STRING_HEADER.unpack_from(bData, iPosition)[0]
+                if iEnd > len(bData):
+                    break
+                sString = bData[iPosition + STRING_HEADER.size:iEnd].decode("utf-8")
+                self.dStringIds[sString] = len(self.lStrings)
+                self.lStrings.append(sString)
+                iPosition = iEnd
+            self.iStringsSize += iPosition
+            if iPosition < len(bData):
+                oFile.truncate(self.iStringsSize)
+
+    def readTail(self):
+        """Reads the keys of the records appended after the index, and returns the end of the last complete one."""
+        self.dTail = {}
+        self.oPackFile.seek(self.iIndexedSize)
+        bData = self.oPackFile.read()
+        iPosition = 0
+        while iPosition + RECORD_HEADER.size <= len(bData):
+            bKey, iCount = RECORD_HEADER.unpack_from(bData, iPosition)
+            iEnd = iPosition + RECORD_HEADER.size + iCount * RECORD_ENTRY.size
+            if iEnd > len(bData):
+                break
+            self.dTail[bKey] = self.iIndexedSize + iPosition
+            iPosition = iEnd
+        return self.iIndexedSize + iPosition
+
+    def findInIndex(self, bKey):
+        if not self.iIndexCount:
+            return None
+        # Binary search in the bucket of the first two bytes of the key, over the fixed-size entries sorted by key
+        iLow, iHigh = INDEX_BUCKET.unpack_from(self.oIndexMap, INDEX_HEADER.size + (bKey[0] << 10 | bKey[1] << 2))
+        while iLow < iHigh:
+            iMiddle = (iLow + iHigh) // 2
+            iPosition = INDEX_ENTRIES + iMiddle * INDEX_ENTRY.size
+            bMiddleKey = INDEX_ENTRY.unpack_from(self.oIndexMap, iPosition)[0]
+            if bMiddleKey == bKey:
+                return iPosition
+            if bMiddleKey < bKey:
+                iLow = iMiddle + 1
+            else:
+                iHigh = iMiddle
+        return None
+
+    def readRecord(self, iOffset):
+        iStart = iOffset + RECORD_HEADER.size
+        if iStart > len(self.oPackMap):
+            self.remapPack()
+        iEnd = iStart + RECORD_HEADER.unpack_from(self.oPackMap, iOffset)[1] * RECORD_ENTRY.size
+        if iEnd > len(self.oPackMap):
+            self.remapPack()
+        lStrings = self.lStrings
+        return [(iLine, iCol, lStrings[iSeverity], lStrings[iCategory], lStrings[iMessage])
+                for iLine, iCol, iSeverity, iCategory, iMessage
+                in RECORD_ENTRY.iter_unpack(self.oPackMap[iStart:iEnd])]
+
+    def remapPack(self):
+        # The records appended by this process are beyond the mapped size
+        self.oPackMap.close()
+        self.oPackMap = mmap.mmap(self.oPackFile.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def intern(self, sString, lNewStrings):
+        iId = self.dStringIds.get(sString)
+        if iId is None:
+            iId = self.dStringIds[sString] = len(self.lStrings)
+            self.lStrings.append(sString)
+            lNewStrings.append(sString.encode("utf-8"))
+        return iId
+
+    def writeAccessTimes(self):
+        if not self.dIndexAccesses:
+            return
+        with open(self.getPath("index"), "r+b") as oFile:
+            with mmap.mmap(oFile.fileno(), 0) as oIndexMap:
+                for iPosition, iAccessTime in self.dIndexAccesses.items():
+                    GENERATION.pack_into(oIndexMap, iPosition + 40, iAccessTime)
+
+    def rebuild(self, iPackSize):
+        """Rebuilds the index, and compacts the pack if needed, the tail being read and the lock being held."""
+        self.readStrings()
+        self.remapPack()
+        iNow = int(time.time())
+        # Key => [offset, last access time, size] of the live records
+        dRecords = {}
+        for iIndex in range(self.iIndexCount):
+            iPosition = INDEX_ENTRIES + iIndex * INDEX_ENTRY.size
+            bKey, iOffset, iAccessTime = INDEX_ENTRY.unpack_from(self.oIndexMap, iPosition)
+            dRecords[bKey] = [iOffset, self.dIndexAccesses.get(iPosition, iAccessTime), 0]
+        for bKey, iOffset in self.dTail.items():
+            dRecords[bKey] = [iOffset, iNow, 0]
+        for lRecord in dRecords.values():
+            lRecord[2] = RECORD_HEADER.size + RECORD_HEADER.unpack_from(self.oPackMap, lRecord[0])[1] \
+                * RECORD_ENTRY.size
+        iLiveSize = sum(lRecord[2] for lRecord in dRecords.values())
+
+        iGeneration = (self.iGeneration + 1) % (1 << 32)
+        if iPackSize > self.iMaxSize or (iPackSize > COMPACTION_MIN_SIZE and iLiveSize < iPackSize / 2):
+            self.compact(dRecords, iGeneration)
+        else:
+            bIndex = getIndexData(iGeneration, iPackSize, {bKey: lRecord[:2] for bKey, lRecord in dRecords.items()})
+            self.unload()
+            writeFile(self.getPath("index"), bIndex)
+            # The files are written in place to keep their offsets, the other processes reload them
+            for sName in ("pack", "strings"):
+                with open(self.getPath(sName), "r+b") as oFile:
+                    oFile.seek(len(PACK_MAGIC))
+                    oFile.write(GENERATION.pack(iGeneration))
+
+    def compact(self, dRecords, iGeneration):
+        """Writes the live records in a new pack, evicting the least recently used ones above the maximum size, with
+        their strings only."""
+        lKeys = list(dRecords)
+        if FILE_HEADER.size + sum(lRecord[2] for lRecord in dRecords.values()) > self.iMaxSize:
+            lKeys.sort(key=lambda bKey: dRecords[bKey][1], reverse=True)
+            iSize = FILE_HEADER.size
+            for iCount, bKey in enumerate(lKeys):
+                iSize += dRecords[bKey][2]
+                if iSize > self.iMaxSize * EVICTION_RATIO:
+                    del lKeys[iCount:]
+                    break
+
+        lStrings = []
+        dStringIds = {0: 0}
+        dNewRecords = {}
+        sPackFile = getTempFile(self.getPath("pack"))
+        with open(sPackFile, "wb") as oFile:
+            oFile.write(FILE_HEADER.pack(PACK_MAGIC, iGeneration))
+            for bKey in sorted(lKeys):
+                iOffset, iAccessTime, iSize = dRecords[bKey]
+                lEntries = []
+                for iLine, iCol, iSeverity, iCategory, iMessage \
+                        in RECORD_ENTRY.iter_unpack(self.oPackMap[iOffset + RECORD_HEADER.size:iOffset + iSize]):
+                    lIds = []
+                    for iId in (iSeverity, iCategory, iMessage):
+                        if iId not in dStringIds:
+                            dStringIds[iId] = len(lStrings) + 1
+                            lStrings.append(self.lStrings[iId].encode("utf-8"))
+                        lIds.append(dStringIds[iId])
+                    lEntries.append(RECORD_ENTRY.pack(iLine, iCol, *lIds))
+                dNewRecords[bKey] = [oFile.tell(), iAccessTime]
+                oFile.write(RECORD_HEADER.pack(bKey, len(lEntries)) + b"".join(lEntries))
+            iPackSize = oFile.tell()
+
+        self.unload()
+        try:
+            writeFile(self.getPath("strings"), FILE_HEADER.pack(STRINGS_MAGIC, iGeneration)
+                      + b"".join(STRING_HEADER.pack(len(bString)) + bString for bString in lStrings))
+            os.replace(sPackFile, self.getPath("pack"))
+            writeFile(self.getPath("index"), getIndexData(iGeneration, iPackSize, dNewRecords))
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(sPackFile)
+
+    @contextlib.contextmanager
+    def locked(self):
+        """Locks the store against the other processes."""
+        os.makedirs(self.sFolder, exist_ok=True)
+        with open(self.getPath("lock"), "a+b") as oFile:
+            lockFile(oFile)
+            try:
+                yield
+            finally:
+                unlockFile(oFile)
+
+    def getPath(self, sName):
+        return os.path.join(self.sFolder, sName)
+
+
+def readGeneration(sFile, sMagic):
+    try:
+        with open(sFile, "rb") as oFile:
+            sFileMagic, iGeneration = FILE_HEADER.unpack(oFile.read(FILE_HEADER.size))
+    except (OSError, struct.error):
+        return None
+    return iGeneration if sFileMagic == sMagic else None
+
+
+def getIndexData(iGeneration, iIndexedSize, dRecords):
+    """Index of the given records, as a dict key => [offset, last access time]."""
+    lKeys = sorted(dRecords)
+    lFanOut = [0] * 65537
+    for bKey in lKeys:
+        lFanOut[(bKey[0] << 8 | bKey[1]) + 1] += 1
+    for iBucket in range(1, len(lFanOut)):
+        lFanOut[iBucket] += lFanOut[iBucket - 1]
+    return INDEX_HEADER.pack(INDEX_MAGIC, iGeneration, iIndexedSize, len(lKeys)) + INDEX_FANOUT.pack(*lFanOut) \
+        + b"".join(INDEX_ENTRY.pack(bKey, *dRecords[bKey]) for bKey in lKeys)
+
+
+def getTempFile(sFile):
+    return "%s.%d.%d.tmp" % (sFile, os.getpid(), threading.get_ident())
+
+
+def writeFile(sFile, bData):
+    # Written aside then moved, so that the other processes never read a partial file
+    sTempFile = getTempFile(sFile)
+    with open(sTempFile, "wb") as oFile:
+        oFile.write(bData)
+    os.replace(sTempFile, sFile)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+"""Pipeline of a check: the discovery of the files and their analysis, overlapped in an asyncio event loop.
+
+The sources of files (listed files, folders, git repositories) are all queried at once, while the Checkstyle JAR is
+read in advance, so that the JVM finds it in the system cache. With several jobs, the files of each source are
+analyzed as soon as the source is done; with a single job, they are all analyzed by a single run once discovered,
+since a second JVM would cost more than the overlap saves. The errors are filtered as they come, once the lines to
+report are known.
+"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import asyncio
+import concurrent.futures
+import queue
+import threading
+import time
+
+from checkstyleinterface.cache import getFileDigest
+from checkstyleinterface.handoff import TemporaryFolder
+from checkstyleinterface.runner import filterErrors
+
+# Size of the blocks read when warming the Checkstyle JAR up
+WARM_UP_BLOCK_SIZE = 1024 * 1024
+
+
+class CheckPipeline:
+    """One check of a session, run in an event loop in a background thread, and iterated from the calling thread.
+
+    lSources are callables returning files as a dict file => lines to report, or None for all the lines. When the
+    same file comes from several sources, the last one gives its lines. The files of the folders in lFolders, if any,
+    must all be listed by the sources: they are then given to Checkstyle as folders if possible.
+    """
+
+    def __init__(self, oSession, lSources, lFolders=None, oRunStats=None):
+        self.oSession = oSession
+        self.lSources = lSources
+        self.lFolders = lFolders
+        self.oRunStats = oRunStats
+        self.oQueue = queue.Queue()
+        self.oLock = threading.Lock()
+        self.bStopped = False
+        self.lRuns = []
+        self.dDigests = {}
+        self.oLoop = None
+        self.oTask = None
+        self.oExecutor = None
+        self.oDispatchExecutor = None
+        self.oRunExecutor = None
+
+    def __iter__(self):
+        oThread = threading.Thread(target=self.runLoop, daemon=True)
+        oThread.start()
+        try:
+            # The errors reported before the end of the discovery wait for the lines to report
+            dFiles = None
+            lPendingErrors = []
+            while True:
+                sKind, xItem = self.oQueue.get()
+                if sKind == "error":
+                    if dFiles is None:
+                        lPendingErrors.append(xItem)
+                    else:
+                        yield from filterErrors([xItem], dFiles)
+                elif sKind == "files":
+                    dFiles = xItem
+                    yield from filterErrors(lPendingErrors, dFiles)
+                    lPendingErrors = None
+                elif sKind == "exception":
+                    raise xItem
+                else:
+                    break
+        finally:
+            self.stop()
+            oThread.join()
+            self.oRunStats.setDone()
+
+    def stop(self):
+        with self.oLock:
+            self.bStopped = True
+            lRuns = list(self.lRuns)
+        for oRun in lRuns:
+            oRun.terminate()
+        try:
+            if self.oTask is not None:
+                self.oLoop.call_soon_threadsafe(self.oTask.cancel)
+        except RuntimeError:
+            # Loop already closed
+            pass
+
+    def runLoop(self):
+        oLoop = asyncio.new_event_loop()
+        self.oExecutor = concurrent.futures.ThreadPoolExecutor()
+        self.oDispatchExecutor = concurrent.futures.ThreadPoolExecutor(1)
+        self.oRunExecutor = concurrent.futures.ThreadPoolExecutor(self.oSession.iJobs)
+        try:
+            with TemporaryFolder() as oTempFolder:
+                with self.oLock:
+                    if self.bStopped:
+                        return
+                    self.oLoop = oLoop
+                    self.oTask = oLoop.create_task(self.run(oTempFolder))
+                oLoop.run_until_complete(self.oTask)
+        except asyncio.CancelledError:
+            pass
+        except Exception as oExc:
+            self.oQueue.put(("exception", oExc))
+        finally:
+            # When stopped, the runs are terminated, but the threads may still be reading what is left of their output
+            lTasks = asyncio.all_tasks(oLoop)
+            if lTasks:
+                for oTask in lTasks:
+                    oTask.cancel()
+                oLoop.run_until_complete(asyncio.gather(*lTasks, return_exceptions=True))
+            for oExecutor in [self.oRunExecutor, self.oDispatchExecutor, self.oExecutor]:
+                oExecutor.shutdown(wait=True)
+            oLoop.close()
+            self.oQueue.put(("done", None))
+
+    async def run(self, oTempFolder):
+        oLoop = asyncio.get_event_loop()
+        bParallel = self.oSession.iJobs > 1
+        lPreparations = [oLoop.run_in_executor(self.oExecutor, warmUpFile, self.oSession.sCheckstyleJar)]
+        if bParallel:
+            lPreparations.append(oLoop.run_in_executor(self.oExecutor, self.oSession.getCostModel))
+
+        lSourceFiles = [None] * len(self.lSources)
+        setDispatched = set()
+        lDigests = []
+        lDispatches = []
+        fStart = time.perf_counter()
+        for oFuture in asyncio.as_completed([self.discover(i, x) for i, x in enumerate(self.lSources)]):
+            iSource, dSourceFiles = await oFuture
+            lSourceFiles[iSource] = dSourceFiles
+            dNewFiles = {s: l for s, l in dSourceFiles.items() if s not in setDispatched}
+            setDispatched.update(dNewFiles)
+            if self.oSession.oResultCache is not None and dNewFiles:
+                lDigests.append(oLoop.run_in_executor(self.oExecutor, self.computeDigests, list(dNewFiles)))
+            if bParallel and dNewFiles:
+                lDispatches.append(asyncio.ensure_future(self.dispatch(dNewFiles, None, oTempFolder, lDigests)))
+        self.oRunStats.addPhase("files", time.perf_counter() - fStart)
+
+        dFiles = {}
+        for dSourceFiles in lSourceFiles:
+            dFiles.update(dSourceFiles)
+        print("%d files to be analyzed." % len(dFiles))
+        self.oRunStats.setFiles(dFiles)
+        self.oQueue.put(("files", dFiles))
+
+        fStart = time.perf_counter()
+        if not bParallel and dFiles:
+            lDispatches.append(asyncio.ensure_future(self.dispatch(dFiles, self.lFolders, oTempFolder, lDigests)))
+        await asyncio.gather(*lPreparations, *lDispatches)
+        if lDispatches:
+            self.oRunStats.addPhase("checkstyle", time.perf_counter() - fStart)
+            # An interrupted run does not say anything about the analysis time of its files, nor a run whose results
+            # were produced by another invocation
+            self.oSession.recordCosts(self.oRunStats, [(o.oCommand.lPaths, o.fDuration) for o in self.lRuns
+                                                       if o.fDuration is not None])
+
+    async def discover(self, iSource, xSource):
+        return iSource, await asyncio.get_event_loop().run_in_executor(self.oExecutor, xSource)
+
+    async def dispatch(self, dFiles, lFolders, oTempFolder, lDigests):
+        oLoop = asyncio.get_event_loop()
+        # The digests of the files being hashed are needed to look them up in the result cache
+        await asyncio.gather(*lDigests)
+        lRuns, lCachedErrors = await oLoop.run_in_executor(self.oDispatchExecutor, self.oSession.getRuns, dFiles,
+                                                           lFolders, oTempFolder, self.oRunStats, self.dDigests)
+        for oError in lCachedErrors:
+            self.oQueue.put(("error", oError))
+        with self.oLock:
+            if self.bStopped:
+                return
+            self.lRuns += lRuns
+        await asyncio.gather(*[oLoop.run_in_executor(self.oRunExecutor, self.pumpRun, oRun) for oRun in lRuns])
+
+    def pumpRun(self, oRun):
+        for oError in self.oSession.iterRun(oRun):
+            self.oQueue.put(("error", oError))
+
+    def computeDigests(self, lFiles):
+        for sFile in lFiles:
+            try:
+                self.dDigests[sFile] = getFileDigest(sFile)
+            except OSError:
+                # Left to Checkstyle, without caching its result
+                pass
+
+
+def warmUpFile(sFile):
+    """Reads a file, so that it is in the system cache when it is needed."""
+    try:
+        with open(sFile, "rb") as oFile:
+            while oFile.read(WARM_UP_BLOCK_SIZE):
+                pass
+    except OSError:
+        pass
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+"""Execution profiles: the priority, heap and number of the Checkstyle processes, according to the kind of run."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+
+import psutil
+
+# Heap of a Checkstyle process, in MB: a base, and an estimate per analyzed file, within the share of the memory
+BASE_HEAP_MB = 256
+HEAP_PER_FILE_MB = 0.25
+MIN_HEAP_MB = 128
+# Share of the physical memory given by the JVM to its heap when not set, which a single foreground run never lowers
+JVM_DEFAULT_HEAP_SHARE = 0.25
+# Memory below which a process is not worth being started in parallel, in MB
+MIN_WORKER_MEMORY_MB = 512
+MEGABYTE = 1024 * 1024
+
+
+class ExecutionProfile:
+    """Resources given to the Checkstyle processes: their priority, the share of the CPU cores used in parallel when
+    the number of jobs is automatic, and the share of the available memory given to their heaps."""
+
+    def __init__(self, sName, bLowPriority, fCoreShare, fMemoryShare):
+        self.sName = sName
+        self.bLowPriority = bLowPriority
+        self.fCoreShare = fCoreShare
+        self.fMemoryShare = fMemoryShare
+
+    def getJobCount(self):
+        """Number of processes to run in parallel, from the CPU cores and the memory headroom."""
+        iCores = max(1, int((os.cpu_count() or 1) * self.fCoreShare))
+        return max(1, min(iCores, int(self.getMemoryBudget() // MIN_WORKER_MEMORY_MB)))
+
+    def getHeapSize(self, iFileCount, iJobs):
+        """Maximum heap in MB of one of iJobs processes analyzing iFileCount files each: at least the default heap of
+        the JVM, within the share of the memory budget of the process."""
+        fHeap = max(BASE_HEAP_MB + iFileCount * HEAP_PER_FILE_MB, getDefaultHeapSize())
+        return max(MIN_HEAP_MB, int(min(fHeap, self.getMemoryBudget() / max(1, iJobs))))
+
+    def getJvmArgs(self, lBaseArgs, iFileCount, iJobs):
+        """Adds the heap option to the Java command line of a Checkstyle invocation. A single process in the
+        foreground keeps at least the default heap of the JVM, as a smaller one would only make the large analyses
+        fail, while the parallel and background processes are kept within their share of the memory budget."""
+        iHeapSize = self.getHeapSize(iFileCount, iJobs)
+        if iJobs <= 1 and not self.bLowPriority and iHeapSize <= getDefaultHeapSize():
+            return list(lBaseArgs)
+        return lBaseArgs[:1] + ["-Xmx%dm" % iHeapSize] + lBaseArgs[1:]
+
+    def getMemoryBudget(self):
+        return psutil.virtual_memory().available * self.fMemoryShare / MEGABYTE
+
+
+PROFILES = {
+    # Checks waited for by the developer, leaving a core and most of the memory to the IDE
+    "interactive": ExecutionProfile("interactive", False, 0.75, 0.25),
+    # Checks nobody waits for, like the pre-warming: low CPU and I/O priorities, and few resources
+    "background": ExecutionProfile("background", True, 0.25, 0.1),
+    # Checks on a build agent, with the machine for themselves
+    "ci": ExecutionProfile("ci", False, 1.0, 0.75)
+}
+
+
+def getDefaultHeapSize():
+    """Maximum heap in MB of a JVM without heap option."""
+    return psutil.virtual_memory().total * JVM_DEFAULT_HEAP_SHARE / MEGABYTE
+
+
+def getDefaultProfile():
+    """The profile given by the CHECKINTER_PROFILE environment variable, or the ci one on the build agents (CI
+    environment variable, defined by most of them), or None."""
+    sProfile = os.getenv("CHECKINTER_PROFILE")
+    if sProfile:
+        return sProfile.lower()
+    return "ci" if os.getenv("CI", "").lower() not in ["", "0", "false"] else None
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Machine-readable reports of the Checkstyle errors, written while the errors are reported."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import abc
+import contextlib
+import json
+import os
+import pathlib
+import sys
+
+SARIF_SCHEMA = "https://raw.githubusercontent.com/oasis-tcs/sarif-spec/master/Schemata/sarif-schema-2.1.0.json"
+SARIF_LEVELS = {"error": "error", "warning": "warning", "info": "note"}
+
+
+class Report(abc.ABC):
+    def __init__(self, oFile):
+        self.oFile = oFile
+        self.dCounts = {"error": 0, "warning": 0, "info": 0}
+        self.setFiles = set()
+
+    def start(self):
+        pass
+
+    def write(self, oError):
+        sSeverity = oError.sSeverity.lower()
+        self.dCounts[sSeverity] = self.dCounts.get(sSeverity, 0) + 1
+        self.setFiles.add(oError.sFile)
+        self.writeError(oError)
+        self.oFile.flush()
+
+    @abc.abstractmethod
+    def writeError(self, oError):
+        pass
+
+    def finish(self):
+        self.oFile.flush()
+
+    def getSummary(self):
+        return {"errors": self.dCounts.get("error", 0), "warnings": self.dCounts.get("warning", 0),
+                "infos": self.dCounts.get("info", 0), "files": len(self.setFiles)}
+
+
+class JsonLinesReport(Report):
+    def writeError(self, oError):
+        self.oFile.write(json.dumps({"file": oError.sFile, "line": oError.iLine, "column": oError.iCol,
+                                     "severity": oError.sSeverity.lower(), "category": oError.sCategory,
+                                     "message": oError.sMessage}) + "\n")
+
+    def finish(self):
+        self.oFile.write(json.dumps({"summary": self.getSummary()}) + "\n")
+        super().finish()
+
+
+class SarifReport(Report):
+    def __init__(self, oFile):
+        super().__init__(oFile)
+        self.setRuleIds = set()
+        self.bFirstResult = True
+
+    def start(self):
+        # The results are written first, the rules they refer to are only known at the end
+        self.oFile.write('{"$schema": %s, "version": "2.1.0", "runs": [{"results": [\n' % json.dumps(SARIF_SCHEMA))
+
+    def writeError(self, oError):
+        self.setRuleIds.add(oError.sCategory)
+        dRegion = {"startLine": oError.iLine}
+        if oError.iCol > 0:
+            dRegion["startColumn"] = oError.iCol
+        dResult = {
+            "ruleId": oError.sCategory,
+            "level": SARIF_LEVELS.get(oError.sSeverity.lower(), "none"),
+            "message": {"text": oError.sMessage},
+            "locations": [{"physicalLocation": {"artifactLocation": {"uri": pathlib.Path(oError.sFile).as_uri()},
+                                                "region": dRegion}}]
+        }
+        self.oFile.write(("" if self.bFirstResult else ",\n") + json.dumps(dResult))
+        self.bFirstResult = False
+
+    def finish(self):
+        dTool = {"driver": {"name": "Checkstyle", "informationUri": "https://checkstyle.sourceforge.io/",
+                            "rules": [{"id": sRuleId} for sRuleId in sorted(self.setRuleIds)]}}
+        self.oFile.write('\n], "tool": %s, "properties": {"summary": %s}}]}\n'
+                         % (json.dumps(dTool), json.dumps(self.getSummary())))
+        super().finish()
+
+
+REPORT_FORMATS = {
+    "jsonl": JsonLinesReport,
+    "sarif": SarifReport
+}
+
+
+@contextlib.contextmanager
+def openReport(sFormat, sReportFile):
+    if not sReportFile or sReportFile == "-":
+        yield from writeReport(REPORT_FORMATS[sFormat](sys.stdout))
+    else:
+        sReportFile = os.path.abspath(sReportFile)
+        os.makedirs(os.path.dirname(sReportFile), exist_ok=True)
+        with open(sReportFile, "w", encoding="utf-8") as oFile:
+            yield from writeReport(REPORT_FORMATS[sFormat](oFile))
+
+
+def writeReport(oReport):
+    oReport.start()
+    try:
+        yield oReport
+    finally:
+        # Also after a failure, so that the report is well-formed with the errors reported until then
+        oReport.finish()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+"""Profiler of the Checkstyle rules: the marginal analysis time of each check of a configuration, on a sample of
+files."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import argparse
+import os
+import random
+import subprocess
+import time
+import xml.etree.ElementTree as ET
+
+from checkstyleinterface.configs import getCheckModules, getDerivedConfig
+from checkstyleinterface.handoff import TemporaryFolder, getCommands
+from checkstyleinterface.runner import getCheckstyleArgs
+from checkstyleinterface.session import listFiles
+from checkstyleinterface.util import getCacheDir
+
+DEFAULT_SAMPLE_SIZE = 200
+DEFAULT_REPEAT = 3
+
+
+class RuleProfiler:
+    """Measures the cost of each check of a configuration by timing Checkstyle with derived configurations.
+
+    Each Checkstyle run starts its own JVM. By default, each check is run alone and its cost is the time of this run
+    minus the time of a run without any check (JVM start, parsing of the files, filters). With bLeaveOneOut, its cost
+    is instead the time saved by removing it from the full configuration, which accounts for what the checks share,
+    like the Javadoc parsing. Each time is the best of several runs, after a first run warming the system caches up.
+    """
+
+    def __init__(self, sCheckstyleJar, sConfigFile, sPropFile, lFiles, iRepeat=DEFAULT_REPEAT):
+        self.sCheckstyleJar = sCheckstyleJar
+        self.sConfigFile = os.path.abspath(sConfigFile)
+        self.sPropFile = sPropFile
+        self.lFiles = lFiles
+        self.iRepeat = iRepeat
+        self.sConfigsFolder = os.path.join(getCacheDir(), "configs")
+
+    def profile(self, bLeaveOneOut=False):
+        """Returns the time of the runs without any check and with all of them, and the cost of each check, as a list
+        of (category, seconds) sorted by decreasing cost."""
+        lCategories = getCheckModules(self.sConfigFile)
+        with TemporaryFolder() as oTempFolder:
+            self.measure(self.sConfigFile, oTempFolder, 1)
+            fBaseline = self.measure(getDerivedConfig(self.sConfigFile, [], self.sConfigsFolder, bKeepOnly=True),
+                                     oTempFolder)
+            fFull = self.measure(self.sConfigFile, oTempFolder)
+            lCosts = []
+            for sCategory in lCategories:
+                print("Profiling %s..." % sCategory)
+                if bLeaveOneOut:
+                    fCost = fFull - self.measure(getDerivedConfig(self.sConfigFile, [sCategory], self.sConfigsFolder),
+                                                 oTempFolder)
+                else:
+                    fCost = self.measure(getDerivedConfig(self.sConfigFile, [sCategory], self.sConfigsFolder,
+                                                          bKeepOnly=True), oTempFolder) - fBaseline
+                lCosts.append((sCategory, fCost))
+        return fBaseline, fFull, sorted(lCosts, key=lambda t: t[1], reverse=True)
+
+    def measure(self, sConfigFile, oTempFolder, iRepeat=None):
+        """Returns the shortest time of iRepeat runs of Checkstyle on the files with the configuration."""
+        lCommands = getCommands(getCheckstyleArgs(self.sCheckstyleJar, sConfigFile, self.sPropFile), [self.lFiles],
+                                oTempFolder)
+        fBestTime = None
+        for _ in range(iRepeat or self.iRepeat):
+            fStart = time.perf_counter()
+            for oCommand in lCommands:
+                oProcess = subprocess.run(oCommand.getArgs(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+                if b"CheckstyleException" in oProcess.stderr:
+                    print("WARN: Checkstyle failed with the configuration %s: %s"
+                          % (sConfigFile, oProcess.stderr.decode("utf-8", errors="replace").strip()))
+            fTime = time.perf_counter() - fStart
+            fBestTime = fTime if fBestTime is None else min(fBestTime, fTime)
+        return fBestTime
+
+
+def printReport(fBaseline, fFull, lCosts, iFileCount, iTop=None):
+    fChecksTime = max(fFull - fBaseline, 0.0)
+    print("Without any check: %.2fs (JVM start, parsing, filters)" % fBaseline)
+    print("Full configuration: %.2fs, of which %.2fs in the checks" % (fFull, fChecksTime))
+    print("%8s  %6s  %9s  %s" % ("Cost", "Share", "Per file", "Check"))
+    for sCategory, fCost in lCosts[:iTop]:
+        # The measures are noisy, a cheap check may appear to cost less than nothing
+        fCost = max(fCost, 0.0)
+        print("%7.2fs  %5.1f%%  %7.1fms  %s" % (fCost, 100 * fCost / fChecksTime if fChecksTime else 0.0,
+                                                1000 * fCost / iFileCount, sCategory))
+
+
+def runProfileRulesCommand(lArgv):
+    oParser = argparse.ArgumentParser(prog="checkinter profile-rules",
+                                      description="Measure the analysis time of each check of a Checkstyle "
+                                                  "configuration on a sample of files, and rank them")
+    oParser.add_argument("paths", nargs="+", help="Java files, or folders of Java files (recursively), to sample")
+    oParser.add_argument("-j", "--checkstyle-jar", default=os.getenv("CHECKSTYLE_JAR_LOC"),
+                         help="Location of the checkstyle JAR. Alternatively, you can define the environment variable "
+                              "CHECKSTYLE_JAR_LOC.")
+    oParser.add_argument("-c", "--config-file", required=True, help="Location of the checkstyle configuration file")
+    oParser.add_argument("-p", "--prop-file", help="Location of the checkstyle properties file")
+    oParser.add_argument("--sample", type=int, default=DEFAULT_SAMPLE_SIZE,
+                         help="Number of files randomly sampled among the given ones (default: %(default)s)")
+    oParser.add_argument("--seed", type=int, default=0, help="Seed of the sampling, to compare several profiles on "
+                                                             "the same files (default: %(default)s)")
+    oParser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                         help="Number of runs of each measure, the best one being kept (default: %(default)s)")
+    oParser.add_argument("--leave-one-out", action="store_true",
+                         help="Measure the time saved by removing each check from the full configuration, instead "
+                              "of the time of each check run alone")
+    oParser.add_argument("--top", type=int, default=None, help="Number of checks to display (default: all)")
+
+    oArgs = oParser.parse_args(lArgv)
+    if not oArgs.checkstyle_jar:
+        oParser.error("Please provide the location of the Checkstyle JAR with -j, or define the environment variable "
+                      "CHECKSTYLE_JAR_LOC.")
+    if oArgs.sample < 1 or oArgs.repeat < 1:
+        oParser.error("The sample size and the number of runs must be positive.")
+
+    lFiles = sorted(listFiles([s for s in oArgs.paths if not os.path.isdir(s)],
+                              [s for s in oArgs.paths if os.path.isdir(s)], bRecursive=True))
+    if not lFiles:
+        oParser.error("No Java file found.")
+    if len(lFiles) > oArgs.sample:
+        lFiles = sorted(random.Random(oArgs.seed).sample(lFiles, oArgs.sample))
+    try:
+        oProfiler = RuleProfiler(oArgs.checkstyle_jar, oArgs.config_file, oArgs.prop_file, lFiles, oArgs.repeat)
+        print("Profiling the checks of %s on %d files..." % (oArgs.config_file, len(lFiles)))
+        fBaseline, fFull, lCosts = oProfiler.profile(oArgs.leave_one_out)
+    except (OSError, ET.ParseError) as oExc:
+        print("Unable to read the config file %s: %s" % (oArgs.config_file, oExc))
+        return 1
+    printReport(fBaseline, fFull, lCosts, len(lFiles), oArgs.top)
+    return 0
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Checkstyle processes: running them and reading the errors from their XML reports."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+import subprocess
+import threading
+import time
+import xml.etree.ElementTree as ET
+from html import unescape
+
+from checkstyleinterface.application import CheckstyleError
+from checkstyleinterface.util import lowerPriority
+
+TRANSPORTS = ["pipe", "file"]
+
+
+class CheckstyleStream:
+    """Runs Checkstyle with its XML report written on the standard output, and iterates over the errors as soon as
+    they are reported."""
+
+    def __init__(self, oCommand, bLowPriority=False):
+        self.oCommand = oCommand
+        self.bLowPriority = bLowPriority
+        self.oProcess = None
+        self.bTerminated = False
+        self.bCompleted = False
+        self.oLock = threading.Lock()
+        self.fDuration = None
+
+    def __iter__(self):
+        with self.oLock:
+            if self.bTerminated:
+                return
+            print("Running checkstyle: %s" % self.oCommand.getPrintableArgs())
+            fStart = time.perf_counter()
+            self.oProcess = subprocess.Popen(self.oCommand.getArgs(), stdout=subprocess.PIPE)
+            if self.bLowPriority:
+                lowerPriority(self.oProcess.pid)
+
+        bReportFound = False
+        bCompleted = False
+        try:
+            for oEvent, oNode in iterXmlEvents(self.oProcess.stdout):
+                bReportFound = True
+                if oEvent == "start" and oNode.tag == "file":
+                    sFilePath = oNode.get("name")
+                elif oEvent == "end" and oNode.tag == "error":
+                    yield checkstyleErrorFromXml(sFilePath, oNode)
+            bCompleted = True
+        finally:
+            if bCompleted:
+                # Consumes what follows the report, so that Checkstyle can terminate normally
+                self.oProcess.stdout.read()
+            else:
+                self.terminate()
+            self.oProcess.stdout.close()
+            self.oProcess.wait()
+            self.fDuration = time.perf_counter() - fStart
+
+        if self.oProcess.returncode != 0 and not bReportFound and not self.bTerminated:
+            raise subprocess.CalledProcessError(self.oProcess.returncode, self.oProcess.args)
+        self.bCompleted = not self.bTerminated
+
+    def terminate(self):
+        with self.oLock:
+            self.bTerminated = True
+            if self.oProcess is not None and self.oProcess.poll() is None:
+                self.oProcess.terminate()
+
+
+class CheckstyleFileRun(CheckstyleStream):
+    """Runs Checkstyle with its XML report written in a file, and iterates over the errors once it is done."""
+
+    def __iter__(self):
+        with self.oLock:
+            if self.bTerminated:
+                return
+            print("Running checkstyle: %s" % self.oCommand.getPrintableArgs())
+            fStart = time.perf_counter()
+            self.oProcess = subprocess.Popen(self.oCommand.getArgs())
+            if self.bLowPriority:
+                lowerPriority(self.oProcess.pid)
+        try:
+            self.oProcess.wait()
+        finally:
+            if self.oProcess.returncode is None:
+                self.terminate()
+                self.oProcess.wait()
+            self.fDuration = time.perf_counter() - fStart
+        if self.bTerminated:
+            return
+
+        if not os.path.isfile(self.oCommand.sOutputFile):
+            if self.oProcess.returncode != 0:
+                raise subprocess.CalledProcessError(self.oProcess.returncode, self.oProcess.args)
+        else:
+            yield from checkstyleErrorsFromXml(ET.parse(self.oCommand.sOutputFile).getroot())
+        self.bCompleted = True
+
+
+def getCheckstyleRuns(lCommands, sTransport="pipe", bLowPriority=False):
+    return [CheckstyleStream(o, bLowPriority) if sTransport == "pipe" else CheckstyleFileRun(o, bLowPriority)
+            for o in lCommands]
+
+
+def getCheckstyleArgs(sCheckstyleJar, sConfigFile=None, sPropFile=None):
+    lArgs = ["java", "-jar", sCheckstyleJar, "-f", "xml"]
+    if sConfigFile:
+        sConfigFile = os.path.abspath(sConfigFile)
+        if not os.path.isfile(sConfigFile):
+            print("WARN: The config file %s is not readable, ignored." % sConfigFile)
+        else:
+            lArgs += ["-c", sConfigFile]
+    if sPropFile:
+        sPropFile = os.path.abspath(sPropFile)
+        if not os.path.isfile(sPropFile):
+            print("WARN: The properties file %s is not readable, ignored." % sPropFile)
+        else:
+            lArgs += ["-p", sPropFile]
+    return lArgs
+
+
+def iterXmlEvents(oStream):
+    oParser = ET.XMLPullParser(events=("start", "end"))
+    oRoot = None
+    for bChunk in iter(lambda: oStream.read1(65536), b""):
+        oParser.feed(bChunk)
+        try:
+            for oEvent, oNode in oParser.read_events():
+                if oRoot is None:
+                    oRoot = oNode
+                yield oEvent, oNode
+                if oEvent == "end" and oNode.tag == "file":
+                    # The processed file nodes are dropped, to parse the report in bounded memory
+                    oRoot.clear()
+                elif oEvent == "end" and oNode is oRoot:
+                    # Checkstyle prints its summary after the report, it is not part of the XML document
+                    return
+        except ET.ParseError:
+            if oRoot is None:
+                raise
+            return
+
+
+def filterErrors(oErrors, dFiles):
+    for oError in oErrors:
+        # Folders passed as such to Checkstyle may contain other files than the listed ones
+        if oError.sFile not in dFiles:
+            continue
+        lLines = dFiles[oError.sFile]
+        if lLines is None or oError.iLine in lLines:
+            yield oError
+
+
+def checkstyleErrorsFromXml(oRoot):
+    for oFileNode in oRoot.findall("file"):
+        sFilePath = oFileNode.get("name")
+        for oErrorNode in oFileNode.findall("error"):
+            yield checkstyleErrorFromXml(sFilePath, oErrorNode)
+
+
+def checkstyleErrorFromXml(sFilePath, oErrorNode):
+    oError = CheckstyleError()
+    oError.sFile = os.path.abspath(sFilePath)
+    oError.iLine = int(oErrorNode.get("line"))
+    oError.iCol = int(oErrorNode.get("column")) if "column" in oErrorNode.attrib else 0
+    oError.sSeverity = oErrorNode.get("severity")
+    oError.sCategory = oErrorNode.get("source").split(".")[-1]
+    oError.sMessage = unescape(oErrorNode.get("message"))
+    return oError
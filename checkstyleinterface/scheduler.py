@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Scheduling of the files to analyze between parallel Checkstyle invocations."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import heapq
+import json
+import os
+
+from checkstyleinterface.stats import getFileSize
+
+# Analysis time per byte assumed when there is no history at all
+DEFAULT_SECONDS_PER_BYTE = 1e-6
+# Weight of the last measure in the smoothed per-file cost
+SMOOTHING_FACTOR = 0.5
+
+
+class CostModel:
+    def __init__(self, sHistoryFile=None):
+        self.sHistoryFile = sHistoryFile
+        # File path => [file size, smoothed analysis time in seconds]
+        self.dHistory = {}
+        if sHistoryFile and os.path.isfile(sHistoryFile):
+            try:
+                with open(sHistoryFile, "r", encoding="utf-8") as oFile:
+                    self.dHistory = json.load(oFile)
+            except ValueError:
+                print("WARN: The cost history %s is corrupted, ignored" % sHistoryFile)
+        self.fSecondsPerByte = self.computeSecondsPerByte()
+
+    def computeSecondsPerByte(self):
+        iTotalSize = sum(iSize for iSize, _ in self.dHistory.values())
+        fTotalCost = sum(fCost for _, fCost in self.dHistory.values())
+        return fTotalCost / iTotalSize if iTotalSize > 0 and fTotalCost > 0 else DEFAULT_SECONDS_PER_BYTE
+
+    def getCost(self, sFile, iSize=None):
+        if iSize is None:
+            iSize = getFileSize(sFile)
+        lEntry = self.dHistory.get(sFile)
+        if lEntry is not None and lEntry[0] > 0:
+            # The file may have grown or shrunk since it was measured
+            return lEntry[1] * iSize / lEntry[0]
+        return iSize * self.fSecondsPerByte
+
+    def recordShard(self, lFiles, fDuration):
+        # Checkstyle does not report per-file timings, so the measured duration of a shard is split between its files
+        # proportionally to their predicted cost
+        dSizes = {sFile: getFileSize(sFile) for sFile in lFiles}
+        dPredicted = {sFile: self.getCost(sFile, iSize) for sFile, iSize in dSizes.items()}
+        fTotalPredicted = sum(dPredicted.values())
+        for sFile, fPredicted in dPredicted.items():
+            fMeasured = fDuration * fPredicted / fTotalPredicted if fTotalPredicted > 0 else fDuration / len(lFiles)
+            lEntry = self.dHistory.get(sFile)
+            if lEntry is None:
+                self.dHistory[sFile] = [dSizes[sFile], fMeasured]
+            else:
+                self.dHistory[sFile] = [dSizes[sFile],
+                                        SMOOTHING_FACTOR * fMeasured + (1 - SMOOTHING_FACTOR) * fPredicted]
+
+    def save(self):
+        if not self.sHistoryFile:
+            return
+        os.makedirs(os.path.dirname(self.sHistoryFile), exist_ok=True)
+        sTmpFile = "%s.%d.tmp" % (self.sHistoryFile, os.getpid())
+        with open(sTmpFile, "w", encoding="utf-8") as oFile:
+            json.dump(self.dHistory, oFile, separators=(",", ":"))
+        os.replace(sTmpFile, self.sHistoryFile)
+
+
+def scheduleShards(lFiles, iShardsCount, oCostModel=None):
+    """Splits the files into at most iShardsCount shards of balanced costs.
+
+    Uses the longest processing time first heuristic: the costliest remaining file always goes to the least loaded
+    shard. Shards are returned costliest first, each one with its files in their original order.
+    """
+    iShardsCount = max(1, min(iShardsCount, len(lFiles)))
+    if iShardsCount == 1:
+        return [list(lFiles)] if lFiles else []
+
+    if oCostModel is None:
+        oCostModel = CostModel()
+    dIndexes = {sFile: iIdx for iIdx, sFile in enumerate(lFiles)}
+    lCosts = sorted(((oCostModel.getCost(sFile), sFile) for sFile in lFiles), key=lambda t: (-t[0], dIndexes[t[1]]))
+
+    lHeap = [(0.0, iShardIdx) for iShardIdx in range(iShardsCount)]
+    lShards = [[] for _ in range(iShardsCount)]
+    for fCost, sFile in lCosts:
+        fLoad, iShardIdx = heapq.heappop(lHeap)
+        lShards[iShardIdx].append(sFile)
+        heapq.heappush(lHeap, (fLoad + fCost, iShardIdx))
+
+    dLoads = {iShardIdx: fLoad for fLoad, iShardIdx in lHeap}
+    lOrder = sorted(range(iShardsCount), key=lambda i: -dLoads[i])
+    return [sorted(lShards[i], key=dIndexes.get) for i in lOrder if lShards[i]]
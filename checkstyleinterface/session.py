@@ -0,0 +1,613 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Reusable Checkstyle sessions, to run Checkstyle from other Python tools.
+
+A session holds the Checkstyle JAR and configuration, as well as the state kept between its checks: the result cache
+and the analysis times used to balance the parallel runs. For example::
+
+    oSession = CheckstyleSession("checkstyle.jar", sConfigFile="checkstyle.xml", iJobs=0)
+    for oError in oSession.iterCheck(["src/main/java"]):
+        print("%s:%d: %s" % (oError.sFile, oError.iLine, oError.sMessage))
+    lErrors = oSession.checkGit("/path/to/repository", bLinesOnly=True)
+
+The errors are CheckstyleError objects, yielded as soon as Checkstyle reports them.
+"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import collections
+import concurrent.futures
+import functools
+import math
+import os
+import re
+import subprocess
+
+from checkstyleinterface.admission import ExecutionSlots
+from checkstyleinterface.cache import DEFAULT_SHARED_TIMEOUT, ResultCache, errorFromEntry, errorToEntry, \
+    getConfigDigest, getFileDigest, getResultKey, getSharedCache
+from checkstyleinterface.configs import getDerivedConfig, groupFilesByConfig
+from checkstyleinterface.handoff import HANDOFF_MODES, TemporaryFolder, getCommands, getPassThroughPaths, isInFolder
+from checkstyleinterface.packstore import DEFAULT_MAX_PACK_SIZE
+from checkstyleinterface.pipeline import CheckPipeline
+from checkstyleinterface.profiles import PROFILES
+from checkstyleinterface.runner import TRANSPORTS, getCheckstyleArgs, getCheckstyleRuns
+from checkstyleinterface.scheduler import CostModel, scheduleShards
+from checkstyleinterface.stats import RunStats
+from checkstyleinterface.util import getCacheDir, getRuntimeDir
+
+
+class CheckstyleSession:
+    def __init__(self, sCheckstyleJar, sConfigFile=None, sPropFile=None, sConfigName=None, iJobs=1,
+                 sHandoff="auto", sTransport="pipe", bCache=True, sCacheFolder=None, sSharedCache=None,
+                 fSharedCacheTimeout=DEFAULT_SHARED_TIMEOUT, iCacheMaxSize=DEFAULT_MAX_PACK_SIZE, iMaxProcesses=None,
+                 sProfile=None):
+        """
+        :param sCheckstyleJar: Location of the Checkstyle JAR
+        :param sConfigFile: Checkstyle configuration file
+        :param sPropFile: Checkstyle properties file
+        :param sConfigName: Name of the configuration files to look for in the folders of the checked files, see
+            groupFilesByConfig. The files without such configuration use sConfigFile and sPropFile.
+        :param iJobs: Number of Checkstyle processes run in parallel, 0 for one per CPU core, or according to the
+            profile if any
+        :param sHandoff: How the files are passed to Checkstyle, one of HANDOFF_MODES
+        :param sTransport: How the reports are read, one of TRANSPORTS
+        :param bCache: Whether the results of the unchanged files are reused between the checks
+        :param sCacheFolder: Folder in which the results are also cached, to share them with other sessions
+        :param sSharedCache: HTTP URL or folder of a cache shared with other machines, see SharedCache
+        :param fSharedCacheTimeout: Maximum time in seconds spent on the shared cache by each lookup, and by close
+        :param iCacheMaxSize: Maximum size in bytes of the results cached in the cache folder, see PackStore
+        :param iMaxProcesses: Maximum number of Checkstyle processes running at once on the machine, shared with the
+            other sessions and invocations, see ExecutionSlots, and raised to iJobs if lower. None for no limit other
+            than iJobs.
+        :param sProfile: Execution profile of the Checkstyle processes, one of PROFILES, or None to leave their
+            priority and heap to the system and to Java
+        """
+        if sHandoff not in HANDOFF_MODES:
+            raise ValueError("Unknown handoff mode: %s" % sHandoff)
+        if sTransport not in TRANSPORTS:
+            raise ValueError("Unknown transport: %s" % sTransport)
+        if sProfile is not None and sProfile not in PROFILES:
+            raise ValueError("Unknown execution profile: %s" % sProfile)
+        self.sCheckstyleJar = os.path.abspath(sCheckstyleJar)
+        self.sConfigFile = sConfigFile
+        self.sPropFile = sPropFile
+        self.sConfigName = sConfigName
+        self.oProfile = PROFILES[sProfile] if sProfile is not None else None
+        self.iJobs = iJobs or (self.oProfile.getJobCount() if self.oProfile is not None else os.cpu_count() or 1)
+        self.sHandoff = sHandoff
+        self.sTransport = sTransport
+        self.oSharedCache = getSharedCache(sSharedCache, fSharedCacheTimeout) if sSharedCache else None
+        self.iCacheMaxSize = iCacheMaxSize
+        self.oResultCache = ResultCache(sCacheFolder, self.oSharedCache, iCacheMaxSize) \
+            if bCache or sCacheFolder or sSharedCache else None
+        self.oExecutionSlots = ExecutionSlots(os.path.join(getRuntimeDir(), "slots"), max(iMaxProcesses, self.iJobs)) \
+            if iMaxProcesses else None
+        self.oCostModel = None
+        self.oBaseCache = None
+        self.lSkippedCategories = []
+
+    def skipCategories(self, lCategories):
+        """Removes the checks reporting the given categories from the configurations of the next checks, so that
+        Checkstyle does not run them at all. The derived configurations are cached in the cache folder."""
+        self.lSkippedCategories = sorted(set(lCategories))
+
+    def close(self):
+        """Updates the index of the cache folder, and waits for the results being written in the shared cache, at most
+        for its timeout."""
+        for oCache in (self.oResultCache, self.oBaseCache):
+            if oCache is not None:
+                oCache.close()
+
+    def check(self, lPaths, bRecursive=True):
+        """Checks files and folders, and returns the errors."""
+        return list(self.iterCheck(lPaths, bRecursive))
+
+    def iterCheck(self, lPaths, bRecursive=True, oRunStats=None):
+        """Checks files and folders (their Java files), and iterates over the errors as soon as they are reported."""
+        lFolders = [s for s in lPaths if os.path.isdir(s)]
+        yield from self.iterCheckPaths([s for s in lPaths if s not in lFolders], lFolders, bRecursive,
+                                       oRunStats=oRunStats)
+
+    def checkGit(self, sRepository, sGitMode="commit", bLinesOnly=False):
+        """Checks the changed files of a git repository, and returns the errors."""
+        return list(self.iterCheckGit(sRepository, sGitMode, bLinesOnly))
+
+    def iterCheckGit(self, sRepository, sGitMode="commit", bLinesOnly=False, oRunStats=None):
+        """Checks the changed files of a git repository, and iterates over the errors as soon as they are reported.
+
+        In commit mode, the files changed in the working tree are checked, and in push mode the files changed by the
+        last commit. With bLinesOnly, only the errors on the changed lines are reported.
+        """
+        yield from self.iterCheckPaths(lGitFolders=[sRepository], sGitMode=sGitMode, bLinesOnly=bLinesOnly,
+                                       oRunStats=oRunStats)
+
+    def iterCheckPaths(self, lFiles=(), lFolders=(), bRecursive=False, lGitFolders=(), sGitMode="commit",
+                       bLinesOnly=False, oRunStats=None, sBaseRevision=None):
+        """Checks files, the Java files of folders and the changed Java files of git repositories, all discovered at
+        once, and iterates over the errors as soon as they are reported.
+
+        A file both in a folder and in a git repository is reported as in the git repository. See iterCheckGit for
+        sGitMode and bLinesOnly. If sBaseRevision is not None, only the new errors of the changed files of the git
+        repositories are reported, see getBaseFingerprints.
+        """
+        lSources = getFileSources(lFiles, lFolders, bRecursive, lGitFolders, sGitMode, bLinesOnly)
+        oErrors = self.iterCheckSources(lSources, lFolders if bRecursive else None, oRunStats)
+        if sBaseRevision is None:
+            yield from oErrors
+        else:
+            yield from self.iterNewErrors(oErrors, lGitFolders, sGitMode, sBaseRevision)
+
+    def iterNewErrors(self, oErrors, lGitFolders, sGitMode="commit", sBaseRevision=""):
+        """Iterates over the errors of oErrors which are not in the base versions of the changed files of the git
+        repositories, see getBaseFingerprints."""
+        # The base versions are checked while the current ones are
+        with concurrent.futures.ThreadPoolExecutor(1) as oExecutor:
+            oFuture = oExecutor.submit(self.getBaseFingerprints, lGitFolders, sGitMode, sBaseRevision)
+            try:
+                yield from filterNewErrors(oErrors, oFuture.result)
+            finally:
+                oErrors.close()
+
+    def getBaseFingerprints(self, lGitFolders, sGitMode="commit", sRevision=""):
+        """Returns the fingerprints of the errors of the changed Java files of git repositories in their base version,
+        as a dict file => Counter of fingerprints. The files added since the base version have no entry.
+
+        The base version is the merge-base of HEAD and sRevision, or by default HEAD in commit mode and its parent in
+        push mode. The errors of the base versions are cached by git blob, so that they are only checked once.
+        """
+        dFingerprints = {}
+        for sGitFolder in lGitFolders:
+            sGitFolder = os.path.abspath(sGitFolder)
+            sBaseRevision = getGitBaseRevision(sGitFolder, sGitMode, sRevision)
+            if sBaseRevision is None:
+                continue
+            lFiles = [s for s in getGitChangedFiles([sGitFolder], sGitMode)
+                      if os.path.splitext(s)[1].lower() == ".java" and os.path.isfile(s)]
+            dBlobs = getGitBlobs(sGitFolder, sBaseRevision, lFiles)
+            dContents = getGitBlobContents(sGitFolder, set(dBlobs.values()))
+            for sFile, lErrors in self.getBlobErrors(sGitFolder, dBlobs, dContents).items():
+                lLines = dContents[dBlobs[sFile]].decode("utf-8", errors="replace").splitlines()
+                dFingerprints[sFile] = collections.Counter(getFingerprint(e, lLines) for e in lErrors)
+        return dFingerprints
+
+    def getBlobErrors(self, sGitFolder, dBlobs, dContents):
+        # The blobs are checked at the same relative paths in a temporary folder, as some checks depend on them
+        dErrors = {}
+        oCache = self.getBaseCache()
+        lGroups = groupFilesByConfig({s: None for s in dBlobs}, self.sConfigName, self.sConfigFile, self.sPropFile)
+        with TemporaryFolder() as oTempFolder:
+            for (sConfigFile, sPropFile), dGroupFiles in lGroups:
+                if sConfigFile and self.lSkippedCategories:
+                    sConfigFile = getDerivedConfig(sConfigFile, self.lSkippedCategories,
+                                                   os.path.join(getCacheDir(), "configs"))
+                lBaseArgs = getCheckstyleArgs(self.sCheckstyleJar, sConfigFile, sPropFile)
+                sConfigDigest = getConfigDigest(lBaseArgs)
+                # Temporary file => (file, key)
+                dTempFiles = {}
+                dKeys = {s: getResultKey(sConfigDigest, s, "blob:" + dBlobs[s]) for s in dGroupFiles}
+                dFound = oCache.getMany(list(dKeys.values()))
+                for sFile, sKey in dKeys.items():
+                    lEntries = dFound.get(sKey)
+                    if lEntries is not None:
+                        dErrors[sFile] = [errorFromEntry(sFile, t) for t in lEntries]
+                        continue
+                    sTempFile = os.path.join(oTempFolder.getPath(), "base", os.path.relpath(sFile, sGitFolder))
+                    os.makedirs(os.path.dirname(sTempFile), exist_ok=True)
+                    with open(sTempFile, "wb") as oFile:
+                        oFile.write(dContents[dBlobs[sFile]])
+                    dTempFiles[sTempFile] = (sFile, sKey)
+                if not dTempFiles:
+                    continue
+
+                lCommands = getCommands(self.getRunArgs(lBaseArgs, len(dTempFiles), 1), [list(dTempFiles)],
+                                        oTempFolder, self.sHandoff, self.sTransport == "file")
+                for oRun in self.getCheckstyleRuns(lCommands):
+                    dEntries = {s: [] for s in oRun.oCommand.lPaths}
+                    for oError in self.iterRun(oRun):
+                        if oError.sFile in dEntries:
+                            dEntries[oError.sFile].append(errorToEntry(oError))
+                    for sTempFile, lEntries in dEntries.items():
+                        sFile, sKey = dTempFiles[sTempFile]
+                        oCache.put(sKey, lEntries)
+                        dErrors[sFile] = [errorFromEntry(sFile, t) for t in lEntries]
+        return dErrors
+
+    def getBaseCache(self):
+        # The results of the blobs never change, so they are always kept in the cache folder
+        if self.oResultCache is not None and self.oResultCache.sFolder:
+            return self.oResultCache
+        if self.oBaseCache is None:
+            self.oBaseCache = ResultCache(os.path.join(getCacheDir(), "results"), self.oSharedCache, self.iCacheMaxSize)
+        return self.oBaseCache
+
+    def iterCheckFiles(self, dFiles, lFolders=None, oRunStats=None):
+        """Checks files, given as a dict file => lines to report, or None for all the lines.
+
+        The files of the folders in lFolders, if any, must all be listed in dFiles: they are then given to Checkstyle
+        as folders if possible.
+        """
+        yield from self.iterCheckSources([lambda: dFiles], lFolders, oRunStats)
+
+    def iterCheckSources(self, lSources, lFolders=None, oRunStats=None):
+        """Checks the files of sources discovered concurrently with the analysis, see CheckPipeline."""
+        yield from CheckPipeline(self, lSources, lFolders, oRunStats if oRunStats is not None else RunStats(None))
+
+    def getRuns(self, dFiles, lFolders, oTempFolder, oRunStats, dDigests=None):
+        # One Checkstyle run (or one per shard) per configuration, for the files not found in the cache
+        lRuns = []
+        lCachedErrors = []
+        lGroups = groupFilesByConfig(dFiles, self.sConfigName, self.sConfigFile, self.sPropFile)
+        for (sConfigFile, sPropFile), dGroupFiles in lGroups:
+            dGroupFiles = dict(dGroupFiles)
+            if sConfigFile and self.lSkippedCategories:
+                sConfigFile = getDerivedConfig(sConfigFile, self.lSkippedCategories,
+                                               os.path.join(getCacheDir(), "configs"))
+            lBaseArgs = getCheckstyleArgs(self.sCheckstyleJar, sConfigFile, sPropFile)
+            dKeys = {}
+            bCacheHits = False
+            if self.oResultCache is not None:
+                dKeys = self.getResultKeys(lBaseArgs, dGroupFiles, dDigests)
+                dFound = self.oResultCache.getMany(list(dKeys.values()))
+                for sFile, sKey in list(dKeys.items()):
+                    lEntries = dFound.get(sKey)
+                    if lEntries is not None:
+                        lCachedErrors += [errorFromEntry(sFile, t) for t in lEntries]
+                        del dKeys[sFile]
+                        del dGroupFiles[sFile]
+                        oRunStats.iCacheHits += 1
+                        bCacheHits = True
+                oRunStats.iCacheMisses += len(dGroupFiles)
+            if not dGroupFiles:
+                continue
+
+            # The folders can only be passed as such if all their files are to be analyzed with this configuration
+            lShards = self.getShards(dGroupFiles, lFolders if len(lGroups) == 1 and not bCacheHits else None)
+            lRunArgs = self.getRunArgs(lBaseArgs, math.ceil(len(dGroupFiles) / len(lShards)), len(lShards))
+            lCommands = getCommands(lRunArgs, lShards, oTempFolder, self.sHandoff, self.sTransport == "file")
+            for oCommand, oRun in zip(lCommands, self.getCheckstyleRuns(lCommands)):
+                lRuns.append(CachedRun(oRun, self.oResultCache, getCommandKeys(oCommand, dKeys)) if dKeys else oRun)
+        return lRuns, lCachedErrors
+
+    def getRunArgs(self, lBaseArgs, iFileCount, iRunCount):
+        """Command line of runs of iFileCount files each, with the heap given by the profile. The JVM options do not
+        change the results, so they are not part of the result keys, which are computed from lBaseArgs."""
+        if self.oProfile is None:
+            return lBaseArgs
+        return self.oProfile.getJvmArgs(lBaseArgs, iFileCount, min(self.iJobs, iRunCount))
+
+    def getCheckstyleRuns(self, lCommands):
+        return getCheckstyleRuns(lCommands, self.sTransport, self.oProfile is not None and self.oProfile.bLowPriority)
+
+    def iterRun(self, oRun):
+        """Iterates over the errors of a run, once it is admitted by the execution slots of the machine, if limited.
+
+        While a cached run waits, its results are looked up in the result cache again, in case a concurrent
+        invocation just checked the same files: they are then reused instead of running Checkstyle.
+        """
+        if self.oExecutionSlots is None:
+            yield from oRun
+            return
+        lCachedErrors = None
+
+        def stopWaiting():
+            nonlocal lCachedErrors
+            if oRun.bTerminated:
+                return True
+            if isinstance(oRun, CachedRun):
+                lCachedErrors = oRun.findCachedErrors()
+            return lCachedErrors is not None
+
+        with self.oExecutionSlots.acquire(stopWaiting) as bAcquired:
+            if bAcquired:
+                yield from oRun
+        if lCachedErrors is not None:
+            print("Results of %d files found in the cache, produced by a concurrent run" % len(oRun.dKeys))
+            yield from lCachedErrors
+
+    def getResultKeys(self, lBaseArgs, dFiles, dDigests=None):
+        sConfigDigest = getConfigDigest(lBaseArgs)
+        dKeys = {}
+        for sFile in dFiles:
+            try:
+                sDigest = dDigests.get(sFile) if dDigests else None
+                dKeys[sFile] = getResultKey(sConfigDigest, sFile, sDigest or getFileDigest(sFile))
+            except OSError:
+                # Left to Checkstyle, without caching its result
+                pass
+        return dKeys
+
+    def getShards(self, dFiles, lFolders=None):
+        if self.iJobs > 1:
+            return scheduleShards(list(dFiles.keys()), self.iJobs, self.getCostModel())
+        if self.sHandoff == "auto" and lFolders:
+            return [getPassThroughPaths(lFolders, dFiles)]
+        return [list(dFiles.keys())]
+
+    def getCostModel(self):
+        if self.oCostModel is None:
+            self.oCostModel = CostModel(os.path.join(getCacheDir(), "costs.json"))
+        return self.oCostModel
+
+    def recordCosts(self, oRunStats, lDurations):
+        oCostModel = self.getCostModel() if self.iJobs > 1 else None
+        for lPaths, fDuration in lDurations:
+            # Folders passed as such to Checkstyle do not have a cost of their own
+            if all(os.path.isfile(s) for s in lPaths):
+                oRunStats.addFileCosts(lPaths, fDuration)
+                if oCostModel is not None:
+                    oCostModel.recordShard(lPaths, fDuration)
+        if oCostModel is not None:
+            oCostModel.save()
+
+
+class CachedRun:
+    """Checkstyle run whose errors are stored in the result cache, file by file, once it is completed."""
+
+    def __init__(self, oRun, oResultCache, dKeys):
+        self.oRun = oRun
+        self.oResultCache = oResultCache
+        self.dKeys = dKeys
+
+    def __iter__(self):
+        dEntries = {sFile: [] for sFile in self.dKeys}
+        for oError in self.oRun:
+            if oError.sFile in dEntries:
+                dEntries[oError.sFile].append(errorToEntry(oError))
+            yield oError
+        if self.oRun.bCompleted:
+            for sFile, sKey in self.dKeys.items():
+                self.oResultCache.put(sKey, dEntries[sFile])
+
+    def findCachedErrors(self):
+        """Returns the errors of the files of this run if they are all in the result cache, otherwise None."""
+        if any(s not in self.dKeys and not os.path.isdir(s) for s in self.oRun.oCommand.lPaths):
+            # Files which cannot be cached
+            return None
+        self.oResultCache.refresh()
+        dFound = self.oResultCache.getMany(list(self.dKeys.values()))
+        if len(dFound) < len(set(self.dKeys.values())):
+            return None
+        return [errorFromEntry(sFile, t) for sFile, sKey in self.dKeys.items() for t in dFound[sKey]]
+
+    def terminate(self):
+        self.oRun.terminate()
+
+    def __getattr__(self, sName):
+        return getattr(self.oRun, sName)
+
+
+def filterNewErrors(oErrors, xGetBaseFingerprints):
+    """Filters out the errors whose fingerprint is in the base version of their file, as many times as it is there."""
+    dFingerprints = None
+    dLines = {}
+    for oError in oErrors:
+        if dFingerprints is None:
+            dFingerprints = xGetBaseFingerprints()
+        oBaseFingerprints = dFingerprints.get(oError.sFile)
+        if oBaseFingerprints is not None:
+            if oError.sFile not in dLines:
+                dLines[oError.sFile] = readLines(oError.sFile)
+            sFingerprint = getFingerprint(oError, dLines[oError.sFile])
+            if oBaseFingerprints[sFingerprint] > 0:
+                oBaseFingerprints[sFingerprint] -= 1
+                continue
+        yield oError
+
+
+def getFingerprint(oError, lLines):
+    # The line numbers change with the edits above the errors, but rarely the lines themselves
+    sLine = lLines[oError.iLine - 1].strip() if 0 < oError.iLine <= len(lLines) else ""
+    return oError.sCategory, oError.sMessage, sLine
+
+
+def readLines(sFile):
+    try:
+        with open(sFile, "r", encoding="utf-8", errors="replace") as oFile:
+            return oFile.read().splitlines()
+    except OSError:
+        return []
+
+
+def getCommandKeys(oCommand, dKeys):
+    # The paths of a command may be folders passed as such, containing several of the files
+    setPaths = set(oCommand.lPaths)
+    lFolders = [s for s in oCommand.lPaths if s not in dKeys]
+    return {sFile: sKey for sFile, sKey in dKeys.items()
+            if sFile in setPaths or any(isInFolder(sFile, s) for s in lFolders)}
+
+
+def isJavaFile(sFilePath):
+    if os.path.splitext(sFilePath)[1].lower() == ".java":
+        if os.path.isfile(sFilePath):
+            return True
+        print("WARN: The file %s is not readable, ignored" % sFilePath)
+        return False
+
+
+def getFileSources(lFiles=(), lFolders=(), bRecursive=False, lGitFolders=(), sGitMode="commit", bLinesOnly=False):
+    """Returns the sources of the files to check, to be called concurrently, see CheckPipeline."""
+    lSources = [functools.partial(listFiles, lFiles, [])] if lFiles else []
+    lSources += [functools.partial(listFiles, [], [sFolder], bRecursive) for sFolder in lFolders]
+    lSources += [functools.partial(getGitFiles, [sGitFolder], sGitMode, bLinesOnly) for sGitFolder in lGitFolders]
+    return lSources
+
+
+def listFiles(lFiles, lFolders, bRecursive=False):
+    """Returns the given files and the Java files of the given folders, as a dict file => None (all lines)."""
+    dFiles = {}
+
+    for sFilePath in lFiles:
+        sFilePath = os.path.abspath(sFilePath)
+        if not os.path.isfile(sFilePath):
+            print("WARN: The file %s is not readable, ignored" % sFilePath)
+            continue
+        dFiles[sFilePath] = None
+
+    for sFolder in lFolders:
+        sFolder = os.path.abspath(sFolder)
+        if not os.path.isdir(sFolder):
+            print("WARN: The folder %s is not readable, ignored" % sFolder)
+            continue
+        for sDirPath, lDirNames, lFileNames in os.walk(sFolder):
+            for sFileName in lFileNames:
+                sFilePath = os.path.join(sDirPath, sFileName)
+                if isJavaFile(sFilePath):
+                    dFiles[sFilePath] = None
+            if not bRecursive:
+                lDirNames.clear()
+
+    return dFiles
+
+
+def getGitFiles(lGitFolders, sGitMode="commit", bLinesOnly=False):
+    """Returns the changed Java files of git repositories, as a dict file => changed lines, or None (all lines)."""
+    dFiles = {}
+    if bLinesOnly:
+        for sFilePath, lLines in getGitChangedLines(lGitFolders, sGitMode).items():
+            if isJavaFile(sFilePath):
+                dFiles[sFilePath] = lLines
+    else:
+        for sFilePath in getGitChangedFiles(lGitFolders, sGitMode):
+            if isJavaFile(sFilePath):
+                dFiles[sFilePath] = None
+    return dFiles
+
+
+def getGitChangedFiles(lGitFolders, sGitMode="commit"):
+    lFiles = []
+    for sFolder in lGitFolders:
+        sFolder = os.path.abspath(sFolder)
+        try:
+            if sGitMode == "push":
+                sOutput = subprocess.run(["git", "--no-pager", "show", "HEAD", "--pretty=", "--name-only"], check=True,
+                                         capture_output=True, encoding="utf-8", cwd=sFolder).stdout
+            else:
+                sOutput = subprocess.run(["git", "--no-pager", "diff", "HEAD", "--name-only"], check=True,
+                                         capture_output=True, encoding="utf-8", cwd=sFolder).stdout
+        except subprocess.CalledProcessError:
+            print("WARN: Unable to run git in the folder %s, ignored" % sFolder)
+            continue
+        for sRelativeFilePath in sOutput.splitlines():
+            sFilePath = os.path.abspath(os.path.join(sFolder, sRelativeFilePath))
+            lFiles.append(sFilePath)
+    return lFiles
+
+
+def getGitChangedFilesBetween(sGitFolder, sFromRevision, sToRevision="HEAD"):
+    sGitFolder = os.path.abspath(sGitFolder)
+    try:
+        sOutput = subprocess.run(["git", "--no-pager", "diff", "--name-only", "--no-renames", "--diff-filter=d",
+                                  sFromRevision, sToRevision], check=True, capture_output=True, encoding="utf-8",
+                                 cwd=sGitFolder).stdout
+    except subprocess.CalledProcessError:
+        print("WARN: Unable to get the changes between %s and %s in the folder %s, ignored"
+              % (sFromRevision, sToRevision, sGitFolder))
+        return []
+    return [os.path.abspath(os.path.join(sGitFolder, s)) for s in sOutput.splitlines()]
+
+
+def getGitBaseRevision(sGitFolder, sGitMode="commit", sRevision=""):
+    """Returns the commit with which the changes are compared, see CheckstyleSession.getBaseFingerprints."""
+    try:
+        if sRevision:
+            return subprocess.run(["git", "merge-base", "HEAD", sRevision], check=True, capture_output=True,
+                                  encoding="utf-8", cwd=sGitFolder).stdout.strip()
+        return subprocess.run(["git", "rev-parse", "--verify", "-q", "HEAD^" if sGitMode == "push" else "HEAD"],
+                              check=True, capture_output=True, encoding="utf-8", cwd=sGitFolder).stdout.strip()
+    except subprocess.CalledProcessError:
+        print("WARN: No base revision found in the folder %s, all the errors are reported" % sGitFolder)
+        return None
+
+
+def getGitBlobs(sGitFolder, sRevision, lFiles):
+    """Returns the ids of the blobs of files in a revision, as a dict file => blob id, for the files existing there."""
+    if not lFiles:
+        return {}
+    dFiles = {os.path.relpath(s, sGitFolder).replace(os.sep, "/"): s for s in lFiles}
+    sOutput = subprocess.run(["git", "ls-tree", "-r", "-z", sRevision, "--"] + list(dFiles), check=True,
+                             capture_output=True, encoding="utf-8", cwd=sGitFolder).stdout
+    dBlobs = {}
+    for sEntry in sOutput.split("\0"):
+        if sEntry:
+            sInfo, sPath = sEntry.split("\t", 1)
+            lInfo = sInfo.split()
+            if lInfo[1] == "blob" and sPath in dFiles:
+                dBlobs[dFiles[sPath]] = lInfo[2]
+    return dBlobs
+
+
+def getGitBlobContents(sGitFolder, lBlobIds):
+    """Returns the contents of blobs, as a dict blob id => bytes, read by a single git process."""
+    lBlobIds = list(lBlobIds)
+    if not lBlobIds:
+        return {}
+    bOutput = subprocess.run(["git", "cat-file", "--batch"], input="".join(s + "\n" for s in lBlobIds).encode("ascii"),
+                             check=True, capture_output=True, cwd=sGitFolder).stdout
+    dContents = {}
+    iPos = 0
+    for sBlobId in lBlobIds:
+        iHeaderEnd = bOutput.index(b"\n", iPos)
+        iSize = int(bOutput[iPos:iHeaderEnd].split()[2])
+        dContents[sBlobId] = bOutput[iHeaderEnd + 1:iHeaderEnd + 1 + iSize]
+        # Each content is followed by a line feed
+        iPos = iHeaderEnd + 1 + iSize + 1
+    return dContents
+
+
+def getGitChangedLines(lGitFolders, sGitMode="commit"):
+    oFileRegex = re.compile(r"\+{3} b/(.*)")
+    oDevNullRegex = re.compile(r"\+{3} /dev/null")
+    oLinesRegex = re.compile(r"@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+    dChangedLines = {}
+
+    for sFolder in lGitFolders:
+        sFolder = os.path.abspath(sFolder)
+        lArgs = ["git", "--no-pager", "show", "HEAD", "--pretty=", "--unified=0"] if sGitMode == "push" \
+            else ["git", "--no-pager", "diff", "HEAD", "--unified=0"]
+        try:
+            sOutput = subprocess.run(lArgs, check=True, capture_output=True, encoding="utf-8", cwd=sFolder).stdout
+        except subprocess.CalledProcessError:
+            print("WARN: Unable to run git in the folder %s, ignored" % sFolder)
+            continue
+
+        sCurrentFile = None
+        for sLine in sOutput.splitlines():
+            oMatch = oFileRegex.match(sLine)
+            if oMatch is not None:
+                sCurrentFile = os.path.abspath(os.path.join(sFolder, oMatch.group(1).strip()))
+            elif oDevNullRegex.match(sLine) is not None:
+                sCurrentFile = None
+            elif sCurrentFile is not None:
+                oMatch = oLinesRegex.match(sLine)
+                if oMatch is not None:
+                    iStartLine = int(oMatch.group(1))
+                    iLinesCount = int(oMatch.group(2)) if oMatch.group(2) else 1
+                    if iLinesCount > 0:
+                        dChangedLines.setdefault(sCurrentFile, []).extend(
+                            list(range(iStartLine, iStartLine + iLinesCount)))
+
+    return dChangedLines
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Run statistics: recording in a JSON lines file and reporting."""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import re
+import time
+
+# Number of costliest files kept in each record, to keep the records compact
+RECORD_TOP_FILES = 10
+
+
+class RunStats:
+    def __init__(self, sMode):
+        self.fStartTime = time.time()
+        self.fStartCounter = time.perf_counter()
+        self.sMode = sMode
+        self.iFileCount = 0
+        self.iChangedLineCount = 0
+        self.fDuration = None
+        self.dPhases = {}
+        self.iCacheHits = 0
+        self.iCacheMisses = 0
+        self.dFileCosts = {}
+        self.iDeferredFileCount = 0
+        self.iExitCode = None
+
+    @contextlib.contextmanager
+    def phase(self, sName):
+        fStart = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.addPhase(sName, time.perf_counter() - fStart)
+
+    def addPhase(self, sName, fDuration):
+        self.dPhases[sName] = self.dPhases.get(sName, 0.0) + fDuration
+
+    def setFiles(self, dFiles):
+        self.iFileCount = len(dFiles)
+        self.iChangedLineCount = sum(len(lLines) for lLines in dFiles.values() if lLines is not None)
+
+    def addFileCosts(self, lFiles, fDuration):
+        # Checkstyle does not report per-file timings, so the duration of an invocation is split
+        # between its files proportionally to their size
+        dSizes = {sFile: getFileSize(sFile) for sFile in lFiles}
+        iTotalSize = sum(dSizes.values())
+        for sFile, iSize in dSizes.items():
+            fCost = fDuration * iSize / iTotalSize if iTotalSize else fDuration / len(dSizes)
+            self.dFileCosts[sFile] = self.dFileCosts.get(sFile, 0.0) + fCost
+
+    def setDone(self):
+        self.fDuration = time.perf_counter() - self.fStartCounter
+
+    def getCacheHitRate(self):
+        iLookups = self.iCacheHits + self.iCacheMisses
+        return self.iCacheHits / iLookups if iLookups else None
+
+    def toRecord(self):
+        lTopFiles = sorted(self.dFileCosts.items(), key=lambda t: t[1], reverse=True)[:RECORD_TOP_FILES]
+        return {
+            "timestamp": round(self.fStartTime, 3),
+            "mode": self.sMode,
+            "files": self.iFileCount,
+            "changed_lines": self.iChangedLineCount,
+            "duration": round(self.fDuration, 4) if self.fDuration is not None else None,
+            "phases": {sName: round(fDuration, 4) for sName, fDuration in self.dPhases.items()},
+            "cache_hit_rate": self.getCacheHitRate(),
+            "slowest_files": [[sFile, round(fCost, 4)] for sFile, fCost in lTopFiles],
+            "deferred_files": self.iDeferredFileCount,
+            "exit_code": self.iExitCode
+        }
+
+
+def getFileSize(sFile):
+    try:
+        return os.path.getsize(sFile)
+    except OSError:
+        return 0
+
+
+def appendRecord(sStatsFile, oRunStats):
+    sStatsFile = os.path.abspath(sStatsFile)
+    os.makedirs(os.path.dirname(sStatsFile), exist_ok=True)
+    # A single write in append mode, so that concurrent runs do not interleave their records
+    with open(sStatsFile, "a", encoding="utf-8") as oFile:
+        oFile.write(json.dumps(oRunStats.toRecord(), separators=(",", ":")) + "\n")
+
+
+def readRecords(sStatsFile, fSince=None):
+    lRecords = []
+    if not os.path.isfile(sStatsFile):
+        return lRecords
+    with open(sStatsFile, "r", encoding="utf-8") as oFile:
+        for sLine in oFile:
+            try:
+                dRecord = json.loads(sLine)
+            except ValueError:
+                continue
+            if fSince is None or dRecord.get("timestamp", 0) >= fSince:
+                lRecords.append(dRecord)
+    return lRecords
+
+
+def percentile(lValues, fPercent):
+    if not lValues:
+        return None
+    lValues = sorted(lValues)
+    iRank = max(1, int(math.ceil(fPercent / 100 * len(lValues))))
+    return lValues[iRank - 1]
+
+
+def parseDuration(sDuration):
+    oMatch = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw]?)", sDuration.strip().lower())
+    if oMatch is None:
+        raise argparse.ArgumentTypeError("invalid duration: %s (expected e.g. 30m, 12h or 7d)" % sDuration)
+    return float(oMatch.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[oMatch.group(2)]
+
+
+def formatSeconds(fSeconds):
+    return "-" if fSeconds is None else "%.2fs" % fSeconds
+
+
+def printReport(lRecords, iTopFiles):
+    lRecords = [d for d in lRecords if d.get("duration") is not None]
+    if not lRecords:
+        print("No run recorded in this time window.")
+        return
+
+    print("%d runs between %s and %s" % (len(lRecords), formatTimestamp(min(d["timestamp"] for d in lRecords)),
+                                         formatTimestamp(max(d["timestamp"] for d in lRecords))))
+    printLatencies("Latency", [d["duration"] for d in lRecords])
+
+    dByMode = {}
+    for dRecord in lRecords:
+        dByMode.setdefault(dRecord.get("mode") or "unknown", []).append(dRecord["duration"])
+    for sMode, lDurations in sorted(dByMode.items()):
+        printLatencies("  %s (%d runs)" % (sMode, len(lDurations)), lDurations)
+
+    dPhases = {}
+    for dRecord in lRecords:
+        for sName, fDuration in dRecord.get("phases", {}).items():
+            dPhases.setdefault(sName, []).append(fDuration)
+    if dPhases:
+        print("Phases:")
+        for sName, lDurations in dPhases.items():
+            printLatencies("  %s" % sName, lDurations)
+
+    lHitRates = [d["cache_hit_rate"] for d in lRecords if d.get("cache_hit_rate") is not None]
+    if lHitRates:
+        print("Cache hit rate: %.1f%% on average" % (100 * sum(lHitRates) / len(lHitRates)))
+
+    lDeferredCounts = [d["deferred_files"] for d in lRecords if d.get("deferred_files")]
+    if lDeferredCounts:
+        print("Runs over their time budget: %d (%d files deferred to a background run)"
+              % (len(lDeferredCounts), sum(lDeferredCounts)))
+
+    iFailures = len([d for d in lRecords if d.get("exit_code")])
+    print("Non-zero exit codes: %d (%.1f%%)" % (iFailures, 100 * iFailures / len(lRecords)))
+
+    dFileCosts = {}
+    for dRecord in lRecords:
+        for sFile, fCost in dRecord.get("slowest_files", []):
+            dFileCosts[sFile] = max(dFileCosts.get(sFile, 0.0), fCost)
+    if dFileCosts and iTopFiles > 0:
+        print("Slowest files (estimated analysis time):")
+        for sFile, fCost in sorted(dFileCosts.items(), key=lambda t: t[1], reverse=True)[:iTopFiles]:
+            print("  %8s  %s" % (formatSeconds(fCost), sFile))
+
+
+def printLatencies(sTitle, lDurations):
+    print("%s: p50 %s, p95 %s, max %s" % (sTitle, formatSeconds(percentile(lDurations, 50)),
+                                          formatSeconds(percentile(lDurations, 95)), formatSeconds(max(lDurations))))
+
+
+def formatTimestamp(fTimestamp):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(fTimestamp))
+
+
+def runStatsCommand(lArgv):
+    oParser = argparse.ArgumentParser(prog="checkinter stats", description="Report on recorded Checkstyle runs")
+    oParser.add_argument("-s", "--stats-file", default=os.getenv("CHECKINTER_STATS_FILE"),
+                         help="Location of the statistics file. Alternatively, you can define the environment "
+                              "variable CHECKINTER_STATS_FILE.")
+    oParser.add_argument("--since", type=parseDuration, default=None,
+                         help="Only consider the runs of this time window, e.g. 12h or 7d (default: all runs)")
+    oParser.add_argument("--mode", choices=["batch", "ui", "hook", "deferred"],
+                         help="Only consider the runs of this mode")
+    oParser.add_argument("--top", type=int, default=10, help="Number of slowest files to display (default: 10)")
+
+    oArgs = oParser.parse_args(lArgv)
+    if not oArgs.stats_file:
+        oParser.error("Please provide the location of the statistics file with -s, or define the environment "
+                      "variable CHECKINTER_STATS_FILE.")
+
+    lRecords = readRecords(oArgs.stats_file, time.time() - oArgs.since if oArgs.since is not None else None)
+    if oArgs.mode:
+        lRecords = [d for d in lRecords if d.get("mode") == oArgs.mode]
+    printReport(lRecords, oArgs.top)
+    return 0
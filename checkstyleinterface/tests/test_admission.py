@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_admission.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+
+import os
+import subprocess
+import threading
+import time
+
+from checkstyleinterface import runner
+from checkstyleinterface.admission import ExecutionSlots
+from checkstyleinterface.session import CheckstyleSession
+from checkstyleinterface.tests.util import getErrorKeys, useStubCheckstyle, writeJavaFiles
+
+
+class TestAdmission:
+    def test_slotsLimitProcesses(self, tmp_path):
+        oSlots = ExecutionSlots(str(tmp_path), 2)
+        oAcquired = threading.Event()
+
+        def acquireThird():
+            with oSlots.acquire() as bAcquired:
+                assert bAcquired
+                oAcquired.set()
+
+        with oSlots.acquire() as bFirstAcquired, oSlots.acquire() as bSecondAcquired:
+            assert bFirstAcquired and bSecondAcquired
+            oThread = threading.Thread(target=acquireThird)
+            oThread.start()
+            assert not oAcquired.wait(0.5)
+        assert oAcquired.wait(5)
+        oThread.join()
+
+    def test_stopWaiting(self, tmp_path):
+        oSlots = ExecutionSlots(str(tmp_path), 1)
+        with oSlots.acquire():
+            with oSlots.acquire(lambda: True) as bAcquired:
+                assert not bAcquired
+        with oSlots.acquire(lambda: True) as bAcquired:
+            assert bAcquired
+
+    def test_reuseConcurrentResults(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        monkeypatch.setenv("CHECKSTYLE_STUB_RATE", "5")
+        sJavaFolder = os.path.join(sFolder, "java")
+        writeJavaFiles(sJavaFolder, 5, {0: "// violation(error, MagicNumber) '0'."})
+        sCacheFolder = os.path.join(sFolder, "results")
+
+        lJvms = []
+        xPopen = subprocess.Popen
+
+        def countJvms(lArgs, *args, **kwargs):
+            if lArgs[0] == "java":
+                lJvms.append(lArgs)
+            return xPopen(lArgs, *args, **kwargs)
+
+        monkeypatch.setattr(runner.subprocess, "Popen", countJvms)
+        dErrors = {}
+
+        def check(sName):
+            oSession = CheckstyleSession(sJarFile, sCacheFolder=sCacheFolder, iMaxProcesses=1)
+            dErrors[sName] = oSession.check([sJavaFolder])
+            oSession.close()
+
+        # A second invocation waits for the first one, and reuses its results instead of running Checkstyle again
+        oThread = threading.Thread(target=check, args=("first",))
+        oThread.start()
+        fDeadline = time.monotonic() + 10
+        while not lJvms and time.monotonic() < fDeadline:
+            time.sleep(0.05)
+        check("second")
+        oThread.join()
+        assert len(lJvms) == 1
+        assert getErrorKeys(dErrors["second"]) == getErrorKeys(dErrors["first"])
+        assert len(dErrors["first"]) == 1
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_application.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import tkinter as tk
+
+import pytest
+
+from checkstyleinterface.application import AUTO_ROLLUP_THRESHOLD, GROUPINGS, Application, getItemValuesFromFile, \
+    getItemValuesFromGroup, getMessageTemplate, getSortKeysFromError, getTagFromErrors
+from checkstyleinterface.tests.util import makeError
+from checkstyleinterface.util import MultiColumnListbox
+
+
+@pytest.fixture
+def tkRoot():
+    try:
+        oTkRoot = tk.Tk()
+    except tk.TclError:
+        pytest.skip("No display available")
+    oTkRoot.withdraw()
+    yield oTkRoot
+    oTkRoot.destroy()
+
+
+class TestApplication:
+    def test_getItemValuesFromFile(self):
+        lErrors = [makeError("/src/A.java", 1, "error", "LineLengthCheck", "Too long."),
+                   makeError("/src/A.java", 2, "error", "LineLengthCheck", "Too long."),
+                   makeError("/src/A.java", 3, "warning", "MagicNumberCheck", "Magic."),
+                   makeError("/src/A.java", 4, "info", "JavadocMethodCheck", "Missing.")]
+        lErrors[3].bIgnored = True
+        assert getItemValuesFromFile("/src/A.java", lErrors) \
+            == ("2 errors, 1 warning, 1 ignored", "", "/src/A.java", "4 violations")
+
+    def test_getMessageTemplate(self):
+        assert getMessageTemplate("'42' is a magic number.") == "'...' is a magic number."
+        assert getMessageTemplate("Line is longer than 100 characters (found 123).") \
+            == "Line is longer than N characters (found N)."
+        assert getMessageTemplate("Missing a Javadoc comment.") == "Missing a Javadoc comment."
+
+    def test_getItemValuesFromGroup(self):
+        lErrors = [makeError("/src/A.java", 1, "warning", "MagicNumberCheck", "'1' is a magic number."),
+                   makeError("/src/A.java", 2, "warning", "MagicNumberCheck", "'2' is a magic number."),
+                   makeError("/src/B.java", 1, "warning", "MagicNumberCheck", "'3' is a magic number.")]
+        xGroupKey = GROUPINGS["Message"]
+        assert len(set(map(xGroupKey, lErrors))) == 1
+        assert getItemValuesFromGroup(xGroupKey(lErrors[0]), lErrors) \
+            == ("3 warnings", "MagicNumberCheck", "2 files", "'...' is a magic number.")
+        xGroupKey = GROUPINGS["File and category"]
+        assert getItemValuesFromGroup(xGroupKey(lErrors[2]), lErrors[2:]) \
+            == ("1 warning", "MagicNumberCheck", "/src/B.java", "1 violation")
+
+    def test_rollupLargeResults(self, tkRoot):
+        lErrors = [makeError("/src/Class%d.java" % (i % 50), i + 1, "warning", "MagicNumberCheck",
+                             "'%d' is a magic number." % i) for i in range(AUTO_ROLLUP_THRESHOLD)]
+        lErrors.append(makeError("/src/Main.java", 1, "error", "LineLengthCheck", "Line is too long."))
+        oApp = Application(tkRoot, lambda lIgnoredCategories=(): lErrors)
+        oTreeView = oApp.oListView.oTreeView
+
+        # One row per message, the errors of a group being inserted when it is expanded
+        assert oApp.oGroupByBox.oStringVar.get() == "Message"
+        assert len(oTreeView.get_children()) == 2
+        assert not oApp.dCheckstyleErrors
+        sGroupId = next(s for s, (tKey, _) in oApp.dGroupItems.items() if tKey[0] == "MagicNumberCheck")
+        oApp.expandGroupItem(sGroupId)
+        assert len(oTreeView.get_children(sGroupId)) == AUTO_ROLLUP_THRESHOLD
+
+        # Ignoring the group ignores all its errors
+        oTreeView.selection_set(sGroupId)
+        oApp.onIgnoreButtonClicked()
+        assert all(e.bIgnored for e in lErrors[:-1])
+        assert not lErrors[-1].bIgnored
+        assert len(oTreeView.get_children()) == 1
+
+    def test_getTagFromErrors(self):
+        lErrors = [makeError("/src/A.java", 1, "warning", "MagicNumberCheck", "Magic."),
+                   makeError("/src/A.java", 2, "error", "LineLengthCheck", "Too long.")]
+        assert getTagFromErrors(lErrors) == "error"
+        lErrors[1].bIgnored = True
+        assert getTagFromErrors(lErrors) == "warning"
+        lErrors[0].bIgnored = True
+        assert getTagFromErrors(lErrors) == "error.ignored"
+
+    def test_getSortKeysFromError(self):
+        lErrors = [makeError("/src/A.java", 10, "info", "JavadocMethodCheck", "Missing."),
+                   makeError("/src/A.java", 9, "warning", "MagicNumberCheck", "Magic."),
+                   makeError("/src/A.java", 9, "error", "LineLengthCheck", "Too long.")]
+        lErrors[2].bIgnored = True
+        lSorted = sorted(lErrors, key=lambda e: getSortKeysFromError(e)[2])
+        assert [e.iLine for e in lSorted] == [9, 9, 10]
+        lSorted = sorted(lErrors, key=lambda e: getSortKeysFromError(e)[0])
+        assert [e.sSeverity for e in lSorted] == ["error", "warning", "info"]
+
+    def test_sortByColumn(self, tkRoot):
+        oListView = MultiColumnListbox(tkRoot, ["Name", "Line"])
+        lRows = [("b", "10"), ("a", "9"), ("b", "9"), ("a", "10")]
+        lItemIds = oListView.setData(lRows, [(s, int(sLine)) for s, sLine in lRows])
+
+        def getRows():
+            return [lRows[lItemIds.index(s)] for s in oListView.oTreeView.get_children()]
+
+        oListView.sortByColumn("Line", False)
+        assert getRows() == [("a", "9"), ("b", "9"), ("b", "10"), ("a", "10")]
+        # Stable: the rows with the same name stay ordered by line
+        oListView.sortByColumn("Name", True)
+        assert getRows() == [("b", "9"), ("b", "10"), ("a", "9"), ("a", "10")]
+        # The sort order is applied to new data
+        lRows = list(reversed(lRows))
+        lItemIds = oListView.setData(lRows, [(s, int(sLine)) for s, sLine in lRows])
+        assert getRows() == [("b", "9"), ("b", "10"), ("a", "9"), ("a", "10")]
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_benchmark.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+
+from checkstyleinterface import main
+from checkstyleinterface.benchmark import __main__ as benchmark
+from checkstyleinterface.benchmark.synthetic import generateRepository
+from checkstyleinterface.tests.util import useStubCheckstyle
+
+
+class TestBenchmark:
+    def test_stubCheckstyle(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        lFiles = generateRepository(os.path.join(sFolder, "repo"), 20, fViolationDensity=0.1, bGit=False)
+
+        iExpected = 0
+        for sFile in lFiles:
+            with open(sFile) as oFile:
+                iExpected += len([s for s in oFile if "// violation(" in s])
+
+        oArgs = main.parseArgs(["-d", os.path.join(sFolder, "repo", "java"), "-r", "-j", sJarFile,
+                                "-c", os.path.join(sFolder, "repo", "checkstyle.xml")])
+        lErrors = main.runCheckstyle(oArgs)
+        assert iExpected > 0
+        assert len(lErrors) == iExpected
+        assert set(e.sFile for e in lErrors) <= set(lFiles)
+
+    def test_runBenchmark(self, tmp_path, capsys, monkeypatch):
+        # The benchmark modifies the environment, restore it at the end of the test
+        for sVarName in ["PATH", "CHECKSTYLE_STUB_STARTUP", "CHECKSTYLE_STUB_RATE"]:
+            monkeypatch.setenv(sVarName, os.getenv(sVarName, ""))
+        assert benchmark.main(["--files", "30", "--no-ui", "--work-dir", str(tmp_path),
+                               "--json", os.path.join(str(tmp_path), "results.json")]) == 0
+        assert "runCheckstyle (-g -l)" in capsys.readouterr().out
+        assert os.path.isfile(os.path.join(str(tmp_path), "results.json"))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_budget.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+
+import json
+import os
+import sys
+
+from checkstyleinterface import budget, main
+from checkstyleinterface.budget import BudgetedCheck, DeferredResults, planBatch, prioritizeFiles, writeDeferredJob
+from checkstyleinterface.scheduler import CostModel
+from checkstyleinterface.session import CheckstyleSession, listFiles
+from checkstyleinterface.stats import RunStats
+from checkstyleinterface.tests.util import useStubCheckstyle, writeJavaFiles
+
+
+def setModificationTimes(lFiles):
+    # The first files are the most recently modified
+    for iIdx, sFile in enumerate(lFiles):
+        os.utime(sFile, (1e9 - iIdx * 60, 1e9 - iIdx * 60))
+
+
+class TestBudget:
+    def test_prioritizeFiles(self, tmp_path):
+        sFolder = os.path.join(str(tmp_path), "java")
+        writeJavaFiles(sFolder, 4, {})
+        lFiles = sorted(listFiles([], [sFolder]))
+        setModificationTimes(lFiles)
+        dFiles = {lFiles[0]: None, lFiles[1]: None, lFiles[2]: [2], lFiles[3]: None}
+        assert prioritizeFiles(dFiles) == [lFiles[2], lFiles[0], lFiles[1], lFiles[3]]
+
+    def test_planBatch(self, tmp_path):
+        sFolder = os.path.join(str(tmp_path), "java")
+        writeJavaFiles(sFolder, 3, {})
+        sFileA, sFileB, sFileC = sorted(listFiles([], [sFolder]))
+        oCostModel = CostModel()
+        oCostModel.dHistory = {sFile: [os.path.getsize(sFile), fCost]
+                               for sFile, fCost in [(sFileA, 1.0), (sFileB, 2.0), (sFileC, 1.0)]}
+        assert planBatch([sFileA, sFileB, sFileC], 3.5, oCostModel) == [sFileA, sFileB]
+        assert planBatch([sFileA, sFileB, sFileC], 10, oCostModel) == [sFileA, sFileB, sFileC]
+        # At least one file, whatever its cost
+        assert planBatch([sFileB, sFileA], 0.5, oCostModel) == [sFileB]
+
+    def test_deferFilesOverBudget(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        # 20 files at 5 files per second: the full analysis would take 4 seconds
+        monkeypatch.setenv("CHECKSTYLE_STUB_RATE", "5")
+        sJavaFolder = os.path.join(sFolder, "java")
+        writeJavaFiles(sJavaFolder, 20, {0: "// violation(error, MagicNumber) '0'.",
+                                         19: "// violation(error, MagicNumber) '0'."})
+        lFiles = sorted(listFiles([], [sJavaFolder]))
+        setModificationTimes(lFiles)
+        os.makedirs(os.path.join(sFolder, "cache"))
+        with open(os.path.join(sFolder, "cache", "costs.json"), "w") as oFile:
+            json.dump({sFile: [os.path.getsize(sFile), 0.2] for sFile in lFiles}, oFile)
+
+        oSession = CheckstyleSession(sJarFile)
+        oRunStats = RunStats(None)
+        oCheck = BudgetedCheck(oSession, dict.fromkeys(lFiles), 2, oRunStats)
+        lErrors = list(oCheck)
+        oSession.close()
+
+        # The most recently modified files are checked first, the others are deferred
+        assert 5 <= len(oCheck.dCheckedFiles) < 20
+        assert list(oCheck.dCheckedFiles) == lFiles[:len(oCheck.dCheckedFiles)]
+        assert sorted(oCheck.dDeferredFiles) == lFiles[len(oCheck.dCheckedFiles):]
+        assert [e.sFile for e in lErrors if e.sSeverity == "error"][:1] == [lFiles[0]]
+        assert oRunStats.iFileCount == 20
+        assert oRunStats.iDeferredFileCount == len(oCheck.dDeferredFiles)
+
+    def test_deferredRun(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        monkeypatch.setenv("CHECKSTYLE_STUB_RATE", "5")
+        sJavaFolder = os.path.join(sFolder, "java")
+        writeJavaFiles(sJavaFolder, 10, {8: "// violation(error, MagicNumber) '0'.",
+                                         9: "// violation(warning, LineLength) Too long."})
+        setModificationTimes(sorted(listFiles([], [sJavaFolder])))
+        sStatsFile = os.path.join(sFolder, "stats.jsonl")
+        lArgv = ["-d", sJavaFolder, "-j", sJarFile, "-b", "-s", sStatsFile, "--time-budget", "0.5"]
+        lStarted = []
+        monkeypatch.setattr(budget, "startDetached", lambda lArgs, sLogFile: lStarted.append(lArgs))
+        monkeypatch.setattr(sys, "argv", ["checkinter"] + lArgv)
+
+        # The errors of the deferred files are not reported by the check over its budget
+        oRunStats = RunStats("hook")
+        assert main.runBatchMode(main.parseArgs(lArgv), oRunStats) == 0
+        assert oRunStats.iDeferredFileCount > 0
+        assert len(lStarted) == 1
+        assert lStarted[0][1:3] == ["-m", "checkstyleinterface.main"]
+        assert DeferredResults([sJavaFolder]).iPendingFiles == oRunStats.iDeferredFileCount
+
+        # The background run, as started by the check
+        assert main.runDeferred(main.parseArgs(lStarted[0][3:])) == 0
+        with open(sStatsFile, "r") as oFile:
+            assert json.loads(oFile.readline())["mode"] == "deferred"
+        oDeferredResults = DeferredResults([sJavaFolder])
+        assert oDeferredResults.iPendingFiles == 0
+        assert sorted(e.sSeverity for e in oDeferredResults.getErrors()) == ["error", "warning"]
+        assert DeferredResults([os.path.join(sFolder, "other")]).getErrors() == []
+
+        # The errors of a file modified since are outdated, and those also found by the current run are not repeated
+        lCurrentErrors = [e for e in oDeferredResults.getErrors() if e.sSeverity == "warning"]
+        with open(os.path.join(sJavaFolder, "Class008.java"), "a") as oFile:
+            oFile.write("\n")
+        assert oDeferredResults.getErrors(lCurrentErrors) == []
+
+        oDeferredResults.consume()
+        assert DeferredResults([sJavaFolder]).getErrors() == []
+
+    def test_expiredJob(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        useStubCheckstyle(sFolder, monkeypatch)
+        os.makedirs(budget.getDeferredFolder())
+        sJobFile = os.path.join(budget.getDeferredFolder(), "job.json")
+        writeDeferredJob(sJobFile, {"created": 0, "files": {os.path.join(sFolder, "A.java"): None}})
+        assert DeferredResults([sFolder]).iPendingFiles == 0
+        assert not os.path.exists(sJobFile)
+
+    def test_timeBudgetInHook(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        oArgs = main.parseArgs(["-g", sFolder, "-j", sJarFile, "--time-budget", "2.5"])
+        assert main.getHookOptions(oArgs, sFolder)[-2:] == ["--time-budget", "2.5"]
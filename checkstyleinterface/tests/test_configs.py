@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_configs.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+
+from checkstyleinterface import configs, main, session
+from checkstyleinterface.tests.util import useStubCheckstyle, writeJavaFiles
+
+VIOLATIONS = {0: "// violation(error, MagicNumber) '0'.", 1: "// violation(warning, LineLength) Too long."}
+
+
+def writeConfig(sConfigFile, sModule):
+    with open(sConfigFile, "w") as oFile:
+        oFile.write('<?xml version="1.0"?>\n<module name="Checker">\n<module name="TreeWalker">\n'
+                    '<module name="%s"/>\n</module>\n</module>\n' % sModule)
+
+
+class TestConfigs:
+    def test_groupFilesByConfig(self, tmp_path):
+        sFolder = str(tmp_path)
+        for sSubFolder in ["a", os.path.join("a", "b"), os.path.join("a", "b", "c"), "d"]:
+            os.makedirs(os.path.join(sFolder, sSubFolder))
+        writeConfig(os.path.join(sFolder, "a", "checkstyle.xml"), "MagicNumber")
+        writeConfig(os.path.join(sFolder, "a", "b", "checkstyle.xml"), "LineLength")
+        open(os.path.join(sFolder, "a", "b", "checkstyle.properties"), "w").close()
+        dFiles = {
+            os.path.join(sFolder, "a", "A.java"): None,
+            os.path.join(sFolder, "a", "b", "c", "C.java"): [1, 2],
+            os.path.join(sFolder, "d", "D.java"): None,
+            os.path.join(sFolder, "a", "b", "B.java"): None
+        }
+        lGroups = configs.groupFilesByConfig(dFiles, "checkstyle.xml", "default.xml", "default.properties")
+        assert lGroups == [
+            ((os.path.join(sFolder, "a", "checkstyle.xml"), "default.properties"),
+             {os.path.join(sFolder, "a", "A.java"): None}),
+            ((os.path.join(sFolder, "a", "b", "checkstyle.xml"),
+              os.path.join(sFolder, "a", "b", "checkstyle.properties")),
+             {os.path.join(sFolder, "a", "b", "c", "C.java"): [1, 2], os.path.join(sFolder, "a", "b", "B.java"): None}),
+            (("default.xml", "default.properties"), {os.path.join(sFolder, "d", "D.java"): None})
+        ]
+        assert configs.groupFilesByConfig(dFiles, None, "default.xml") == [(("default.xml", None), dFiles)]
+
+    def test_runCheckstyle(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        writeJavaFiles(os.path.join(sFolder, "java", "a"), 2, VIOLATIONS)
+        writeJavaFiles(os.path.join(sFolder, "java", "b"), 2, VIOLATIONS)
+        writeConfig(os.path.join(sFolder, "java", "a", "checkstyle.xml"), "MagicNumber")
+        writeConfig(os.path.join(sFolder, "java", "b", "checkstyle.xml"), "LineLength")
+
+        lCommands = []
+
+        def getCommands(*args, xGet=session.getCommands):
+            lGroupCommands = xGet(*args)
+            lCommands.extend(lGroupCommands)
+            return lGroupCommands
+        monkeypatch.setattr(session, "getCommands", getCommands)
+
+        lErrors = main.runCheckstyle(main.parseArgs(["-d", os.path.join(sFolder, "java"), "-r", "-j", sJarFile,
+                                                     "--config-name", "checkstyle.xml"]))
+        assert len(lCommands) == 2
+        assert sorted((os.path.basename(os.path.dirname(e.sFile)), e.sCategory) for e in lErrors) \
+            == [("a", "MagicNumberCheck"), ("b", "LineLengthCheck")]
+
+    def test_getDerivedConfig(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sConfigFile = os.path.join(sFolder, "checkstyle.xml")
+        with open(sConfigFile, "w") as oFile:
+            oFile.write('<?xml version="1.0"?>\n<!DOCTYPE module PUBLIC "-//Checkstyle//DTD Checkstyle Configuration '
+                        '1.3//EN" "https://checkstyle.org/dtds/configuration_1_3.dtd">\n<module name="Checker">\n'
+                        '<module name="TreeWalker">\n<module name="MagicNumber"/>\n'
+                        '<module name="com.puppycrawl.tools.checkstyle.checks.sizes.LineLengthCheck"/>\n'
+                        '<module name="MethodLength"><property name="id" value="shortMethods"/></module>\n'
+                        '<module name="LineLength"><property name="id" value="strictLength"/></module>\n'
+                        '</module>\n</module>\n')
+        lDerivations = []
+        monkeypatch.setattr(configs, "deriveConfig", lambda *args, xDerive=configs.deriveConfig:
+                            lDerivations.append(args) or xDerive(*args))
+
+        sDerivedFile = configs.getDerivedConfig(sConfigFile, ["LineLengthCheck", "shortMethods"], sFolder)
+        assert sDerivedFile != sConfigFile
+        with open(sDerivedFile, "r") as oFile:
+            sContent = oFile.read()
+        assert "<!DOCTYPE module PUBLIC" in sContent
+        assert "MagicNumber" in sContent and "LineLengthCheck" not in sContent and "MethodLength" not in sContent
+        # A module with an id is only matched by its id
+        assert "strictLength" in sContent
+
+        # Derived once per configuration content and categories
+        assert configs.getDerivedConfig(sConfigFile, ["shortMethods", "LineLengthCheck"], sFolder) == sDerivedFile
+        assert len(lDerivations) == 1
+        assert configs.getDerivedConfig(sConfigFile, ["UnknownCheck"], sFolder) == sConfigFile
+        assert configs.getDerivedConfig(sConfigFile, ["MethodLengthCheck"], sFolder) == sConfigFile
+        # The modules containing other ones are kept
+        assert configs.getDerivedConfig(sConfigFile, ["TreeWalker"], sFolder) == sConfigFile
+
+    def test_skipCategories(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        writeJavaFiles(os.path.join(sFolder, "java"), 2, VIOLATIONS)
+        sConfigFile = os.path.join(sFolder, "checkstyle.xml")
+        with open(sConfigFile, "w") as oFile:
+            oFile.write('<?xml version="1.0"?>\n<module name="Checker">\n<module name="TreeWalker">\n'
+                        '<module name="MagicNumber"/>\n<module name="LineLength"/>\n</module>\n</module>\n')
+
+        # On refresh, the ignored categories are not checked anymore
+        oProvider = main.getErrorsProvider(main.parseArgs(["-d", os.path.join(sFolder, "java"), "-j", sJarFile,
+                                                           "-c", sConfigFile, "--refresh-without-ignored"]),
+                                           None, session.CheckstyleSession(sJarFile, sConfigFile))
+        assert sorted(e.sCategory for e in oProvider()) == ["LineLengthCheck", "MagicNumberCheck"]
+        assert [e.sCategory for e in oProvider(["MagicNumberCheck"])] == ["LineLengthCheck"]
+        assert sorted(e.sCategory for e in oProvider([])) == ["LineLengthCheck", "MagicNumberCheck"]
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_distributed.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+
+import contextlib
+import io
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from checkstyleinterface import main
+from checkstyleinterface.cache import errorToEntry
+from checkstyleinterface.configs import expandProperties, readConfig, readProperties
+from checkstyleinterface.distributed import DEFAULT_WORKER_PORT, DistributedCheck, Shard, createWorkerServer, \
+    getConfigRequest, parseWorkerAddress, readMessage, runWorkerCommand, writeMessage, writeShardConfig, \
+    writeShardFile
+from checkstyleinterface.session import CheckstyleSession, listFiles
+from checkstyleinterface.stats import RunStats
+from checkstyleinterface.tests.util import getErrorKeys, useStubCheckstyle, writeJavaFiles
+
+
+@pytest.fixture
+def startWorkers(tmp_path, monkeypatch):
+    sJarFile = useStubCheckstyle(str(tmp_path), monkeypatch)
+    lProcesses = []
+
+    def start(iCount):
+        lWorkers = []
+        for _ in range(iCount):
+            oProcess = subprocess.Popen([sys.executable, "-m", "checkstyleinterface.main", "worker", "-j", sJarFile,
+                                         "--host", "127.0.0.1", "--port", "0"],
+                                        stdout=subprocess.PIPE, encoding="utf-8")
+            lProcesses.append(oProcess)
+            # The port is printed once the worker is listening
+            lWorkers.append("127.0.0.1:%s" % oProcess.stdout.readline().split()[-1])
+        return sJarFile, lWorkers
+
+    yield start
+    for oProcess in lProcesses:
+        oProcess.terminate()
+        oProcess.wait()
+        oProcess.stdout.close()
+
+
+def getUnusedAddress():
+    with socket.socket() as oSocket:
+        oSocket.bind(("127.0.0.1", 0))
+        return "127.0.0.1:%d" % oSocket.getsockname()[1]
+
+
+def readRequest(oHandler):
+    readMessage(oHandler.rfile)
+    writeMessage(oHandler.wfile, {"type": "ready"})
+    return readMessage(oHandler.rfile)
+
+
+@contextlib.contextmanager
+def serveWorker(oHandlerClass):
+    with socketserver.ThreadingTCPServer(("127.0.0.1", 0), oHandlerClass) as oServer:
+        threading.Thread(target=oServer.serve_forever, daemon=True).start()
+        yield "127.0.0.1:%d" % oServer.server_address[1]
+        oServer.shutdown()
+
+
+class CrashingWorkerHandler(socketserver.StreamRequestHandler):
+    """Worker reporting the first error of the first file of its shard, then disconnecting."""
+    dErrorsByName = {}
+    lRequests = []
+
+    def handle(self):
+        dRequest = readRequest(self)
+        self.lRequests.append(dRequest)
+        for sPath, _ in dRequest["files"]:
+            for oError in self.dErrorsByName.get(os.path.basename(sPath), [])[:1]:
+                writeMessage(self.wfile, {"type": "error", "file": sPath, "entry": list(errorToEntry(oError))})
+                return
+
+
+class ScriptedWorkerHandler(socketserver.StreamRequestHandler):
+    """Worker sending the given entries for the first file of its shard, and then either disconnecting or ending the
+    shard, the replies being taken in turn by the requests."""
+    lReplies = []
+
+    def handle(self):
+        dRequest = readRequest(self)
+        lEntries, bDone = self.lReplies.pop(0)
+        for tEntry in lEntries:
+            writeMessage(self.wfile, {"type": "error", "file": dRequest["files"][0][0], "entry": list(tEntry)})
+        if bDone:
+            writeMessage(self.wfile, {"type": "done"})
+
+
+class TestDistributed:
+    def test_messages(self):
+        oStream = io.BytesIO()
+        writeMessage(oStream, {"type": "done"})
+        writeMessage(oStream, {"type": "error", "entry": [1, 2]})
+        bData = oStream.getvalue()
+        oStream = io.BytesIO(bData)
+        assert readMessage(oStream) == {"type": "done"}
+        assert readMessage(oStream) == {"type": "error", "entry": [1, 2]}
+        assert readMessage(oStream) is None
+        oStream = io.BytesIO(bData[:-1])
+        readMessage(oStream)
+        with pytest.raises(ConnectionError):
+            readMessage(oStream)
+
+    def test_parseWorkerAddress(self):
+        assert parseWorkerAddress("build-01:9000") == ("build-01", 9000)
+        assert parseWorkerAddress("build-01") == ("build-01", DEFAULT_WORKER_PORT)
+        assert parseWorkerAddress("[::1]:9000") == ("::1", 9000)
+
+    def test_shardPathsStayInFolder(self, tmp_path):
+        sFolder = str(tmp_path)
+        assert writeShardFile(sFolder, "com/app/Main.java", "") == os.path.join(sFolder, "com", "app", "Main.java")
+        for sPath in ["../Main.java", "com/../../Main.java", "/tmp/Main.java"]:
+            with pytest.raises(ValueError):
+                writeShardFile(sFolder, sPath, "")
+
+    def test_shardPathsFromRepository(self, tmp_path):
+        sFolder = str(tmp_path)
+        os.makedirs(os.path.join(sFolder, "repo", ".git"))
+        writeJavaFiles(os.path.join(sFolder, "repo", "src", "com", "app"), 1, {})
+        writeJavaFiles(os.path.join(sFolder, "other"), 1, {})
+        # Whichever files are in the shard
+        oShard = Shard({}, [os.path.join(sFolder, "repo", "src", "com", "app", "Class000.java"),
+                            os.path.join(sFolder, "other", "Class000.java")], sFolder)
+        assert [lFile[0] for lFile in oShard.getRequest()[0]["files"]] \
+            == ["src/com/app/Class000.java", "other/Class000.java"]
+
+    def test_configResources(self, tmp_path):
+        sFolder = str(tmp_path)
+        sConfigFolder = os.path.join(sFolder, "config")
+        os.makedirs(sConfigFolder)
+        with open(os.path.join(sConfigFolder, "suppressions.xml"), "w") as oFile:
+            oFile.write("<suppressions/>")
+        with open(os.path.join(sConfigFolder, "checkstyle.properties"), "w") as oFile:
+            oFile.write("# Location\nconfig_loc=%s\n" % sConfigFolder.replace("\\", "/"))
+        with open(os.path.join(sConfigFolder, "checkstyle.xml"), "w") as oFile:
+            oFile.write('<module name="Checker"><module name="SuppressionFilter">'
+                        '<property name="file" value="${config_loc}/suppressions.xml"/></module>'
+                        '<module name="TreeWalker"><module name="MagicNumber"/></module></module>')
+
+        # The files referred to by the configuration are sent with it, and found by the worker
+        dRequest = getConfigRequest(os.path.join(sConfigFolder, "checkstyle.xml"),
+                                    os.path.join(sConfigFolder, "checkstyle.properties"))
+        assert [lResource[0] for lResource in dRequest["resources"]] == ["0/suppressions.xml"]
+        sConfigFile, sPropFile = writeShardConfig(os.path.join(sFolder, "worker"), dRequest)
+        oRoot, _ = readConfig(sConfigFile)
+        sSuppressionsFile = expandProperties(next(oRoot.iter("property")).get("value"), readProperties(sPropFile))
+        assert not sSuppressionsFile.startswith(sConfigFolder)
+        with open(sSuppressionsFile) as oFile:
+            assert oFile.read() == "<suppressions/>"
+
+    def test_distributedCheck(self, tmp_path, startWorkers):
+        sFolder = str(tmp_path)
+        sJarFile, lWorkers = startWorkers(2)
+        sJavaFolder = os.path.join(sFolder, "java")
+        writeJavaFiles(os.path.join(sJavaFolder, "app"), 10, {1: "// violation(error, MagicNumber) '0'.",
+                                                              7: "// violation(warning, LineLength) Too long."})
+        writeJavaFiles(os.path.join(sJavaFolder, "lib"), 6, {2: "// violation(info, JavadocMethod) Missing."})
+        oSession = CheckstyleSession(sJarFile)
+        lLocalErrors = oSession.check([sJavaFolder])
+        oSession.close()
+
+        oRunStats = RunStats(None)
+        oArgs = main.parseArgs(["-d", sJavaFolder, "-r", "-j", sJarFile, "-b", "--workers"] + lWorkers)
+        lErrors = main.runCheckstyle(oArgs, oRunStats)
+        assert len(lLocalErrors) == 3
+        assert getErrorKeys(lErrors) == getErrorKeys(lLocalErrors)
+        assert oRunStats.iFileCount == 16
+        assert "checkstyle" in oRunStats.dPhases
+
+    def test_retryOnOtherWorkers(self, tmp_path, startWorkers):
+        sFolder = str(tmp_path)
+        sJarFile, lWorkers = startWorkers(1)
+        sJavaFolder = os.path.join(sFolder, "java")
+        writeJavaFiles(sJavaFolder, 12, {iIdx: "// violation(error, MagicNumber) '0'." for iIdx in range(12)})
+        oSession = CheckstyleSession(sJarFile)
+        lLocalErrors = oSession.check([sJavaFolder])
+        oSession.close()
+
+        dErrorsByName = {}
+        for oError in lLocalErrors:
+            dErrorsByName.setdefault(os.path.basename(oError.sFile), []).append(oError)
+        oHandlerClass = type("Handler", (CrashingWorkerHandler,), {"dErrorsByName": dErrorsByName, "lRequests": []})
+        with serveWorker(oHandlerClass) as sCrashingWorker:
+            # The shards of the unreachable and crashing workers are checked by the remaining one, and the errors
+            # reported before the crash are not reported twice
+            oCheck = DistributedCheck([getUnusedAddress(), sCrashingWorker] + lWorkers,
+                                      dict.fromkeys(listFiles([], [sJavaFolder])))
+            lErrors = list(oCheck)
+        assert getErrorKeys(lErrors) == getErrorKeys(lLocalErrors)
+        assert len(oHandlerClass.lRequests) == 1
+
+    def test_failedEverywhere(self, tmp_path, startWorkers):
+        sFolder = str(tmp_path)
+        sJarFile, lWorkers = startWorkers(2)
+        sJavaFolder = os.path.join(sFolder, "java")
+        writeJavaFiles(sJavaFolder, 2, {})
+        sConfigFile = os.path.join(sFolder, "config.xml")
+        with open(sConfigFile, "w") as oFile:
+            oFile.write("foobar")
+        oCheck = DistributedCheck(lWorkers, dict.fromkeys(listFiles([], [sJavaFolder])), sConfigFile=sConfigFile)
+        with pytest.raises(RuntimeError, match="could not be checked"):
+            list(oCheck)
+
+    def test_noWorkerAvailable(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        useStubCheckstyle(sFolder, monkeypatch)
+        writeJavaFiles(os.path.join(sFolder, "java"), 2, {})
+        oCheck = DistributedCheck([getUnusedAddress()], dict.fromkeys(listFiles([], [os.path.join(sFolder, "java")])))
+        with pytest.raises(RuntimeError, match="could not be checked"):
+            list(oCheck)
+
+    def test_duplicateErrors(self, tmp_path):
+        sFolder = str(tmp_path)
+        writeJavaFiles(os.path.join(sFolder, "java"), 1, {})
+        tEntry, tOtherEntry = (2, 5, "error", "MagicNumberCheck", "Magic."), (3, 1, "info", "TodoCommentCheck", "TODO")
+        # The same error twice in the same line is reported twice, but not again after a failed attempt
+        oHandlerClass = type("Handler", (ScriptedWorkerHandler,), {"lReplies": [([tEntry, tEntry], False),
+                                                                                ([tEntry, tOtherEntry, tEntry], True)]})
+        with serveWorker(oHandlerClass) as sFirstWorker, serveWorker(oHandlerClass) as sSecondWorker:
+            lErrors = list(DistributedCheck([sFirstWorker, sSecondWorker],
+                                            dict.fromkeys(listFiles([], [os.path.join(sFolder, "java")]))))
+        assert [errorToEntry(e) for e in lErrors] == [tEntry, tEntry, tOtherEntry]
+
+    def test_token(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        writeJavaFiles(os.path.join(sFolder, "java"), 2, {0: "// violation(error, MagicNumber) '0'."})
+        dFiles = dict.fromkeys(listFiles([], [os.path.join(sFolder, "java")]))
+        with createWorkerServer(sJarFile, "127.0.0.1", 0, sToken="secret") as oServer:
+            threading.Thread(target=oServer.serve_forever, daemon=True).start()
+            sWorker = "127.0.0.1:%d" % oServer.server_address[1]
+            for sToken in [None, "other"]:
+                with pytest.raises(RuntimeError, match="Invalid token"):
+                    list(DistributedCheck([sWorker], dFiles, sToken=sToken))
+            assert len(list(DistributedCheck([sWorker], dFiles, sToken="secret"))) == 1
+            oServer.shutdown()
+
+        # Listening on the network requires a token
+        monkeypatch.delenv("CHECKINTER_WORKER_TOKEN", raising=False)
+        for sHost in ["0.0.0.0", "", "build-01"]:
+            with pytest.raises(SystemExit):
+                runWorkerCommand(["-j", sJarFile, "--host", sHost, "--port", "0"])
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_editor.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+import sys
+import time
+
+import psutil
+import pytest
+
+from checkstyleinterface import editor, main
+
+
+def waitFor(xCondition, fTimeout=10):
+    fStart = time.perf_counter()
+    while not xCondition() and time.perf_counter() - fStart < fTimeout:
+        time.sleep(0.02)
+
+
+class TestEditor:
+    def test_getCommandFromTemplate(self):
+        assert editor.getCommandFromTemplate('code --goto "{file}:{line}:{column}"', "/src/My File.java", 12, 5) \
+            == ["code", "--goto", "/src/My File.java:12:5"]
+
+    def test_invalidTemplate(self, tmp_path):
+        for sTemplate in ['code --goto "{file}', "code {}", "code {path}", ""]:
+            with pytest.raises(ValueError):
+                editor.checkCommandTemplate(sTemplate)
+            with pytest.raises(SystemExit):
+                main.parseArgs(["-f", "Foo.java", "-j", __file__, "--editor", sTemplate or " "])
+
+        # A failed command does not prevent the next ones
+        oLauncher = editor.EditorLauncher("code {}")
+        oLauncher.open("/src/A.java", 1, 1)
+        waitFor(lambda: oLauncher.oThread is None)
+        sOutputFile = os.path.join(str(tmp_path), "opened.txt")
+        oLauncher.sCommandTemplate = '"%s" -c "open(r\'%s\', \'w\').write(\'{line}\')"' % (sys.executable, sOutputFile)
+        oLauncher.open("/src/A.java", 2, 1)
+        waitFor(lambda: os.path.isfile(sOutputFile) and oLauncher.oThread is None)
+        with open(sOutputFile) as oFile:
+            assert oFile.read() == "2"
+
+    def test_coalescesLocations(self, tmp_path):
+        sOutputFile = os.path.join(str(tmp_path), "opened.txt")
+        sScript = "import sys, time; open(sys.argv[1], 'a').write(sys.argv[2] + '\\n'); time.sleep(0.5)"
+        lArgs = [sys.executable, "-c", sScript, sOutputFile, "{line}"]
+        oLauncher = editor.EditorLauncher(" ".join('"%s"' % s for s in lArgs))
+        oLauncher.open("/src/A.java", 1, 1)
+        waitFor(lambda: os.path.isfile(sOutputFile))
+        # Requested while the first command runs: only the last one is opened
+        for iLine in range(2, 6):
+            oLauncher.open("/src/A.java", iLine, 1)
+        waitFor(lambda: oLauncher.oThread is None)
+        with open(sOutputFile) as oFile:
+            assert oFile.read().split() == ["1", "5"]
+
+    def test_intellijLocationCached(self, monkeypatch):
+        lSearches = []
+        tProcess = (os.getpid(), psutil.Process().exe())
+        monkeypatch.setattr(editor, "getIntellijProcess", lambda: lSearches.append(1) or tProcess)
+        oLauncher = editor.EditorLauncher()
+        assert oLauncher.getCommand("/src/A.java", 3, 4) == [tProcess[1], "--line", "3", "--column", "4", "/src/A.java"]
+        assert oLauncher.getIntellijLocation() == tProcess[1]
+        assert len(lSearches) == 1
+
+        # Not running anymore: searched again, then not before some time
+        tProcess = None
+        oLauncher.tIntellijProcess = (-1, "idea")
+        assert oLauncher.getIntellijLocation() is None
+        assert oLauncher.getIntellijLocation() is None
+        assert len(lSearches) == 2
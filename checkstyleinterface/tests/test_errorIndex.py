@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_errorIndex.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+import random
+import time
+
+from checkstyleinterface.errorindex import ErrorIndex
+from checkstyleinterface.tests.util import makeError
+
+
+def makeErrors(sRoot):
+    return [
+        makeError(os.path.join(sRoot, "com", "app", "Main.java"), 1, "error", "LineLengthCheck", "Line is too long."),
+        makeError(os.path.join(sRoot, "com", "app", "Main.java"), 5, "warning", "MagicNumberCheck", "'42' is magic."),
+        makeError(os.path.join(sRoot, "com", "apply", "Tool.java"), 3, "error", "LineLengthCheck", "Line is too long."),
+        makeError(os.path.join(sRoot, "com", "lib", "Util.java"), 7, "info", "JavadocMethodCheck", "Missing javadoc."),
+        makeError(os.path.join(sRoot, "org", "Other.java"), 2, "error", "MagicNumberCheck", "'7' is magic.")
+    ]
+
+
+class TestErrorIndex:
+    def test_noFilter(self, tmp_path):
+        oIndex = ErrorIndex(makeErrors(str(tmp_path)))
+        assert oIndex.query() == [0, 1, 2, 3, 4]
+        assert oIndex.getCategories() == ["JavadocMethodCheck", "LineLengthCheck", "MagicNumberCheck"]
+
+    def test_severityAndCategory(self, tmp_path):
+        oIndex = ErrorIndex(makeErrors(str(tmp_path)))
+        assert oIndex.query(sSeverity="Error") == [0, 2, 4]
+        assert oIndex.query(sCategory="MagicNumberCheck") == [1, 4]
+        assert oIndex.query(sSeverity="error", sCategory="MagicNumberCheck") == [4]
+        assert oIndex.query(sCategory="UnknownCheck") == []
+
+    def test_pathPrefix(self, tmp_path):
+        sRoot = str(tmp_path)
+        oIndex = ErrorIndex(makeErrors(sRoot))
+        assert oIndex.query(sPathPrefix="com/app/") == [0, 1]
+        assert oIndex.query(sPathPrefix="com/app") == [0, 1, 2]
+        assert oIndex.query(sPathPrefix=os.path.join("com", "lib", "Ut")) == [3]
+        assert oIndex.query(sPathPrefix=os.path.join(sRoot, "org")) == [4]
+        assert oIndex.query(sPathPrefix=os.path.join(sRoot, os.pardir)) == []
+        assert oIndex.query(sPathPrefix="net") == []
+
+    def test_text(self, tmp_path):
+        oIndex = ErrorIndex(makeErrors(str(tmp_path)))
+        assert oIndex.query(sText="TOO LONG") == [0, 2]
+        assert oIndex.query(sText="'7'") == [4]
+        assert oIndex.query(sText="42") == [1]
+        assert oIndex.query(sText="tool.java") == [2]
+        assert oIndex.query(sText="magic", sPathPrefix="com") == [1]
+        assert oIndex.query(sText="nowhere") == []
+
+    def test_largeResults(self, tmp_path):
+        sRoot = str(tmp_path)
+        oRandom = random.Random(0)
+        lErrors = [makeError(os.path.join(sRoot, "p%02d" % oRandom.randrange(50), "Class%04d.java" % i), i, "error",
+                             oRandom.choice(["LineLengthCheck", "MagicNumberCheck", "FinalParametersCheck"]),
+                             "Message number %d." % oRandom.randrange(100))
+                   for i in range(50000)]
+        oIndex = ErrorIndex(lErrors)
+
+        fStart = time.perf_counter()
+        lResult = oIndex.query(sText="number 42.", sCategory="LineLengthCheck", sPathPrefix="p1")
+        assert time.perf_counter() - fStart < 0.1
+        assert lResult == [i for i, e in enumerate(lErrors) if e.sMessage == "Message number 42."
+                           and e.sCategory == "LineLengthCheck" and os.path.basename(os.path.dirname(e.sFile))
+                           .startswith("p1")]
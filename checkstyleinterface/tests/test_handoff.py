@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_handoff.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+
+import pytest
+
+from checkstyleinterface import handoff, main, session
+from checkstyleinterface.benchmark.synthetic import generateRepository
+from checkstyleinterface.tests.util import useStubCheckstyle
+
+
+def getErrorKeys(lErrors):
+    return sorted((e.sFile, e.iLine, e.sCategory) for e in lErrors)
+
+
+class TestHandoff:
+    def test_splitChunks(self):
+        lPaths = ["/folder/File%03d.java" % i for i in range(100)]
+        iMaxSize = 10 * handoff.getArgvSize(lPaths[:1])
+        lChunks = handoff.splitChunks(lPaths, iMaxSize)
+        assert [s for lChunk in lChunks for s in lChunk] == lPaths
+        assert len(lChunks) == 10
+        assert all(handoff.getArgvSize(lChunk) <= iMaxSize for lChunk in lChunks)
+
+    def test_getPassThroughPaths(self, tmp_path):
+        sFolder = str(tmp_path)
+        for sSubFolder in ["a", os.path.join("a", "b"), "c"]:
+            os.makedirs(os.path.join(sFolder, sSubFolder), exist_ok=True)
+        dFiles = {
+            os.path.join(sFolder, "a", "A.java"): None,
+            os.path.join(sFolder, "a", "b", "B.java"): None,
+            os.path.join(sFolder, "c", "C.java"): [1, 2],
+            os.path.join(sFolder, "D.java"): None
+        }
+        lPaths = handoff.getPassThroughPaths([os.path.join(sFolder, "a"), os.path.join(sFolder, "a", "b"),
+                                              os.path.join(sFolder, "c")], dFiles)
+        assert lPaths == [os.path.join(sFolder, "a"), os.path.join(sFolder, "c", "C.java"),
+                          os.path.join(sFolder, "D.java")]
+
+    def test_argFileQuoting(self, tmp_path):
+        sArgFile = os.path.join(str(tmp_path), "args.txt")
+        oCommand = handoff.CheckstyleCommand(["java", "-jar", "checkstyle.jar"], ['C:\\My "Files"\\A.java'],
+                                             sArgFile=sArgFile)
+        assert oCommand.getArgs() == ["java", "@" + sArgFile]
+        with open(sArgFile) as oFile:
+            assert oFile.read() == '"-jar"\n"checkstyle.jar"\n"C:\\\\My \\"Files\\"\\\\A.java"\n'
+
+    @pytest.mark.parametrize("sMode", ["auto", "argfile", "chunks"])
+    @pytest.mark.parametrize("iJobs", [1, 2])
+    def test_runCheckstyle(self, tmp_path, monkeypatch, sMode, iJobs):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        handoff.ARG_FILES_SUPPORT.clear()
+        generateRepository(os.path.join(sFolder, "repo"), 40, fViolationDensity=0.1, bGit=False)
+        lArgs = ["-d", os.path.join(sFolder, "repo", "java"), "-r", "-j", sJarFile, "--jobs", str(iJobs)]
+        lExpected = getErrorKeys(main.runCheckstyle(main.parseArgs(lArgs + ["--handoff", "argv"])))
+        assert lExpected
+
+        # Small enough for the files to be split in several chunks
+        monkeypatch.setattr(handoff, "getArgvLimit", lambda: 2000)
+        lCommands = []
+
+        def getCommands(*args, xGet=session.getCommands):
+            lGroupCommands = xGet(*args)
+            lCommands.extend(lGroupCommands)
+            return lGroupCommands
+        monkeypatch.setattr(session, "getCommands", getCommands)
+        lErrors = main.runCheckstyle(main.parseArgs(lArgs + ["--handoff", sMode]))
+        assert getErrorKeys(lErrors) == lExpected
+        if sMode == "auto" and iJobs == 1:
+            assert [o.lPaths for o in lCommands] == [[os.path.join(sFolder, "repo", "java")]]
+        elif sMode == "chunks":
+            assert len(lCommands) > iJobs
+        else:
+            assert len(lCommands) == iJobs
+            assert all(o.sArgFile for o in lCommands)
+        assert getErrorKeys(main.iterCheckstyle(main.parseArgs(lArgs + ["--handoff", sMode]))) == lExpected
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_packStore.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+
+import hashlib
+import multiprocessing
+import os
+
+from checkstyleinterface import packstore
+from checkstyleinterface.packstore import PackStore
+
+
+def getKey(iIndex):
+    return hashlib.sha256(str(iIndex).encode("ascii")).hexdigest()
+
+
+def getEntries(iIndex, iCount=1):
+    return [(iIndex, i, "error", "MagicNumberCheck", "'%d' is a magic number." % (iIndex % 7)) for i in range(iCount)]
+
+
+def putEntries(sFolder, iStart, iCount):
+    oStore = PackStore(sFolder)
+    for iIndex in range(iStart, iStart + iCount):
+        oStore.put(getKey(iIndex), getEntries(iIndex))
+    oStore.close()
+
+
+def getIndexCount(sFolder):
+    with open(os.path.join(sFolder, "index"), "rb") as oFile:
+        return packstore.INDEX_HEADER.unpack(oFile.read(packstore.INDEX_HEADER.size))[3]
+
+
+class TestPackStore:
+    def test_putGet(self, tmp_path):
+        sFolder = str(tmp_path)
+        oStore = PackStore(sFolder)
+        lEntries = [(1, 0, "warning", "LineLengthCheck", "Ligne trop longue : 121 > 120 ✗"), (3, 5, None, None, "")]
+        oStore.put(getKey(1), lEntries)
+        oStore.put(getKey(2), [])
+        assert oStore.get(getKey(1)) == lEntries
+        oStore.close()
+
+        oStore = PackStore(sFolder)
+        assert oStore.getMany([getKey(1), getKey(2), getKey(3)]) == {getKey(1): lEntries, getKey(2): []}
+        oStore.put(getKey(1), getEntries(1))
+        assert oStore.get(getKey(1)) == getEntries(1)
+        oStore.close()
+        assert PackStore(sFolder).get(getKey(1)) == getEntries(1)
+
+    def test_reindex(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(packstore, "REINDEX_THRESHOLD", 10)
+        sFolder = str(tmp_path)
+        putEntries(sFolder, 0, 5)
+        assert not os.path.exists(os.path.join(sFolder, "index"))
+        putEntries(sFolder, 5, 5)
+        assert getIndexCount(sFolder) == 10
+
+        oStore = PackStore(sFolder)
+        assert oStore.getMany([getKey(i) for i in range(12)]) == {getKey(i): getEntries(i) for i in range(10)}
+        assert oStore.dTail == {}
+        # The strings are interned
+        assert len(oStore.lStrings) == 1 + 2 + 7
+
+    def test_searchInBucket(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(packstore, "REINDEX_THRESHOLD", 10)
+        sFolder = str(tmp_path)
+        # All the keys in the same bucket of the fan-out table, found by a binary search
+        lKeys = ["abcd%04x" % i + getKey(i)[8:] for i in range(0, 400, 2)]
+        oStore = PackStore(sFolder)
+        for iIndex, sKey in enumerate(lKeys):
+            oStore.put(sKey, getEntries(iIndex))
+        oStore.close()
+        assert getIndexCount(sFolder) == len(lKeys)
+
+        oStore = PackStore(sFolder)
+        lMissingKeys = ["abcd%04x" % i + getKey(i)[8:] for i in range(1, 401, 2)]
+        lMissingKeys += ["abcc" + "f" * 60, "abce" + "0" * 60]
+        assert oStore.getMany(lKeys + lMissingKeys) == {sKey: getEntries(i) for i, sKey in enumerate(lKeys)}
+        assert oStore.dTail == {}
+
+    def test_compaction(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(packstore, "REINDEX_THRESHOLD", 1)
+        monkeypatch.setattr(packstore, "COMPACTION_MIN_SIZE", 0)
+        sFolder = str(tmp_path)
+        oStore = PackStore(sFolder)
+        for iIndex in range(10):
+            oStore.put(getKey(0), getEntries(iIndex, 10))
+        oStore.close()
+
+        # The replaced records and their strings are dropped
+        iRecordSize = packstore.RECORD_HEADER.size + 10 * packstore.RECORD_ENTRY.size
+        assert os.path.getsize(os.path.join(sFolder, "pack")) == packstore.FILE_HEADER.size + iRecordSize
+        oStore = PackStore(sFolder)
+        assert oStore.get(getKey(0)) == getEntries(9, 10)
+        assert oStore.lStrings[1:] == ["error", "MagicNumberCheck", "'2' is a magic number."]
+
+    def test_eviction(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(packstore, "REINDEX_THRESHOLD", 1)
+        sFolder = str(tmp_path)
+        monkeypatch.setattr(packstore.time, "time", lambda: 1000.0)
+        oStore = PackStore(sFolder)
+        for iIndex in range(20):
+            oStore.put(getKey(iIndex), getEntries(iIndex, 10))
+        oStore.close()
+
+        # The recently used records are kept, up to 75% of the maximum size
+        monkeypatch.setattr(packstore.time, "time", lambda: 2000.0)
+        oStore = PackStore(sFolder, iMaxSize=2000)
+        assert len(oStore.getMany([getKey(i) for i in range(5)])) == 5
+        oStore.close()
+        assert os.path.getsize(os.path.join(sFolder, "pack")) <= 1500
+        dFound = PackStore(sFolder).getMany([getKey(i) for i in range(20)])
+        assert len(dFound) == 6
+        assert all(getKey(i) in dFound for i in range(5))
+
+    def test_concurrentProcesses(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(packstore, "REINDEX_THRESHOLD", 50)
+        sFolder = str(tmp_path)
+        lProcesses = [multiprocessing.Process(target=putEntries, args=(sFolder, 100 * i, 100)) for i in range(4)]
+        for oProcess in lProcesses:
+            oProcess.start()
+        # Read while the other processes write and rebuild the index
+        oStore = PackStore(sFolder)
+        for iIndex in range(400):
+            assert oStore.get(getKey(iIndex)) in (None, getEntries(iIndex))
+        for oProcess in lProcesses:
+            oProcess.join()
+            assert oProcess.exitcode == 0
+        oStore.close()
+        assert PackStore(sFolder).getMany([getKey(i) for i in range(400)]) \
+            == {getKey(i): getEntries(i) for i in range(400)}
+
+    def test_rebuiltByAnotherStore(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(packstore, "REINDEX_THRESHOLD", 1)
+        monkeypatch.setattr(packstore, "COMPACTION_MIN_SIZE", 0)
+        sFolder = str(tmp_path)
+        putEntries(sFolder, 0, 2)
+        oStore = PackStore(sFolder)
+        assert oStore.get(getKey(0)) == getEntries(0)
+
+        oOtherStore = PackStore(sFolder)
+        oOtherStore.put(getKey(1), getEntries(5))
+        oOtherStore.close()
+        # Still readable, then reloaded when writing
+        assert oStore.get(getKey(1)) == getEntries(1)
+        oStore.put(getKey(2), getEntries(2))
+        assert oStore.getMany([getKey(1), getKey(2)]) == {getKey(1): getEntries(5), getKey(2): getEntries(2)}
+        oStore.close()
+
+    def test_damagedFiles(self, tmp_path):
+        sFolder = str(tmp_path)
+        putEntries(sFolder, 0, 3)
+        # Partial record, e.g. from an interrupted process
+        with open(os.path.join(sFolder, "pack"), "ab") as oFile:
+            oFile.write(bytes.fromhex(getKey(3)) + b"\x05\x00")
+        oStore = PackStore(sFolder)
+        oStore.put(getKey(4), getEntries(4))
+        assert oStore.getMany([getKey(i) for i in range(5)]) \
+            == {getKey(i): getEntries(i) for i in (0, 1, 2, 4)}
+        oStore.close()
+
+        # Files from different generations
+        with open(os.path.join(sFolder, "strings"), "r+b") as oFile:
+            oFile.seek(len(packstore.STRINGS_MAGIC))
+            oFile.write(b"\xff\xff\xff\xff")
+        assert PackStore(sFolder).get(getKey(0)) is None
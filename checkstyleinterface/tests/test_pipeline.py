@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_pipeline.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+
+import os
+import threading
+
+import pytest
+
+from checkstyleinterface import main, session
+from checkstyleinterface.benchmark.synthetic import generateRepository
+from checkstyleinterface.session import CheckstyleSession, listFiles
+from checkstyleinterface.stats import RunStats
+from checkstyleinterface.tests.util import getErrorKeys, useStubCheckstyle, writeJavaFiles
+
+
+class TestPipeline:
+    @pytest.mark.parametrize("iJobs", [1, 3])
+    def test_foldersAndGit(self, tmp_path, monkeypatch, iJobs):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        sRepoFolder = os.path.join(sFolder, "repo")
+        generateRepository(sRepoFolder, 20, fViolationDensity=0.2, fChangedFilesRatio=0.5)
+        lArgs = ["-j", sJarFile, "-c", os.path.join(sRepoFolder, "checkstyle.xml"), "--jobs", str(iJobs)]
+        lAllErrors = main.runCheckstyle(main.parseArgs(lArgs + ["-d", os.path.join(sRepoFolder, "java"), "-r"]))
+        dChangedLines = main.getChangedLines(main.parseArgs(lArgs + ["-g", sRepoFolder]))
+        assert dChangedLines
+
+        # The files of the git repository are limited to their changed lines, even when also in a listed folder
+        oRunStats = RunStats(None)
+        lErrors = main.runCheckstyle(main.parseArgs(lArgs + ["-d", os.path.join(sRepoFolder, "java"), "-r",
+                                                             "-g", sRepoFolder, "-l"]), oRunStats)
+        assert getErrorKeys(lErrors) == getErrorKeys(e for e in lAllErrors
+                                                     if e.iLine in dChangedLines.get(e.sFile, [e.iLine]))
+        assert oRunStats.iFileCount == 20
+        assert set(oRunStats.dPhases) == {"files", "checkstyle"}
+
+    def test_analysisStartsDuringDiscovery(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        writeJavaFiles(os.path.join(sFolder, "fast"), 2, {0: "// violation(error, MagicNumber) '0'."})
+        writeJavaFiles(os.path.join(sFolder, "slow"), 2, {1: "// violation(warning, LineLength) Too long."})
+        oCommandsReady = threading.Event()
+
+        def getCommands(*args, xGet=session.getCommands):
+            oCommandsReady.set()
+            return xGet(*args)
+        monkeypatch.setattr(session, "getCommands", getCommands)
+
+        def listSlowFiles():
+            # Only returns once the files of the other source are being analyzed
+            assert oCommandsReady.wait(10)
+            return listFiles([], [os.path.join(sFolder, "slow")])
+
+        oSession = CheckstyleSession(sJarFile, iJobs=2)
+        lErrors = list(oSession.iterCheckSources([listSlowFiles,
+                                                  lambda: listFiles([], [os.path.join(sFolder, "fast")])]))
+        assert sorted(e.sCategory for e in lErrors) == ["LineLengthCheck", "MagicNumberCheck"]
+
+    def test_singleRunWithOneJob(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        writeJavaFiles(os.path.join(sFolder, "a"), 2, {0: "// violation(error, MagicNumber) '0'."})
+        writeJavaFiles(os.path.join(sFolder, "b"), 2, {})
+        lCommands = []
+
+        def getCommands(*args, xGet=session.getCommands):
+            lGroupCommands = xGet(*args)
+            lCommands.extend(lGroupCommands)
+            return lGroupCommands
+        monkeypatch.setattr(session, "getCommands", getCommands)
+
+        lErrors = CheckstyleSession(sJarFile).check([os.path.join(sFolder, "a"), os.path.join(sFolder, "b")])
+        assert [e.sCategory for e in lErrors] == ["MagicNumberCheck"]
+        assert [o.lPaths for o in lCommands] == [[os.path.join(sFolder, "a"), os.path.join(sFolder, "b")]]
+
+    def test_sourceError(self, tmp_path, monkeypatch):
+        sJarFile = useStubCheckstyle(str(tmp_path), monkeypatch)
+
+        def listFailingSource():
+            raise OSError("Unreadable")
+
+        with pytest.raises(OSError):
+            list(CheckstyleSession(sJarFile).iterCheckSources([listFailingSource]))
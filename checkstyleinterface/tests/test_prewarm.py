@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_prewarm.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+
+import os
+import subprocess
+
+from checkstyleinterface import main
+from checkstyleinterface.stats import RunStats
+from checkstyleinterface.tests.util import useStubCheckstyle, writeJavaFiles
+
+
+def runGit(sGitFolder, *lArgs):
+    subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.com"] + list(lArgs),
+                   cwd=sGitFolder, check=True, capture_output=True)
+
+
+class TestPrewarm:
+    def test_addPrewarmHooks(self, tmp_path, monkeypatch):
+        sGitFolder = os.path.join(str(tmp_path), "repo")
+        sJarFile = useStubCheckstyle(str(tmp_path), monkeypatch)
+        os.makedirs(sGitFolder)
+        runGit(sGitFolder, "init")
+
+        assert main.addGitHook(main.parseArgs(["-g", sGitFolder, "-j", sJarFile, "-k", "--prewarm-hooks"])) == 0
+        sHookFolder = os.path.join(sGitFolder, ".git", "hooks")
+        with open(os.path.join(sHookFolder, "pre-commit"), "r") as oFile:
+            assert "--cache" in oFile.read()
+        for sHookName, sRevision in [("post-checkout", '"$1"'), ("post-merge", "ORIG_HEAD")]:
+            with open(os.path.join(sHookFolder, sHookName), "r") as oFile:
+                sContent = oFile.read()
+            assert "--prewarm %s --detach" % sRevision in sContent
+            assert "--cache" in sContent
+
+    def test_prewarm(self, tmp_path, monkeypatch):
+        sGitFolder = os.path.join(str(tmp_path), "repo")
+        sJarFile = useStubCheckstyle(str(tmp_path), monkeypatch)
+        writeJavaFiles(sGitFolder, 3, {1: "// violation(error, MagicNumber) '0'."})
+        runGit(sGitFolder, "init")
+        runGit(sGitFolder, "add", ".")
+        runGit(sGitFolder, "commit", "-m", "First")
+        writeJavaFiles(os.path.join(sGitFolder, "more"), 2, {1: "// violation(warning, LineLength) Too long."})
+        runGit(sGitFolder, "add", ".")
+        runGit(sGitFolder, "commit", "-m", "Second")
+
+        assert main.runPrewarm(main.parseArgs(["--prewarm", "HEAD~1", "-g", sGitFolder, "-j", sJarFile])) == 0
+
+        # The files changed by the second commit are served from the cache
+        oArgs = main.parseArgs(["-g", sGitFolder, "-m", "push", "-j", sJarFile, "--cache"])
+        oRunStats = RunStats(None)
+        lErrors = main.runCheckstyle(oArgs, oRunStats)
+        assert oRunStats.iCacheHits > 0
+        assert oRunStats.getCacheHitRate() == 1
+        assert [e.sCategory for e in lErrors if e.sSeverity == "warning"] == ["LineLengthCheck"]
+
+    def test_prewarm_unknownRevision(self, tmp_path, monkeypatch):
+        sGitFolder = os.path.join(str(tmp_path), "repo")
+        sJarFile = useStubCheckstyle(str(tmp_path), monkeypatch)
+        writeJavaFiles(sGitFolder, 1, {})
+        runGit(sGitFolder, "init")
+        runGit(sGitFolder, "add", ".")
+        runGit(sGitFolder, "commit", "-m", "First")
+
+        # e.g. the null revision given by Git to post-checkout after a clone
+        assert main.runPrewarm(main.parseArgs(["--prewarm", "0" * 40, "-g", sGitFolder, "-j", sJarFile])) == 0
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_profiles.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+
+import collections
+import os
+
+import pytest
+
+from checkstyleinterface import main, profiles, runner, session
+from checkstyleinterface.profiles import PROFILES, getDefaultProfile
+from checkstyleinterface.session import CheckstyleSession
+from checkstyleinterface.stats import RunStats
+from checkstyleinterface.tests.util import getErrorKeys, useStubCheckstyle, writeJavaFiles
+
+VirtualMemory = collections.namedtuple("VirtualMemory", ["total", "available"])
+
+
+@pytest.fixture
+def machine(monkeypatch):
+    """8 cores and 8 GB of available memory out of 16 GB."""
+    monkeypatch.setattr(profiles.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(profiles.psutil, "virtual_memory",
+                        lambda: VirtualMemory(16 * 1024 * profiles.MEGABYTE, 8 * 1024 * profiles.MEGABYTE))
+
+
+class TestProfiles:
+    def test_heapSize(self, machine):
+        # At least the default heap of the JVM, a quarter of the physical memory, or more for many files
+        assert PROFILES["ci"].getHeapSize(100, 1) == 4096
+        # Within a share of the available memory, shared by the processes
+        oProfile = PROFILES["interactive"]
+        assert oProfile.getHeapSize(100, 1) == 2048
+        assert oProfile.getHeapSize(100000, 1) == 2048
+        assert oProfile.getHeapSize(100000, 4) == 512
+        assert oProfile.getHeapSize(100000, 100) == profiles.MIN_HEAP_MB
+        assert PROFILES["ci"].getHeapSize(100000, 4) == 1536
+        assert PROFILES["ci"].getHeapSize(100000, 1) == 6144
+
+    def test_jvmArgs(self, machine):
+        # The default heap of the JVM is never lowered for a single foreground process
+        lBaseArgs = ["java", "-jar", "checkstyle.jar"]
+        assert PROFILES["ci"].getJvmArgs(lBaseArgs, 100, 1) == lBaseArgs
+        assert PROFILES["interactive"].getJvmArgs(lBaseArgs, 100000, 1) == lBaseArgs
+        # But the parallel and background processes are kept within their share of the memory
+        assert PROFILES["ci"].getJvmArgs(lBaseArgs, 100, 4) == ["java", "-Xmx1536m", "-jar", "checkstyle.jar"]
+        assert PROFILES["background"].getJvmArgs(lBaseArgs, 100, 1) == ["java", "-Xmx819m", "-jar", "checkstyle.jar"]
+        assert PROFILES["ci"].getJvmArgs(lBaseArgs, 100000, 1) == ["java", "-Xmx6144m", "-jar", "checkstyle.jar"]
+
+    def test_jobCount(self, machine, monkeypatch):
+        assert PROFILES["ci"].getJobCount() == 8
+        assert PROFILES["interactive"].getJobCount() == 4
+        assert PROFILES["background"].getJobCount() == 1
+        # Not more processes than the memory allows
+        monkeypatch.setattr(profiles.psutil, "virtual_memory",
+                            lambda: VirtualMemory(16 * 1024 * profiles.MEGABYTE, 1024 * profiles.MEGABYTE))
+        assert PROFILES["ci"].getJobCount() == 1
+
+    def test_defaultProfile(self, monkeypatch):
+        monkeypatch.delenv("CHECKINTER_PROFILE", raising=False)
+        monkeypatch.delenv("CI", raising=False)
+        assert getDefaultProfile() is None
+        monkeypatch.setenv("CI", "true")
+        assert getDefaultProfile() == "ci"
+        monkeypatch.setenv("CHECKINTER_PROFILE", "Background")
+        assert getDefaultProfile() == "background"
+        monkeypatch.setenv("CHECKINTER_PROFILE", "foo")
+        with pytest.raises(SystemExit):
+            main.parseArgs(["-f", "Foo.java"])
+
+    def test_session(self, tmp_path, monkeypatch, machine):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        sJavaFolder = os.path.join(sFolder, "java")
+        writeJavaFiles(sJavaFolder, 6, {0: "// violation(error, MagicNumber) '0'."})
+        sCacheFolder = os.path.join(sFolder, "results")
+        lCommands = []
+
+        def getCommands(*args, xGet=session.getCommands):
+            lGroupCommands = xGet(*args)
+            lCommands.extend(lGroupCommands)
+            return lGroupCommands
+        monkeypatch.setattr(session, "getCommands", getCommands)
+        lLowered = []
+        monkeypatch.setattr(runner, "lowerPriority", lLowered.append)
+
+        oSession = CheckstyleSession(sJarFile, iJobs=0, sCacheFolder=sCacheFolder, sProfile="background")
+        assert oSession.iJobs == 1
+        lErrors = oSession.check([sJavaFolder])
+        oSession.close()
+        assert len(lErrors) == 1
+        assert lCommands[0].getArgs()[:2] == ["java", "-Xmx819m"]
+        assert len(lLowered) == 1
+
+        # The heap does not change the results
+        oRunStats = RunStats(None)
+        oSession = CheckstyleSession(sJarFile, sCacheFolder=sCacheFolder)
+        assert getErrorKeys(oSession.iterCheck([sJavaFolder], oRunStats=oRunStats)) == getErrorKeys(lErrors)
+        assert oRunStats.getCacheHitRate() == 1
+
+        with pytest.raises(ValueError):
+            CheckstyleSession(sJarFile, sProfile="foo")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_report.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import json
+import os
+
+import pytest
+
+from checkstyleinterface import main
+from checkstyleinterface.report import Report, openReport
+from checkstyleinterface.stats import RunStats
+from checkstyleinterface.tests.util import makeError, useStubCheckstyle, writeJavaFiles
+
+VIOLATIONS = {
+    0: "// violation(error, MagicNumber) '0' is a magic number.",
+    1: "// violation(warning, LineLength) Line is too long.",
+    3: "// violation(info, JavadocMethod) Missing a Javadoc comment."
+}
+
+
+class TestReport:
+    def runBatch(self, sFolder, oMonkeypatch, lArgs):
+        sJarFile = useStubCheckstyle(sFolder, oMonkeypatch)
+        writeJavaFiles(os.path.join(sFolder, "java"), 4, VIOLATIONS)
+        oArgs = main.parseArgs(["-d", os.path.join(sFolder, "java"), "-j", sJarFile, "-b"] + lArgs)
+        return main.runBatchMode(oArgs, RunStats("batch"))
+
+    def test_jsonLinesOnStdout(self, tmp_path, monkeypatch, capsys):
+        assert self.runBatch(str(tmp_path), monkeypatch, ["--report-format", "jsonl"]) == 1
+        lLines = [json.loads(s) for s in capsys.readouterr().out.splitlines()]
+        dErrors = {d["category"]: d for d in lLines[:-1]}
+        assert sorted(dErrors.keys()) == ["JavadocMethodCheck", "LineLengthCheck", "MagicNumberCheck"]
+        assert dErrors["MagicNumberCheck"]["severity"] == "error"
+        assert dErrors["MagicNumberCheck"]["line"] == 2
+        assert lLines[-1] == {"summary": {"errors": 1, "warnings": 1, "infos": 1, "files": 3}}
+
+    def test_sarifFile(self, tmp_path, monkeypatch):
+        sReportFile = os.path.join(str(tmp_path), "out", "report.sarif")
+        assert self.runBatch(str(tmp_path), monkeypatch,
+                             ["--report-format", "sarif", "--report-file", sReportFile]) == 1
+        with open(sReportFile) as oFile:
+            dSarif = json.load(oFile)
+        dRun = dSarif["runs"][0]
+        assert sorted(d["level"] for d in dRun["results"]) == ["error", "note", "warning"]
+        assert [d["id"] for d in dRun["tool"]["driver"]["rules"]] == ["JavadocMethodCheck", "LineLengthCheck",
+                                                                      "MagicNumberCheck"]
+        assert dRun["results"][0]["locations"][0]["physicalLocation"]["region"]["startLine"] == 2
+        assert dRun["properties"]["summary"]["errors"] == 1
+
+    def test_failFastReport(self, tmp_path, monkeypatch, capsys):
+        assert self.runBatch(str(tmp_path), monkeypatch, ["--report-format", "jsonl", "--fail-fast"]) == 1
+        lLines = [json.loads(s) for s in capsys.readouterr().out.splitlines()]
+        # The analysis stops on the error, there is nothing after it but the summary
+        assert lLines[-2]["severity"] == "error"
+        assert lLines[-1]["summary"]["errors"] == 1
+
+    def test_sarifFileAfterFailure(self, tmp_path):
+        sReportFile = os.path.join(str(tmp_path), "report.sarif")
+        with pytest.raises(RuntimeError):
+            with openReport("sarif", sReportFile) as oReport:
+                oReport.write(makeError(os.path.join(str(tmp_path), "A.java"), 3, "error", "MagicNumberCheck",
+                                        "Magic."))
+                raise RuntimeError("Checkstyle failed")
+        # The report is still complete, with the errors reported before the failure
+        with open(sReportFile) as oFile:
+            dSarif = json.load(oFile)
+        assert [d["ruleId"] for d in dSarif["runs"][0]["results"]] == ["MagicNumberCheck"]
+
+    def test_abstractReport(self):
+        with pytest.raises(TypeError):
+            Report(None)
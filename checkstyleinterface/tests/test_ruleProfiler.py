@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_ruleProfiler.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+
+import os
+
+import pytest
+
+from checkstyleinterface import configs
+from checkstyleinterface.ruleprofiler import RuleProfiler, runProfileRulesCommand
+from checkstyleinterface.tests.util import useStubCheckstyle, writeJavaFiles
+
+
+def writeConfig(sConfigFile):
+    with open(sConfigFile, "w") as oFile:
+        oFile.write('<?xml version="1.0"?>\n<module name="Checker">\n<module name="SuppressionFilter"/>\n'
+                    '<module name="TreeWalker">\n<module name="MethodLength"/>\n<module name="MagicNumber"/>\n'
+                    '<module name="LineLength"><property name="id" value="shortLines"/></module>\n'
+                    '</module>\n</module>\n')
+
+
+class TestRuleProfiler:
+    def test_getCheckModules(self, tmp_path):
+        sConfigFile = os.path.join(str(tmp_path), "checkstyle.xml")
+        writeConfig(sConfigFile)
+        assert configs.getCheckModules(sConfigFile) == ["MethodLength", "MagicNumber", "shortLines"]
+        sDerivedFile = configs.getDerivedConfig(sConfigFile, ["MagicNumber"], str(tmp_path), bKeepOnly=True)
+        with open(sDerivedFile, "r") as oFile:
+            sContent = oFile.read()
+        assert "MagicNumber" in sContent and "SuppressionFilter" in sContent
+        assert "MethodLength" not in sContent and "LineLength" not in sContent
+
+    @pytest.mark.parametrize("bLeaveOneOut", [False, True])
+    def test_profile(self, tmp_path, monkeypatch, bLeaveOneOut):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        monkeypatch.setenv("CHECKSTYLE_STUB_MODULE_COSTS", "MagicNumber=0.05,LineLength=0.015")
+        writeJavaFiles(os.path.join(sFolder, "java"), 10, {})
+        sConfigFile = os.path.join(sFolder, "checkstyle.xml")
+        writeConfig(sConfigFile)
+
+        oProfiler = RuleProfiler(sJarFile, sConfigFile, None, sorted(
+            os.path.join(sFolder, "java", s) for s in os.listdir(os.path.join(sFolder, "java"))), iRepeat=1)
+        fBaseline, fFull, lCosts = oProfiler.profile(bLeaveOneOut)
+        assert [sCategory for sCategory, _ in lCosts] == ["MagicNumber", "shortLines", "MethodLength"]
+        assert 0.3 < lCosts[0][1] < 1.5
+        assert fFull - fBaseline > 0.5
+
+    def test_command(self, tmp_path, monkeypatch, capsys):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        monkeypatch.setenv("CHECKSTYLE_STUB_MODULE_COSTS", "MagicNumber=0.01")
+        writeJavaFiles(os.path.join(sFolder, "java"), 20, {})
+        sConfigFile = os.path.join(sFolder, "checkstyle.xml")
+        writeConfig(sConfigFile)
+
+        assert runProfileRulesCommand([os.path.join(sFolder, "java"), "-j", sJarFile, "-c", sConfigFile,
+                                       "--sample", "5", "--repeat", "1", "--top", "2"]) == 0
+        sOutput = capsys.readouterr().out
+        assert "on 5 files" in sOutput
+        lRows = sOutput.splitlines()[-2:]
+        assert lRows[0].endswith("MagicNumber")
+        assert runProfileRulesCommand([os.path.join(sFolder, "java"), "-j", sJarFile, "-c",
+                                       os.path.join(sFolder, "missing.xml")]) == 1
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_runFailFast.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+import subprocess
+import time
+
+import pytest
+
+from checkstyleinterface import main
+from checkstyleinterface.tests.util import useStubCheckstyle, writeJavaFiles
+
+
+class TestRunFailFast:
+    @pytest.mark.parametrize("iJobs", [1, 3])
+    def test_stopsOnFirstError(self, tmp_path, monkeypatch, iJobs):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        # 40 files at 10 files per second: the full analysis would take 4 seconds
+        monkeypatch.setenv("CHECKSTYLE_STUB_RATE", "10")
+        writeJavaFiles(os.path.join(sFolder, "java"), 40, {0: "// violation(error, MagicNumber) '0'."})
+
+        fStart = time.perf_counter()
+        oError = main.findFirstCheckstyleError(main.parseArgs(["-d", os.path.join(sFolder, "java"), "-j", sJarFile,
+                                                               "-b", "--fail-fast", "--jobs", str(iJobs)]))
+        assert time.perf_counter() - fStart < 2
+        assert oError.sCategory == "MagicNumberCheck"
+        assert oError.iLine == 2
+
+    @pytest.mark.parametrize("iJobs", [1, 3])
+    def test_ignoresWarningsAndFilteredLines(self, tmp_path, monkeypatch, iJobs):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        writeJavaFiles(os.path.join(sFolder, "java"), 6, {1: "// violation(warning, LineLength) Too long.",
+                                                          4: "// violation(info, JavadocMethod) Missing."})
+        oArgs = main.parseArgs(["-d", os.path.join(sFolder, "java"), "-j", sJarFile, "-b", "--fail-fast",
+                                "--jobs", str(iJobs)])
+        assert main.findFirstCheckstyleError(oArgs) is None
+
+    def test_failsWhenNoReport(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        writeJavaFiles(os.path.join(sFolder, "java"), 1, {})
+        sConfigFile = os.path.join(sFolder, "config.xml")
+        with open(sConfigFile, "w") as oFile:
+            oFile.write("foobar")
+        with pytest.raises(subprocess.CalledProcessError):
+            main.findFirstCheckstyleError(main.parseArgs(["-d", os.path.join(sFolder, "java"), "-j", sJarFile,
+                                                          "-c", sConfigFile, "-b", "--fail-fast"]))
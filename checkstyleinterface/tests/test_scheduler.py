@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_scheduler.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+
+import pytest
+
+from checkstyleinterface import main
+from checkstyleinterface.benchmark.synthetic import generateRepository
+from checkstyleinterface.scheduler import CostModel, scheduleShards
+from checkstyleinterface.tests.util import useStubCheckstyle
+
+
+def writeFile(sFile, iSize):
+    with open(sFile, "w") as oFile:
+        oFile.write("x" * iSize)
+    return sFile
+
+
+class TestScheduler:
+    def test_scheduleShards_largestFirst(self, tmp_path):
+        sBigFile = writeFile(os.path.join(str(tmp_path), "Big.java"), 10000)
+        lSmallFiles = [writeFile(os.path.join(str(tmp_path), "Small%d.java" % i), 900) for i in range(10)]
+        lShards = scheduleShards(lSmallFiles + [sBigFile], 2)
+        assert lShards == [[sBigFile], lSmallFiles]
+
+    def test_scheduleShards_balanced(self, tmp_path):
+        lFiles = [writeFile(os.path.join(str(tmp_path), "F%d.java" % i), iSize)
+                  for i, iSize in enumerate([7, 5, 4, 3, 3, 2, 2, 1, 1])]
+        lShards = scheduleShards(lFiles, 3)
+        assert sorted(f for lShard in lShards for f in lShard) == sorted(lFiles)
+        lLoads = [sum(os.path.getsize(f) for f in lShard) for lShard in lShards]
+        assert max(lLoads) - min(lLoads) <= 1
+
+    def test_scheduleShards_fewFiles(self, tmp_path):
+        lFiles = [writeFile(os.path.join(str(tmp_path), "F%d.java" % i), 10) for i in range(2)]
+        assert len(scheduleShards(lFiles, 8)) == 2
+        assert scheduleShards([], 8) == []
+
+    def test_costModel_history(self, tmp_path):
+        sHistoryFile = os.path.join(str(tmp_path), "cache", "costs.json")
+        sSlowFile = writeFile(os.path.join(str(tmp_path), "Slow.java"), 100)
+        sFastFile = writeFile(os.path.join(str(tmp_path), "Fast.java"), 100)
+        oCostModel = CostModel(sHistoryFile)
+        oCostModel.recordShard([sSlowFile], 5.0)
+        oCostModel.recordShard([sFastFile], 1.0)
+        oCostModel.save()
+
+        oCostModel = CostModel(sHistoryFile)
+        assert oCostModel.getCost(sSlowFile) == pytest.approx(5.0)
+        assert oCostModel.getCost(sFastFile) == pytest.approx(1.0)
+        assert scheduleShards([sFastFile, sSlowFile], 2, oCostModel) == [[sSlowFile], [sFastFile]]
+
+    def test_runCheckstyle_parallel(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        generateRepository(os.path.join(sFolder, "repo"), 30, fViolationDensity=0.1, bGit=False)
+
+        lArgs = ["-d", os.path.join(sFolder, "repo", "java"), "-r", "-j", sJarFile]
+        lSerialErrors = main.runCheckstyle(main.parseArgs(lArgs))
+        lParallelErrors = main.runCheckstyle(main.parseArgs(lArgs + ["--jobs", "3"]))
+        assert lSerialErrors
+        assert sorted((e.sFile, e.iLine) for e in lParallelErrors) == sorted((e.sFile, e.iLine) for e in lSerialErrors)
+        assert os.path.isfile(os.path.join(sFolder, "cache", "costs.json"))
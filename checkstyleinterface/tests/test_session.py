@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_session.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+import subprocess
+
+import pytest
+
+from checkstyleinterface import main, session
+from checkstyleinterface.benchmark.synthetic import generateRepository
+from checkstyleinterface.session import CheckstyleSession
+from checkstyleinterface.stats import RunStats
+from checkstyleinterface.tests.util import getErrorKeys, useStubCheckstyle, writeJavaFiles
+
+
+@pytest.fixture
+def commandsSpy(monkeypatch):
+    lCommands = []
+
+    def getCommands(*args, xGet=session.getCommands):
+        lGroupCommands = xGet(*args)
+        lCommands.extend(lGroupCommands)
+        return lGroupCommands
+    monkeypatch.setattr(session, "getCommands", getCommands)
+    return lCommands
+
+
+class TestSession:
+    def test_check(self, tmp_path, monkeypatch, commandsSpy):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        sJavaFolder = os.path.join(sFolder, "java")
+        writeJavaFiles(sJavaFolder, 4, {1: "// violation(error, MagicNumber) '0'.",
+                                        2: "// violation(warning, LineLength) Too long."})
+        oSession = CheckstyleSession(sJarFile)
+
+        lErrors = oSession.check([sJavaFolder])
+        assert len(lErrors) == 2
+        assert len(commandsSpy) == 1
+        assert getErrorKeys(lErrors) == getErrorKeys(main.runCheckstyle(main.parseArgs(["-d", sJavaFolder, "-r",
+                                                                                        "-j", sJarFile])))
+
+        # Unchanged files: served from the cache, without running Checkstyle
+        commandsSpy.clear()
+        oRunStats = RunStats(None)
+        assert getErrorKeys(oSession.iterCheck([sJavaFolder], oRunStats=oRunStats)) == getErrorKeys(lErrors)
+        assert commandsSpy == []
+        assert oRunStats.getCacheHitRate() == 1
+
+        # Only the modified file is analyzed again
+        sModifiedFile = os.path.join(sJavaFolder, "Class002.java")
+        with open(sModifiedFile, "w") as oFile:
+            oFile.write("public class Class002 {\n}\n")
+        lErrors = oSession.check([sJavaFolder, os.path.join(sJavaFolder, "Class001.java")])
+        assert [o.lPaths for o in commandsSpy] == [[sModifiedFile]]
+        assert [e.sCategory for e in lErrors] == ["MagicNumberCheck"]
+
+    def test_checkGit(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        sRepoFolder = os.path.join(sFolder, "repo")
+        generateRepository(sRepoFolder, 20, fViolationDensity=0.2, fChangedFilesRatio=0.5)
+        lArgs = ["-g", sRepoFolder, "-j", sJarFile, "-c", os.path.join(sRepoFolder, "checkstyle.xml")]
+        oSession = CheckstyleSession(sJarFile, os.path.join(sRepoFolder, "checkstyle.xml"))
+        for bLinesOnly in [False, True]:
+            lExpected = getErrorKeys(main.runCheckstyle(main.parseArgs(lArgs + (["-l"] if bLinesOnly else []))))
+            assert lExpected
+            assert getErrorKeys(oSession.checkGit(sRepoFolder, bLinesOnly=bLinesOnly)) == lExpected
+
+    def test_interruptedRunNotCached(self, tmp_path, monkeypatch, commandsSpy):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        sJavaFolder = os.path.join(sFolder, "java")
+        writeJavaFiles(sJavaFolder, 3, {0: "// violation(error, MagicNumber) '0'."})
+        oSession = CheckstyleSession(sJarFile)
+
+        oErrors = oSession.iterCheck([sJavaFolder])
+        assert next(oErrors).sCategory == "MagicNumberCheck"
+        oErrors.close()
+        assert len(oSession.check([sJavaFolder])) == 1
+        assert len(commandsSpy) == 2
+
+    def test_sharedCacheFolder(self, tmp_path, monkeypatch, commandsSpy):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        sJavaFolder = os.path.join(sFolder, "java")
+        writeJavaFiles(sJavaFolder, 3, {0: "// violation(error, MagicNumber) '0'."})
+        sCacheFolder = os.path.join(sFolder, "results")
+
+        lErrors = CheckstyleSession(sJarFile, sCacheFolder=sCacheFolder).check([sJavaFolder])
+        assert getErrorKeys(CheckstyleSession(sJarFile, sCacheFolder=sCacheFolder).check([sJavaFolder])) \
+            == getErrorKeys(lErrors)
+        assert len(commandsSpy) == 1
+        # Another configuration does not share the results
+        sConfigFile = os.path.join(sFolder, "config.xml")
+        with open(sConfigFile, "w") as oFile:
+            oFile.write('<module name="Checker"><module name="TreeWalker"><module name="LineLength"/>'
+                        '</module></module>')
+        assert CheckstyleSession(sJarFile, sConfigFile, sCacheFolder=sCacheFolder).check([sJavaFolder]) == []
+        assert len(commandsSpy) == 2
+
+    def test_invalidOptions(self):
+        with pytest.raises(ValueError):
+            CheckstyleSession("checkstyle.jar", sHandoff="foo")
+        with pytest.raises(ValueError):
+            CheckstyleSession("checkstyle.jar", sTransport="foo")
+
+    def test_newOnly(self, tmp_path, monkeypatch, commandsSpy):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        sRepoFolder = os.path.join(sFolder, "repo")
+        writeJavaFiles(sRepoFolder, 2, {0: "// violation(error, MagicNumber) '0'.",
+                                        1: "// violation(warning, LineLength) Too long."})
+        for lArgs in [["init", "-q"], ["add", "."], ["commit", "-q", "-m", "Base"]]:
+            subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.com"] + lArgs,
+                           cwd=sRepoFolder, check=True)
+        # The existing error moves down, a new one is added, and a new file is created
+        sChangedFile = os.path.join(sRepoFolder, "Class000.java")
+        with open(sChangedFile, "w") as oFile:
+            oFile.write("public class Class000 {\n    int j = 1; // violation(warning, LineLength) Too long.\n"
+                        "    int i = 0; // violation(error, MagicNumber) '0'.\n}\n")
+        sNewFile = os.path.join(sRepoFolder, "Class002.java")
+        with open(sNewFile, "w") as oFile:
+            oFile.write("public class Class002 {\n    int i = 0; // violation(error, MagicNumber) '0'.\n}\n")
+        subprocess.run(["git", "add", "Class002.java"], cwd=sRepoFolder, check=True)
+
+        oSession = CheckstyleSession(sJarFile)
+        assert len(list(oSession.iterCheckPaths(lGitFolders=[sRepoFolder]))) == 3
+        lExpected = [(sChangedFile, 2, "warning", "LineLengthCheck", "Too long."),
+                     (sNewFile, 2, "error", "MagicNumberCheck", "'0'.")]
+        # The current versions are in the cache of the session, only the base one of the changed file is checked
+        commandsSpy.clear()
+        assert getErrorKeys(oSession.iterCheckPaths(lGitFolders=[sRepoFolder], sBaseRevision="")) == lExpected
+        assert [len(o.lPaths) for o in commandsSpy] == [1]
+
+        # The base versions are served from the cache folder, even to another session
+        commandsSpy.clear()
+        lArgs = ["-g", sRepoFolder, "-j", sJarFile, "--new-only"]
+        assert getErrorKeys(main.runCheckstyle(main.parseArgs(lArgs))) == lExpected
+        assert [len(o.lPaths) for o in commandsSpy] == [2]
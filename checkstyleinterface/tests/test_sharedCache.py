@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_sharedCache.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+
+import os
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from checkstyleinterface import main
+from checkstyleinterface.cache import HttpStore, SharedCache
+from checkstyleinterface.cacheserver import createServer, runCacheServerCommand
+from checkstyleinterface.session import CheckstyleSession
+from checkstyleinterface.stats import RunStats
+from checkstyleinterface.tests.util import getErrorKeys, useStubCheckstyle, writeJavaFiles
+
+
+@pytest.fixture
+def cacheServerUrl(tmp_path):
+    oServer = createServer(str(tmp_path / "server"), "127.0.0.1")
+    oThread = threading.Thread(target=oServer.serve_forever, daemon=True)
+    oThread.start()
+    yield "http://127.0.0.1:%d" % oServer.server_address[1]
+    oServer.shutdown()
+    oServer.server_close()
+
+
+class SlowStore:
+    iBatchSize = 1
+
+    def getMany(self, lKeys):
+        time.sleep(2)
+        return {sKey: [(1, 1, "error", "MagicNumberCheck", "Magic.")] for sKey in lKeys}
+
+
+class TestSharedCache:
+    @pytest.mark.parametrize("bHttp", [True, False])
+    def test_sharedBetweenSessions(self, tmp_path, monkeypatch, cacheServerUrl, bHttp):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        sJavaFolder = os.path.join(sFolder, "java")
+        writeJavaFiles(sJavaFolder, 3, {0: "// violation(error, MagicNumber) '0'."})
+        sSharedCache = cacheServerUrl if bHttp else os.path.join(sFolder, "shared")
+
+        oSession = CheckstyleSession(sJarFile, sCacheFolder=os.path.join(sFolder, "a"), sSharedCache=sSharedCache)
+        lErrors = oSession.check([sJavaFolder])
+        oSession.close()
+
+        # Another machine, with its own local cache
+        oRunStats = RunStats(None)
+        oSession = CheckstyleSession(sJarFile, sCacheFolder=os.path.join(sFolder, "b"), sSharedCache=sSharedCache)
+        assert getErrorKeys(oSession.iterCheck([sJavaFolder], oRunStats=oRunStats)) == getErrorKeys(lErrors)
+        assert oRunStats.getCacheHitRate() == 1
+        oSession.close()
+        # Read through the local cache
+        oRunStats = RunStats(None)
+        oSession = CheckstyleSession(sJarFile, sCacheFolder=os.path.join(sFolder, "b"))
+        assert getErrorKeys(oSession.iterCheck([sJavaFolder], oRunStats=oRunStats)) == getErrorKeys(lErrors)
+        assert oRunStats.getCacheHitRate() == 1
+
+        oArgs = main.parseArgs(["-d", sJavaFolder, "-j", sJarFile, "--shared-cache", sSharedCache])
+        oRunStats = RunStats(None)
+        assert getErrorKeys(main.runCheckstyle(oArgs, oRunStats)) == getErrorKeys(lErrors)
+        assert oRunStats.getCacheHitRate() == 1
+
+    def test_sharedBetweenCheckouts(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        sSharedCache = os.path.join(sFolder, "shared")
+
+        def makeCheckout(sRootFolder):
+            # The JAR and the configuration are also at other locations on another machine
+            os.makedirs(os.path.join(sRootFolder, ".git"))
+            writeJavaFiles(os.path.join(sRootFolder, "java"), 3, {0: "// violation(error, MagicNumber) '0'."})
+            shutil.copy(sJarFile, os.path.join(sRootFolder, "checkstyle.jar"))
+            with open(os.path.join(sRootFolder, "checkstyle.xml"), "w") as oFile:
+                oFile.write('<module name="Checker"><module name="TreeWalker"><module name="MagicNumber"/>'
+                            '</module></module>')
+            return CheckstyleSession(os.path.join(sRootFolder, "checkstyle.jar"),
+                                     sConfigFile=os.path.join(sRootFolder, "checkstyle.xml"),
+                                     sCacheFolder=os.path.join(sRootFolder, "cache"), sSharedCache=sSharedCache)
+
+        oSession = makeCheckout(os.path.join(sFolder, "a", "repo"))
+        lErrors = oSession.check([os.path.join(sFolder, "a", "repo", "java")])
+        oSession.close()
+
+        oRunStats = RunStats(None)
+        oSession = makeCheckout(os.path.join(sFolder, "b", "work", "checkout"))
+        sJavaFolder = os.path.join(sFolder, "b", "work", "checkout", "java")
+        lOtherErrors = list(oSession.iterCheck([sJavaFolder], oRunStats=oRunStats))
+        oSession.close()
+        assert oRunStats.getCacheHitRate() == 1
+        assert [os.path.basename(e.sFile) for e in lErrors] == ["Class000.java"]
+        assert [e.sFile for e in lOtherErrors] == [os.path.join(sJavaFolder, "Class000.java")]
+
+    def test_unreachable(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        sJavaFolder = os.path.join(sFolder, "java")
+        writeJavaFiles(sJavaFolder, 2, {0: "// violation(error, MagicNumber) '0'."})
+
+        oSession = CheckstyleSession(sJarFile, sSharedCache="http://127.0.0.1:1")
+        assert len(oSession.check([sJavaFolder])) == 1
+        assert not oSession.oSharedCache.bAvailable
+        oSession.close()
+
+    def test_timeout(self):
+        oSharedCache = SharedCache(SlowStore(), 0.2)
+        fStart = time.perf_counter()
+        assert oSharedCache.getMany(["a", "b"]) == {}
+        assert time.perf_counter() - fStart < 1
+        # Not waited for again
+        assert not oSharedCache.bAvailable
+        assert oSharedCache.getMany(["a"]) == {}
+
+    def test_serverRejectsInvalidKeys(self, cacheServerUrl):
+        for sPath in ["/../entry", "/%2e%2e/entry", "/" + "a" * 63]:
+            with pytest.raises(urllib.error.HTTPError) as oExcInfo:
+                urllib.request.urlopen(urllib.request.Request(cacheServerUrl + sPath, data=b"[]", method="PUT"),
+                                       timeout=5)
+            assert oExcInfo.value.code == 404
+
+    def test_batchLookup(self, cacheServerUrl, monkeypatch):
+        lKeys = ["%064x" % i for i in range(2500)]
+        oStore = HttpStore(cacheServerUrl, 5)
+        for sKey in lKeys[::2]:
+            oStore.put(sKey, [(int(sKey, 16), 1, "error", "MagicNumberCheck", "Magic.")])
+        lBatches = []
+        monkeypatch.setattr(oStore, "getMany", lambda lBatch, xGetMany=oStore.getMany:
+                            lBatches.append(len(lBatch)) or xGetMany(lBatch))
+
+        # A few requests for all the keys, within the timeout
+        oSharedCache = SharedCache(oStore, 5)
+        assert oSharedCache.getMany(lKeys) == {s: [(int(s, 16), 1, "error", "MagicNumberCheck", "Magic.")]
+                                               for s in lKeys[::2]}
+        assert sorted(lBatches) == [500, 1000, 1000]
+        assert oSharedCache.bAvailable
+
+    def test_writeToken(self, tmp_path, monkeypatch):
+        oServer = createServer(str(tmp_path / "server"), "127.0.0.1", sToken="secret")
+        threading.Thread(target=oServer.serve_forever, daemon=True).start()
+        sUrl = "http://127.0.0.1:%d" % oServer.server_address[1]
+        sKey = "0" * 64
+        tEntry = (1, 1, "error", "MagicNumberCheck", "Magic.")
+
+        # Without the token, the results are only read
+        for sToken in [None, "other"]:
+            oSharedCache = SharedCache(HttpStore(sUrl, 5, sToken), 5)
+            oSharedCache.put(sKey, [tEntry])
+            assert oSharedCache.flush()
+            assert not oSharedCache.bWritable and oSharedCache.bAvailable
+            assert oSharedCache.getMany([sKey]) == {}
+        oSharedCache = SharedCache(HttpStore(sUrl, 5, "secret"), 5)
+        oSharedCache.put(sKey, [tEntry])
+        assert oSharedCache.flush()
+        assert SharedCache(HttpStore(sUrl, 5), 5).getMany([sKey]) == {sKey: [tEntry]}
+        oServer.shutdown()
+        oServer.server_close()
+
+        # Listening on the network requires a token
+        monkeypatch.delenv("CHECKINTER_CACHE_TOKEN", raising=False)
+        for sHost in ["0.0.0.0", ""]:
+            with pytest.raises(SystemExit):
+                runCacheServerCommand([str(tmp_path / "server"), "--host", sHost, "--port", "0"])
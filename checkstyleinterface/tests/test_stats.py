@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_stats.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+import time
+
+from checkstyleinterface import stats
+
+
+class TestStats:
+    def test_percentile(self):
+        lValues = list(range(1, 101))
+        assert stats.percentile(lValues, 50) == 50
+        assert stats.percentile(lValues, 95) == 95
+        assert stats.percentile([3.0], 95) == 3.0
+        assert stats.percentile([], 50) is None
+
+    def test_parseDuration(self):
+        assert stats.parseDuration("90") == 90
+        assert stats.parseDuration("30m") == 1800
+        assert stats.parseDuration("7d") == 7 * 86400
+
+    def test_appendAndReadRecords(self, tmp_path):
+        sStatsFile = os.path.join(str(tmp_path), "sub", "stats.jsonl")
+        for iExitCode in [0, 1]:
+            oRunStats = stats.RunStats("hook")
+            oRunStats.setFiles({"A.java": None, "B.java": [1, 2, 3]})
+            with oRunStats.phase("checkstyle"):
+                pass
+            oRunStats.iCacheHits, oRunStats.iCacheMisses = 3, 1
+            oRunStats.addFileCosts(["A.java", "B.java"], 2.0)
+            oRunStats.setDone()
+            oRunStats.iExitCode = iExitCode
+            stats.appendRecord(sStatsFile, oRunStats)
+
+        lRecords = stats.readRecords(sStatsFile)
+        assert [d["exit_code"] for d in lRecords] == [0, 1]
+        assert lRecords[0]["mode"] == "hook"
+        assert lRecords[0]["files"] == 2
+        assert lRecords[0]["changed_lines"] == 3
+        assert lRecords[0]["cache_hit_rate"] == 0.75
+        assert "checkstyle" in lRecords[0]["phases"]
+        assert sum(fCost for _, fCost in lRecords[0]["slowest_files"]) == 2.0
+        assert stats.readRecords(sStatsFile, time.time() + 60) == []
+
+    def test_runStatsCommand(self, tmp_path, capsys):
+        sStatsFile = os.path.join(str(tmp_path), "stats.jsonl")
+        oRunStats = stats.RunStats("batch")
+        oRunStats.dFileCosts = {"Slow.java": 5.0, "Fast.java": 0.1}
+        oRunStats.setDone()
+        stats.appendRecord(sStatsFile, oRunStats)
+
+        assert stats.runStatsCommand(["-s", sStatsFile, "--since", "1d", "--top", "1"]) == 0
+        sOutput = capsys.readouterr().out
+        assert "1 runs" in sOutput
+        assert "Slow.java" in sOutput
+        assert "Fast.java" not in sOutput
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020 Quoc-Nam Dessoulles
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""test_transport.py"""
+
+__author__ = "Quoc-Nam Dessoulles"
+__email__ = "cokie.forever@gmail.com"
+__license__ = "MIT"
+
+import os
+import subprocess
+
+import pytest
+
+from checkstyleinterface import handoff, main
+from checkstyleinterface.benchmark.synthetic import generateRepository
+from checkstyleinterface.tests.util import useStubCheckstyle, writeJavaFiles
+
+
+def getErrorKeys(lErrors):
+    return sorted((e.sFile, e.iLine, e.sSeverity, e.sCategory) for e in lErrors)
+
+
+class TestTransport:
+    @pytest.mark.parametrize("iJobs", [1, 2])
+    def test_sameErrors(self, tmp_path, monkeypatch, iJobs):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        generateRepository(os.path.join(sFolder, "repo"), 30, fViolationDensity=0.1, bGit=False)
+        lArgs = ["-d", os.path.join(sFolder, "repo", "java"), "-r", "-j", sJarFile, "--jobs", str(iJobs)]
+        lExpected = getErrorKeys(main.runCheckstyle(main.parseArgs(lArgs + ["--transport", "file"])))
+        assert lExpected
+        assert getErrorKeys(main.runCheckstyle(main.parseArgs(lArgs + ["--transport", "pipe"]))) == lExpected
+
+    def test_noTemporaryFiles(self, tmp_path, monkeypatch):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        writeJavaFiles(os.path.join(sFolder, "java"), 3, {1: "// violation(error, MagicNumber) '0'."})
+        lTempFolders = []
+        monkeypatch.setattr(handoff.tempfile, "mkdtemp", lambda **d: lTempFolders.append(d) or str(tmp_path / "tmp"))
+        oArgs = main.parseArgs(["-d", os.path.join(sFolder, "java"), "-j", sJarFile, "--handoff", "argv"])
+        assert len(main.runCheckstyle(oArgs)) == 1
+        assert lTempFolders == []
+
+    @pytest.mark.parametrize("sTransport", ["pipe", "file"])
+    def test_failsWhenNoReport(self, tmp_path, monkeypatch, sTransport):
+        sFolder = str(tmp_path)
+        sJarFile = useStubCheckstyle(sFolder, monkeypatch)
+        writeJavaFiles(os.path.join(sFolder, "java"), 1, {})
+        sConfigFile = os.path.join(sFolder, "config.xml")
+        with open(sConfigFile, "w") as oFile:
+            oFile.write("foobar")
+        with pytest.raises(subprocess.CalledProcessError):
+            main.runCheckstyle(main.parseArgs(["-d", os.path.join(sFolder, "java"), "-j", sJarFile,
+                                               "-c", sConfigFile, "--transport", sTransport]))
@@ -35,6 +35,8 @@ import time
 from unittest.mock import patch
 
 from checkstyleinterface import main
+from checkstyleinterface.application import CheckstyleError
+from checkstyleinterface.benchmark.synthetic import installStubJava
 
 
 def withRetry(xCallable):
@@ -69,6 +71,40 @@ def assertErrors(lErrors, iErrorsCount, iWarningsCount, iInfoCount):
     assert len([e for e in lErrors if e.sSeverity.lower() == "info"]) == iInfoCount
 
 
+def useStubCheckstyle(sFolder, oMonkeypatch):
+    sBinFolder = os.path.join(sFolder, "bin")
+    sJarFile = os.path.join(sBinFolder, "checkstyle.jar")
+    oMonkeypatch.setenv("PATH", installStubJava(sBinFolder, sJarFile) + os.pathsep + os.environ["PATH"])
+    oMonkeypatch.setenv("CHECKINTER_CACHE_DIR", os.path.join(sFolder, "cache"))
+    # The machine-wide execution slots are then in the cache folder as well
+    oMonkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    return sJarFile
+
+
+def writeJavaFiles(sFolder, iCount, dViolations):
+    os.makedirs(sFolder)
+    for iIdx in range(iCount):
+        with open(os.path.join(sFolder, "Class%03d.java" % iIdx), "w") as oFile:
+            oFile.write("public class Class%03d {\n" % iIdx)
+            oFile.write("    int i = 0; %s\n" % dViolations.get(iIdx, ""))
+            oFile.write("}\n")
+
+
+def getErrorKeys(lErrors):
+    return sorted((e.sFile, e.iLine, e.sSeverity, e.sCategory, e.sMessage) for e in lErrors)
+
+
+def makeError(sFile, iLine, sSeverity, sCategory, sMessage):
+    oError = CheckstyleError()
+    oError.sFile = sFile
+    oError.iLine = iLine
+    oError.iCol = 1
+    oError.sSeverity = sSeverity
+    oError.sCategory = sCategory
+    oError.sMessage = sMessage
+    return oError
+
+
 class BaseTest:
     sResFolder = os.path.abspath(os.path.join(os.path.dirname(__file__), "res"))
     sCheckstyleJarFile = os.path.join(sResFolder, "checkstyle", "checkstyle-8.32-all.jar")
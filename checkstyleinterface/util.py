@@ -27,6 +27,7 @@ __author__ = "Quoc-Nam Dessoulles"
 __email__ = "cokie.forever@gmail.com"
 __license__ = "MIT"
 
+import ipaddress
 import os
 import stat
 import subprocess
@@ -38,6 +39,11 @@ from tkinter import ttk
 
 import psutil
 
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
 
 def tkVar(oVar, oValue=None, xCallback=None):
     if oValue is not None:
@@ -149,6 +155,12 @@ class MultiColumnListbox(ttk.Frame):
         super().__init__(oMaster, **kwargs)
         self.oTreeView = None
         self.lColumns = lColumns
+        # Column => item => sort key, kept on the Python side to avoid reading the cells back from Tk when sorting
+        self.dSortKeys = {sColName: {} for sColName in lColumns}
+        # Items whose children are sorted, the root one being always sorted
+        self.setSortedParents = {""}
+        # (column, descending) of the successive sorts, the last one being the primary order
+        self.lSortOrder = []
         self.setupWidgets()
         self.buildTree()
 
@@ -168,28 +180,80 @@ class MultiColumnListbox(ttk.Frame):
             self.oTreeView.heading(sColName, text=sColName, command=lambda c=sColName: self.sortByColumn(c, False))
             self.oTreeView.column(sColName, width=tkFont.Font().measure(sColName))
 
-    def setData(self, lData):
+    def setData(self, lData, lSortKeys=None):
+        self.clear()
+        lItemIds = self.insertRows("", lData, lSortKeys)
+        self.sortItems("", self.lSortOrder)
+        return lItemIds
+
+    def setGroups(self, lData, lSortKeys=None):
+        # Each group gets a placeholder child, so that it can be expanded before its actual children are inserted
+        self.clear()
+        lItemIds = self.insertRows("", lData, lSortKeys)
+        for sItemId in lItemIds:
+            self.oTreeView.insert(sItemId, tk.END, text="")
+        self.sortItems("", self.lSortOrder)
+        return lItemIds
+
+    def setChildren(self, sParentId, lData, lSortKeys=None):
+        lOldItemIds = self.oTreeView.get_children(sParentId)
+        for dKeys in self.dSortKeys.values():
+            for sItemId in lOldItemIds:
+                dKeys.pop(sItemId, None)
+        self.oTreeView.delete(*lOldItemIds)
+        lItemIds = self.insertRows(sParentId, lData, lSortKeys)
+        self.setSortedParents.add(sParentId)
+        self.sortItems(sParentId, self.lSortOrder)
+        return lItemIds
+
+    def setSortKeys(self, sItemId, lSortKeys):
+        for sColName, oKey in zip(self.lColumns, lSortKeys):
+            self.dSortKeys[sColName][sItemId] = oKey
+
+    def clear(self):
         self.oTreeView.delete(*self.oTreeView.get_children())
+        for dKeys in self.dSortKeys.values():
+            dKeys.clear()
+        self.setSortedParents = {""}
+
+    def insertRows(self, sParentId, lData, lSortKeys=None):
+        # Without explicit sort keys, the rows are sorted by their displayed values
+        oSortKeys = iter(lSortKeys) if lSortKeys is not None else None
         lItemIds = []
         for iRowIdx, lRowData in enumerate(lData):
-            lItemIds.append(self.oTreeView.insert("", tk.END, values=lRowData))
+            sItemId = self.oTreeView.insert(sParentId, tk.END, values=lRowData)
+            lItemIds.append(sItemId)
+            self.setSortKeys(sItemId, next(oSortKeys) if oSortKeys is not None else lRowData)
             for iColIdx, sValue in enumerate(lRowData):
                 iColWidth = tkFont.Font().measure(sValue)
                 if self.oTreeView.column(self.lColumns[iColIdx], width=None) < iColWidth:
                     self.oTreeView.column(self.lColumns[iColIdx], width=iColWidth)
         return lItemIds
 
+    def showTree(self, bShow):
+        self.oTreeView.config(show="tree headings" if bShow else "headings")
+        self.oTreeView.column("#0", width=30 if bShow else 0, stretch=False)
+
     def getData(self):
         for oRowItem in self.oTreeView.get_children(""):
             yield tuple([self.oTreeView.set(oRowItem, sColName) for sColName in self.lColumns])
 
     def sortByColumn(self, sColName, bDescending):
-        lData = [(self.oTreeView.set(sItemId, sColName), sItemId) for sItemId in self.oTreeView.get_children("")]
-        lData.sort(reverse=bDescending)
-        for iIdx, (_, sItemId) in enumerate(lData):
-            self.oTreeView.move(sItemId, "", iIdx)
+        # The sorts are stable, so the rows equal in this column stay in the order of the previous sorts
+        self.lSortOrder = [t for t in self.lSortOrder if t[0] != sColName] + [(sColName, bDescending)]
+        for sParentId in self.setSortedParents:
+            self.sortItems(sParentId, [(sColName, bDescending)])
         self.oTreeView.heading(sColName, command=lambda: self.sortByColumn(sColName, not bDescending))
 
+    def sortItems(self, sParentId, lSortOrder):
+        if not lSortOrder:
+            return
+        lItemIds = list(self.oTreeView.get_children(sParentId))
+        for sColName, bDescending in lSortOrder:
+            lItemIds.sort(key=self.dSortKeys[sColName].__getitem__, reverse=bDescending)
+        # A single reordering of all the children, instead of one move per row
+        self.oTreeView.set_children(sParentId, *lItemIds)
+
 
 def findAll(sText, sExpr):
     iLen = len(sExpr)
@@ -202,14 +266,14 @@ def findAll(sText, sExpr):
         iStart += iLen
 
 
-def getIntellijLocation():
+def getIntellijProcess():
     lProcessesNames = ["idea", "idea64"]
     if os.name == "nt":
         lProcessesNames = [s + ".exe" for s in lProcessesNames]
     for oProcess in psutil.process_iter(["pid", "name", "exe"]):
         try:
             if oProcess.name() in lProcessesNames:
-                return oProcess.exe()
+                return oProcess.pid, oProcess.exe()
         except psutil.Error:
             pass
     return None
@@ -226,3 +290,91 @@ def startFile(sFilePath):
 
 def makeExecutable(sFile):
     os.chmod(sFile, (os.stat(sFile).st_mode & 0o777) | stat.S_IEXEC)
+
+
+def getCacheDir():
+    sCacheDir = os.getenv("CHECKINTER_CACHE_DIR")
+    if sCacheDir:
+        return os.path.abspath(sCacheDir)
+    if sys.platform == "win32":
+        sBaseDir = os.getenv("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        sBaseDir = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+    else:
+        sBaseDir = os.getenv("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+    return os.path.join(sBaseDir, "checkinter")
+
+
+def getRuntimeDir():
+    """Folder of the files shared by the processes running on the machine, like locks."""
+    sRuntimeDir = os.getenv("XDG_RUNTIME_DIR") if sys.platform.startswith("linux") else None
+    return os.path.join(sRuntimeDir, "checkinter") if sRuntimeDir else os.path.join(getCacheDir(), "run")
+
+
+def lockFile(oFile, bWait=True):
+    """Locks a file opened in binary mode against the other processes and the other open files, until unlockFile or
+    the end of the process. Returns False if bWait is False and the file is already locked."""
+    if sys.platform == "win32":
+        oFile.seek(0)
+        while True:
+            try:
+                msvcrt.locking(oFile.fileno(), msvcrt.LK_LOCK if bWait else msvcrt.LK_NBLCK, 1)
+                return True
+            except OSError:
+                # LK_LOCK gives up after 10 seconds
+                if not bWait:
+                    return False
+    try:
+        fcntl.flock(oFile.fileno(), fcntl.LOCK_EX if bWait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+def unlockFile(oFile):
+    if sys.platform == "win32":
+        oFile.seek(0)
+        msvcrt.locking(oFile.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(oFile.fileno(), fcntl.LOCK_UN)
+
+
+def startDetached(lArgs, sLogFile=None):
+    """Starts a process which goes on after this one exits, without its console, with its output in sLogFile."""
+    dKwargs = {}
+    if sys.platform == "win32":
+        dKwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        dKwargs["start_new_session"] = True
+    if sLogFile:
+        os.makedirs(os.path.dirname(os.path.abspath(sLogFile)), exist_ok=True)
+        with open(sLogFile, "ab") as oLogFile:
+            return subprocess.Popen(lArgs, stdin=subprocess.DEVNULL, stdout=oLogFile, stderr=subprocess.STDOUT,
+                                    **dKwargs)
+    return subprocess.Popen(lArgs, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            **dKwargs)
+
+
+def lowerPriority(iPid=None):
+    """Lowers the CPU and I/O priorities of a process, by default this one, and of the processes it starts
+    afterwards."""
+    try:
+        oProcess = psutil.Process(iPid)
+        if sys.platform == "win32":
+            oProcess.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+        else:
+            oProcess.nice(max(oProcess.nice(), 10))
+        if hasattr(oProcess, "ionice"):
+            oProcess.ionice(psutil.IOPRIO_VERYLOW if sys.platform == "win32" else psutil.IOPRIO_CLASS_IDLE)
+    except (psutil.Error, OSError, ValueError):
+        pass
+
+
+def isLoopbackHost(sHost):
+    if sHost.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(sHost).is_loopback
+    except ValueError:
+        # All the addresses, or a host name
+        return False